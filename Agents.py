@@ -4,14 +4,134 @@ Handles polling real-time and historical market data via APIs.
 """
 
 import os
+import time
+import threading
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
 
+from utils.cache import FileCache
+from utils.market_hours import DAILY_INTERVALS, MARKET_TZ, daily_ttl, is_us_session
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent Yahoo Finance requests
+MAX_FETCH_WORKERS = 16
+
+# Maximum number of symbols Yahoo Finance accepts in a single download request
+YF_BATCH_SIZE = 20
+
+# Cache TTL in seconds by data interval, aligned to how often bars change.
+# Daily and weekly bars are handled by _ttl_for, since they only move while
+# the US market is open.
+INTERVAL_TTLS = {
+    "1m": 60, "2m": 60, "5m": 60, "15m": 60,
+    "30m": 300, "60m": 300, "90m": 300, "1h": 300,
+    "1mo": 7 * 86400, "3mo": 7 * 86400
+}
+
+# Major market indices (symbol -> display name)
+_INDICES = MappingProxyType({
+    "^GSPC": "S&P 500",
+    "^DJI": "Dow Jones",
+    "^IXIC": "NASDAQ",
+    "^FTSE": "FTSE 100",
+    "^N225": "Nikkei 225",
+    "^HSI": "Hang Seng"
+})
+
+# Sector ETFs (symbol -> sector)
+_SECTOR_ETFS = MappingProxyType({
+    "XLF": "Financials",
+    "XLK": "Technology",
+    "XLV": "Healthcare",
+    "XLE": "Energy",
+    "XLY": "Consumer Discretionary",
+    "XLP": "Consumer Staples",
+    "XLI": "Industrials",
+    "XLB": "Materials",
+    "XLU": "Utilities",
+    "XLRE": "Real Estate"
+})
+
+# Economic indicators (symbol -> display name)
+_INDICATORS = MappingProxyType({
+    "^TNX": "10-Year Treasury Yield",
+    "^TYX": "30-Year Treasury Yield",
+    "^FVX": "5-Year Treasury Yield",
+    "GC=F": "Gold",
+    "CL=F": "Crude Oil",
+    "EURUSD=X": "EUR/USD",
+    "JPY=X": "USD/JPY"
+})
+
+# Major Asia tech stocks
+_ASIA_TECH = (
+    "TSM", "2330.TW",  # TSMC
+    "005930.KS",  # Samsung
+    "9988.HK", "BABA",  # Alibaba
+    "9999.HK", "BIDU",  # Baidu
+    "0700.HK", "TCEHY",  # Tencent
+    "9618.HK", "JD",  # JD.com
+    "6758.T", "SONY",  # Sony
+    "3690.HK", "MEITF"  # Meituan
+)
+
+# Sentiment labels and the average percent-change boundaries between them
+_SENTIMENT_LABELS = ("bearish", "slightly bearish", "neutral", "slightly bullish", "bullish")
+_SENTIMENT_BINS = np.array([-2.0, -0.5, 0.5, 2.0])
+
+def _aggregate_closes(closes: np.ndarray) -> Tuple[float, float, float, int]:
+    """
+    Aggregate previous/current closes across a set of tickers.
+    
+    Args:
+        closes: Array of shape (n_tickers, 2) holding previous and current closes
+        
+    Returns:
+        Tuple of (total current value, total previous value, average percent change, sentiment index)
+    """
+    if closes.shape[0] == 0:
+        return 0.0, 0.0, 0.0, _SENTIMENT_LABELS.index("neutral")
+    
+    previous, current = closes[:, 0], closes[:, 1]
+    avg_change = float(((current - previous) / previous * 100).mean())
+    
+    # Boundaries are exclusive on the upper side, matching "change > bound" checks
+    sentiment_idx = int(np.searchsorted(_SENTIMENT_BINS, avg_change, side="left"))
+    
+    return float(current.sum()), float(previous.sum()), avg_change, sentiment_idx
+
+def _news_timestamp(item: Dict[str, Any]) -> Optional[float]:
+    """
+    Get the publish time of a yfinance news item.
+    
+    Args:
+        item: News item, either flat (providerPublishTime) or in the newer nested
+            format with an ISO pubDate under content
+        
+    Returns:
+        POSIX timestamp, or None if the item is undated
+    """
+    timestamp = item.get("providerPublishTime")
+    if timestamp:
+        return float(timestamp)
+    
+    pub_date = (item.get("content") or {}).get("pubDate")
+    if pub_date:
+        try:
+            return datetime.fromisoformat(pub_date.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    
+    return None
+
 class APIAgent:
     """
     Agent responsible for retrieving financial market data from APIs.
@@ -22,9 +142,77 @@ class APIAgent:
         """Initialize the API agent."""
         self.cache = {}
         self.cache_expiry = {}
-        self.cache_duration = 300  # 5 minutes in seconds
+        self.cache_duration = 300  # 5 minutes in seconds, used for unknown intervals
+        # In-memory expiry times are on the monotonic clock; the file cache uses wall-clock time
+        self._cache_lock = threading.Lock()
+        self._cache_dir = Path(os.environ.get("FIN_CACHE_DIR", "~/.fin_cache")).expanduser()
+        self.file_cache = FileCache(self._cache_dir)
+        self._ticker_cache: Dict[str, yf.Ticker] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+    
+    def _ticker(self, symbol: str) -> yf.Ticker:
+        """Get a reusable yfinance Ticker object for a symbol."""
+        with self._cache_lock:
+            stock = self._ticker_cache.get(symbol)
+            if stock is None:
+                stock = yf.Ticker(symbol)
+                self._ticker_cache[symbol] = stock
+        return stock
     
-    def get_stock_data(self, ticker: str, period: str = "1d", interval: str = "1h") -> pd.DataFrame:
+    def _ttl_for(self, interval: str, symbol: str) -> float:
+        """Get the cache TTL in seconds for a symbol's bars at a data interval."""
+        # Daily bars double as current quotes, so they stay as fresh as the default
+        # while their market is open; only US-session symbols are held overnight
+        if interval in DAILY_INTERVALS:
+            return daily_ttl(datetime.now(tz=MARKET_TZ), open_ttl=self.cache_duration, us_session=is_us_session(symbol))
+        
+        return INTERVAL_TTLS.get(interval, self.cache_duration)
+    
+    def get_cached(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Get cached data, checking memory first and then the on-disk cache.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached DataFrame, or None if missing or expired
+        """
+        with self._cache_lock:
+            if key in self.cache and self.cache_expiry.get(key, 0) > time.monotonic():
+                return self.cache[key]
+        
+        # The TTL stored with the entry decides freshness, since daily TTLs depend on
+        # when the entry was written; in memory it lives only for what remains of it
+        data, remaining = self.file_cache.get_with_lifetime(key)
+        if data is not None:
+            with self._cache_lock:
+                self.cache[key] = data
+                self.cache_expiry[key] = time.monotonic() + remaining
+        
+        return data
+    
+    def set_cached(self, key: str, data: pd.DataFrame, ttl: float) -> None:
+        """
+        Store data in both the in-memory and on-disk caches.
+        Empty frames (failed or NaN-only downloads) are not cached.
+        
+        Args:
+            key: Cache key
+            data: DataFrame to cache
+            ttl: Time to live in seconds
+        """
+        if data.empty:
+            return
+        
+        with self._cache_lock:
+            self.cache[key] = data
+            self.cache_expiry[key] = time.monotonic() + ttl
+        
+        self.file_cache.set(key, data, ttl)
+    
+    def get_stock_data(self, ticker: str, period: str = "1d", interval: str = "1h", rows: Optional[int] = None) -> pd.DataFrame:
         """
         Retrieve stock data for a specific ticker.
         
@@ -32,51 +220,156 @@ class APIAgent:
             ticker: Stock ticker symbol
             period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
             interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+            rows: Optional number of most recent bars to return (the full period is still cached)
             
         Returns:
             DataFrame with stock data
         """
         cache_key = f"{ticker}_{period}_{interval}"
+        ttl = self._ttl_for(interval, ticker)
         
         # Check if we have a non-expired cached result
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > datetime.now().timestamp():
+        cached = self.get_cached(cache_key)
+        if cached is not None:
             logger.info(f"Using cached data for {cache_key}")
-            return self.cache[cache_key]
+            return cached if rows is None else cached.tail(rows)
+        
+        # Coalesce concurrent misses for the same key into a single fetch
+        with self._inflight_lock:
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                future = Future()
+                self._inflight[cache_key] = future
+        
+        if inflight is not None:
+            logger.info(f"Waiting for in-flight fetch of {cache_key}")
+            data = inflight.result()
+            return data if rows is None else data.tail(rows)
         
         try:
-            stock = yf.Ticker(ticker)
+            stock = self._ticker(ticker)
             data = stock.history(period=period, interval=interval)
             
             # Cache the result
-            self.cache[cache_key] = data
-            self.cache_expiry[cache_key] = datetime.now().timestamp() + self.cache_duration
+            self.set_cached(cache_key, data, ttl)
+            future.set_result(data)
             
-            return data
+            return data if rows is None else data.tail(rows)
         except Exception as e:
             logger.error(f"Error retrieving stock data for {ticker}: {str(e)}")
+            future.set_exception(e)
             raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
     
-    def get_multiple_stocks(self, tickers: List[str], period: str = "1d") -> Dict[str, pd.DataFrame]:
+    def _fetch_many(self, keys: List[Tuple[str, str, str]]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
         """
-        Retrieve data for multiple stocks.
+        Retrieve stock data for several tickers concurrently.
+        
+        Args:
+            keys: List of (ticker, period, interval) tuples
+            
+        Returns:
+            Tuple of (data by ticker, errors by ticker)
+        """
+        results = {}
+        errors = {}
+        
+        if not keys:
+            return results, errors
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(keys))) as executor:
+            futures = {
+                executor.submit(self.get_stock_data, ticker, period, interval): ticker
+                for ticker, period, interval in keys
+            }
+            
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    results[ticker] = future.result()
+                except Exception as e:
+                    logger.error(f"Error retrieving data for {ticker}: {str(e)}")
+                    errors[ticker] = e
+        
+        return results, errors
+    
+    def get_stock_data_bulk(self, tickers: List[str], period: str = "1d", interval: str = "1h") -> Dict[str, pd.DataFrame]:
+        """
+        Retrieve stock data for several tickers with batched download requests.
         
         Args:
             tickers: List of stock ticker symbols
-            period: Time period
+            period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+            interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
             
         Returns:
-            Dictionary of stock dataframes with ticker as key
+            Dictionary of stock dataframes with ticker as key; tickers that
+            could not be retrieved are omitted
         """
         result = {}
+        missing = []
+        
+        # Serve what we can from the cache
         for ticker in tickers:
+            cached = self.get_cached(f"{ticker}_{period}_{interval}")
+            if cached is not None:
+                result[ticker] = cached
+            else:
+                missing.append(ticker)
+        
+        if result:
+            logger.info(f"Using cached data for {len(result)} of {len(tickers)} tickers")
+        
+        for start in range(0, len(missing), YF_BATCH_SIZE):
+            batch = missing[start:start + YF_BATCH_SIZE]
+            
             try:
-                result[ticker] = self.get_stock_data(ticker, period)
+                data = yf.download(
+                    batch,
+                    period=period,
+                    interval=interval,
+                    group_by="ticker",
+                    threads=True,
+                    progress=False
+                )
             except Exception as e:
-                logger.error(f"Error retrieving data for {ticker}: {str(e)}")
-                result[ticker] = None
+                logger.error(f"Error retrieving bulk stock data for {', '.join(batch)}: {str(e)}")
+                continue
+            
+            for ticker in batch:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if ticker not in data.columns.get_level_values(0):
+                        continue
+                    frame = data[ticker].dropna(how="all")
+                else:
+                    frame = data.dropna(how="all")
+                
+                # yfinance returns all-NaN columns for a ticker that failed
+                if frame.empty:
+                    continue
+                
+                result[ticker] = frame
+                self.set_cached(f"{ticker}_{period}_{interval}", frame, self._ttl_for(interval, ticker))
         
         return result
     
+    def get_multiple_stocks(self, tickers: List[str], period: str = "1d") -> Dict[str, pd.DataFrame]:
+        """
+        Retrieve data for multiple stocks.
+        
+        Args:
+            tickers: List of stock ticker symbols
+            period: Time period
+            
+        Returns:
+            Dictionary of stock dataframes with ticker as key
+        """
+        data, _ = self._fetch_many([(ticker, period, "1h") for ticker in tickers])
+        
+        return {ticker: data.get(ticker) for ticker in tickers}
+    
     def get_market_indices(self) -> Dict[str, Dict[str, float]]:
         """
         Retrieve current values for major market indices.
@@ -84,29 +377,24 @@ class APIAgent:
         Returns:
             Dictionary of index data
         """
-        indices = {
-            "^GSPC": "S&P 500",
-            "^DJI": "Dow Jones",
-            "^IXIC": "NASDAQ",
-            "^FTSE": "FTSE 100",
-            "^N225": "Nikkei 225",
-            "^HSI": "Hang Seng"
-        }
-        
         result = {}
+        stock_data = self.get_stock_data_bulk(list(_INDICES), period="1d", interval="1d")
         
-        for symbol, name in indices.items():
+        for symbol, name in _INDICES.items():
             try:
-                data = self.get_stock_data(symbol, period="1d", interval="1d")
+                data = stock_data.get(symbol)
+                if data is None:
+                    raise ValueError(f"No data returned for {symbol}")
+                
                 if not data.empty:
-                    last_row = data.iloc[-1]
-                    last_row_prev = data.iloc[-2] if len(data) > 1 else last_row
+                    closes = data["Close"].tail(2).to_numpy()
+                    last_close, prev_close = closes[-1], closes[0]
                     
-                    change_percent = ((last_row["Close"] - last_row_prev["Close"]) / last_row_prev["Close"]) * 100
+                    change_percent = ((last_close - prev_close) / prev_close) * 100
                     
                     result[name] = {
-                        "price": last_row["Close"],
-                        "change_percent": change_percent
+                        "price": float(last_close),
+                        "change_percent": float(change_percent)
                     }
             except Exception as e:
                 logger.error(f"Error retrieving index {name}: {str(e)}")
@@ -125,29 +413,20 @@ class APIAgent:
         Returns:
             Dictionary with sector performance percentages
         """
-        sector_etfs = {
-            "XLF": "Financials",
-            "XLK": "Technology",
-            "XLV": "Healthcare",
-            "XLE": "Energy",
-            "XLY": "Consumer Discretionary",
-            "XLP": "Consumer Staples",
-            "XLI": "Industrials",
-            "XLB": "Materials",
-            "XLU": "Utilities",
-            "XLRE": "Real Estate"
-        }
-        
         result = {}
+        stock_data = self.get_stock_data_bulk(list(_SECTOR_ETFS), period="5d", interval="1h")
         
-        for symbol, sector in sector_etfs.items():
+        for symbol, sector in _SECTOR_ETFS.items():
             try:
-                data = self.get_stock_data(symbol, period="5d")
+                data = stock_data.get(symbol)
+                if data is None:
+                    raise ValueError(f"No data returned for {symbol}")
+                
                 if not data.empty:
-                    first_close = data.iloc[0]["Close"]
-                    last_close = data.iloc[-1]["Close"]
+                    closes = data["Close"].to_numpy()
+                    first_close, last_close = closes[0], closes[-1]
                     percent_change = ((last_close - first_close) / first_close) * 100
-                    result[sector] = round(percent_change, 2)
+                    result[sector] = round(float(percent_change), 2)
             except Exception as e:
                 logger.error(f"Error retrieving sector performance for {sector}: {str(e)}")
                 result[sector] = 0
@@ -161,23 +440,17 @@ class APIAgent:
         Returns:
             Dictionary with economic indicators
         """
-        indicators = {
-            "^TNX": "10-Year Treasury Yield",
-            "^TYX": "30-Year Treasury Yield",
-            "^FVX": "5-Year Treasury Yield",
-            "GC=F": "Gold",
-            "CL=F": "Crude Oil",
-            "EURUSD=X": "EUR/USD",
-            "JPY=X": "USD/JPY"
-        }
-        
         result = {}
+        stock_data = self.get_stock_data_bulk(list(_INDICATORS), period="1d", interval="1h")
         
-        for symbol, name in indicators.items():
+        for symbol, name in _INDICATORS.items():
             try:
-                data = self.get_stock_data(symbol, period="1d")
+                data = stock_data.get(symbol)
+                if data is None:
+                    raise ValueError(f"No data returned for {symbol}")
+                
                 if not data.empty:
-                    result[name] = round(data.iloc[-1]["Close"], 4)
+                    result[name] = round(float(data["Close"].to_numpy()[-1]), 4)
             except Exception as e:
                 logger.error(f"Error retrieving economic indicator {name}: {str(e)}")
                 result[name] = 0
@@ -191,54 +464,39 @@ class APIAgent:
         Returns:
             Dictionary with exposure data and analysis
         """
-        # Major Asia tech stocks
-        asia_tech_stocks = [
-            "TSM", "2330.TW",  # TSMC
-            "005930.KS",  # Samsung
-            "9988.HK", "BABA",  # Alibaba
-            "9999.HK", "BIDU",  # Baidu
-            "0700.HK", "TCEHY",  # Tencent
-            "9618.HK", "JD",  # JD.com
-            "6758.T", "SONY",  # Sony
-            "3690.HK", "MEITF"  # Meituan
-        ]
-        
         # Get data for these stocks
-        stock_data = {}
+        price_data = self.get_stock_data_bulk(list(_ASIA_TECH), period="5d", interval="1h")
         earnings_surprises = {}
         
-        for ticker in asia_tech_stocks:
+        # Previous and current close per ticker; a single bar counts as both,
+        # giving a zero change
+        tails = [data["Close"].tail(2).to_numpy() for data in price_data.values() if not data.empty]
+        closes = np.array([(tail[0], tail[-1]) for tail in tails], dtype=np.float64).reshape(-1, 2)
+        total_value, total_previous_value, total_change, sentiment_idx = _aggregate_closes(closes)
+        
+        for ticker in _ASIA_TECH:
+            if ticker not in price_data:
+                continue
+            
             try:
-                data = self.get_stock_data(ticker, period="5d")
-                if not data.empty:
-                    stock_data[ticker] = {
-                        "current_price": data.iloc[-1]["Close"],
-                        "previous_price": data.iloc[-2]["Close"] if len(data) > 1 else data.iloc[-1]["Close"],
-                        "percent_change": ((data.iloc[-1]["Close"] - data.iloc[-2]["Close"]) / data.iloc[-2]["Close"] * 100) 
-                                         if len(data) > 1 else 0
-                    }
-                    
-                # Check for earnings surprises using stock's info
-                stock = yf.Ticker(ticker)
-                calendar = stock.calendar
-                if calendar is not None and hasattr(calendar, 'iloc') and not calendar.empty:
-                    # Try to get earnings data
-                    try:
-                        earnings = stock.earnings
-                        if earnings is not None and not earnings.empty and "Earnings" in earnings.columns and "Revenue" in earnings.columns:
-                            latest_earning = earnings.iloc[-1]
-                            earnings_surprises[ticker] = {
-                                "surprise": latest_earning["Earnings"],
-                                "estimate": latest_earning.get("Estimate", 0) or 0
-                            }
-                    except:
-                        pass
+                # Check for earnings surprises using the earnings schedule; one
+                # request covers both the check and the reported figures
+                earnings_dates = self._ticker(ticker).earnings_dates
+                if earnings_dates is None or earnings_dates.empty:
+                    continue
+                
+                # Most recent row that has actually been reported
+                reported = earnings_dates.dropna(subset=["Reported EPS"])
+                if reported.empty:
+                    continue
+                
+                latest_earning = reported.iloc[0]
+                earnings_surprises[ticker] = {
+                    "surprise": latest_earning["Reported EPS"],
+                    "estimate": latest_earning.get("EPS Estimate", 0) or 0
+                }
             except Exception as e:
-                logger.error(f"Error retrieving data for {ticker}: {str(e)}")
-        
-        # Calculate total exposure and percentage change
-        total_value = sum([data.get("current_price", 0) for ticker, data in stock_data.items()])
-        total_previous_value = sum([data.get("previous_price", 0) for ticker, data in stock_data.items()])
+                logger.error(f"Error retrieving earnings for {ticker}: {str(e)}")
         
         # Calculate percentage of portfolio (assuming 22% allocation)
         portfolio_percentage = 22  # As mentioned in the use case
@@ -254,18 +512,7 @@ class APIAgent:
                     significant_surprises[company_name] = round(surprise_percent, 2)
         
         # Regional sentiment analysis based on price movements
-        total_change = sum([data.get("percent_change", 0) for ticker, data in stock_data.items()]) / len(stock_data) if stock_data else 0
-        
-        if total_change > 2:
-            sentiment = "bullish"
-        elif total_change > 0.5:
-            sentiment = "slightly bullish"
-        elif total_change > -0.5:
-            sentiment = "neutral"
-        elif total_change > -2:
-            sentiment = "slightly bearish"
-        else:
-            sentiment = "bearish"
+        sentiment = _SENTIMENT_LABELS[sentiment_idx]
             
         return {
             "exposure": {
@@ -291,18 +538,29 @@ class APIAgent:
             List of news items with title, link, and publish date
         """
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news
+            stock = self._ticker(ticker)
+            news = stock.news or []
+            
+            # Drop items published before the lookback window; undated items are kept
+            cutoff = time.time() - days * 86400
             
             result = []
-            for item in news[:5]:  # Limit to top 5 news items
+            for item in news:
+                timestamp = _news_timestamp(item)
+                if timestamp is not None and timestamp < cutoff:
+                    continue
+                
+                # Newer yfinance responses nest the fields under content
+                content = item.get("content") or {}
                 result.append({
-                    "title": item.get("title", ""),
-                    "link": item.get("link", ""),
-                    "publisher": item.get("publisher", ""),
-                    "published": datetime.fromtimestamp(item.get("providerPublishTime", 0)).strftime("%Y-%m-%d %H:%M")
+                    "title": content.get("title") or item.get("title", ""),
+                    "link": (content.get("canonicalUrl") or {}).get("url") or item.get("link", ""),
+                    "publisher": (content.get("provider") or {}).get("displayName") or item.get("publisher", ""),
+                    "published": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp is not None else ""
                 })
-                
+                if len(result) == 5:  # Limit to top 5 news items
+                    break
+            
             return result
         except Exception as e:
             logger.error(f"Error retrieving news for {ticker}: {str(e)}")
@@ -1,11 +1,15 @@
 import streamlit as st
+import orjson
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import threading
 import io
 import base64
 import time
-import os
 import numpy as np
-import tempfile
 from datetime import datetime
 
 # Set page title and layout
@@ -20,7 +24,27 @@ st.set_page_config(
 # Using 0.0.0.0 instead of localhost for proper container networking
 ORCHESTRATOR_URL = "http://0.0.0.0:8000"
 
+# Connect and read timeouts (seconds) for orchestrator calls
+REQUEST_TIMEOUT = (3, 30)
 
+# Portfolio fields shown in the Market Overview panel
+PORTFOLIO_FIELDS = "total_value,daily_change_percent,allocation.regions"
+
+# Recordings larger than this (bytes) are streamed to the orchestrator in chunks
+STREAM_UPLOAD_THRESHOLD = 1024 * 1024
+
+# Shared HTTP session so calls to the orchestrator reuse pooled connections
+SESSION = requests.Session()
+SESSION.headers["Connection"] = "keep-alive"
+SESSION.headers["Accept-Encoding"] = "gzip"
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_current_date():
     """Get the current date formatted for display."""
     now = datetime.now()
@@ -36,17 +60,17 @@ def record_audio():
     
     return audio_bytes
 
-def save_audio_to_file(audio_bytes):
-    """Save audio bytes to a temporary file."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as f:
-        f.write(audio_bytes)
-        return f.name
-
-def transcribe_audio(audio_file):
-    """Send audio to voice service for transcription."""
+def transcribe_audio(audio_bytes):
+    """Send recorded audio bytes to voice service for transcription."""
     try:
-        files = {'audio': open(audio_file, 'rb')}
-        response = requests.post(f"{ORCHESTRATOR_URL}/voice/transcribe", files=files)
+        # Large recordings are wrapped in a file-like object so requests streams them in chunks
+        body = io.BytesIO(audio_bytes) if len(audio_bytes) > STREAM_UPLOAD_THRESHOLD else audio_bytes
+        response = SESSION.post(
+            f"{ORCHESTRATOR_URL}/voice/transcribe",
+            data=body,
+            headers={"Content-Type": "audio/wav"},
+            timeout=(3, 60)
+        )
         if response.status_code == 200:
             return response.json().get("text", "")
         else:
@@ -55,17 +79,14 @@ def transcribe_audio(audio_file):
     except Exception as e:
         st.error(f"Error transcribing audio: {str(e)}")
         return None
-    finally:
-        # Clean up temp file
-        if os.path.exists(audio_file):
-            os.remove(audio_file)
 
 def process_query(query):
     """Send the query to the orchestrator and get a response."""
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{ORCHESTRATOR_URL}/process",
-            json={"query": query}
+            json={"query": query},
+            timeout=REQUEST_TIMEOUT
         )
         if response.status_code == 200:
             return response.json()
@@ -76,22 +97,98 @@ def process_query(query):
         st.error(f"Error connecting to orchestrator: {str(e)}")
         return None
 
-def text_to_speech(text):
-    """Convert text to speech and return audio bytes."""
+@st.cache_data(ttl=600, max_entries=128, show_spinner=False)
+def synthesize_speech(text):
+    """Request speech for the given text from the voice service."""
+    response = SESSION.post(
+        f"{ORCHESTRATOR_URL}/voice/synthesize",
+        json={"text": text},
+        timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return base64.b64decode(response.json().get("audio_base64", ""))
+
+@st.cache_resource
+def get_speech_executor():
+    """Get the worker pool used to synthesize speech in the background."""
+    return ThreadPoolExecutor(max_workers=4)
+
+def start_text_to_speech(text):
+    """Start converting text to speech without waiting for the audio."""
+    return get_speech_executor().submit(synthesize_speech, text)
+
+def text_to_speech(speech):
+    """Convert text to speech and return audio bytes.
+    
+    Accepts either the text itself or a Future from start_text_to_speech.
+    """
     try:
-        response = requests.post(
-            f"{ORCHESTRATOR_URL}/voice/synthesize",
-            json={"text": text}
-        )
-        if response.status_code == 200:
-            return base64.b64decode(response.json().get("audio_base64", ""))
-        else:
-            st.error(f"Error synthesizing speech: {response.text}")
-            return None
+        if isinstance(speech, Future):
+            return speech.result()
+        return synthesize_speech(speech)
+    except requests.HTTPError as e:
+        st.error(f"Error synthesizing speech: {e.response.text}")
+        return None
     except Exception as e:
         st.error(f"Error connecting to voice service: {str(e)}")
         return None
 
+def _json_or_raise(response):
+    """Return the parsed JSON body of a response, raising on a non-200 status.
+    
+    Raising (rather than returning None) keeps st.cache_data from memoizing
+    a failed call for the full TTL.
+    """
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_indices():
+    """Fetch market indices from the orchestrator."""
+    return _json_or_raise(SESSION.get(f"{ORCHESTRATOR_URL}/api/indices", timeout=REQUEST_TIMEOUT))
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_portfolio():
+    """Fetch portfolio data from the orchestrator."""
+    return _json_or_raise(SESSION.get(
+        f"{ORCHESTRATOR_URL}/api/portfolio",
+        params={"fields": PORTFOLIO_FIELDS},
+        timeout=REQUEST_TIMEOUT
+    ))
+
+def _with_script_ctx(fn):
+    """Wrap fn so it runs under the calling script's ScriptRunContext.
+    
+    st.cache_data needs the context to resolve the session; worker threads
+    don't inherit it.
+    """
+    ctx = get_script_run_ctx()
+    
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+    
+    return run
+
+def _outcome(future):
+    """Return (result, None) for a completed future, or (None, error) if it raised."""
+    try:
+        return future.result(), None
+    except Exception as e:
+        return None, e
+
+def fetch_overview():
+    """
+    Fetch market indices and portfolio data concurrently.
+    
+    Returns:
+        ((indices, error), (portfolio, error)) so each panel fails on its own
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        indices_future = executor.submit(_with_script_ctx(fetch_indices))
+        portfolio_future = executor.submit(_with_script_ctx(fetch_portfolio))
+    return _outcome(indices_future), _outcome(portfolio_future)
+
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -124,9 +221,8 @@ with st.sidebar:
                 response = process_query(query)
                 if response:
                     st.session_state.messages.append({"role": "assistant", "content": response.get("text", "")})
-                    audio_bytes = text_to_speech(response.get("text", ""))
-                    if audio_bytes:
-                        st.session_state.audio_playback = audio_bytes
+                    # Synthesize in the background so the reply renders while audio is generated
+                    st.session_state.audio_playback = start_text_to_speech(response.get("text", ""))
     
     st.divider()
     
@@ -141,17 +237,15 @@ with st.sidebar:
     if st.session_state.get("audio_recording") is not None:
         if st.button("Submit Voice Query"):
             with st.spinner("Transcribing..."):
-                audio_file = save_audio_to_file(st.session_state.audio_recording)
-                transcription = transcribe_audio(audio_file)
+                transcription = transcribe_audio(st.session_state.audio_recording)
                 if transcription:
                     st.session_state.messages.append({"role": "user", "content": transcription})
                     with st.spinner("Processing..."):
                         response = process_query(transcription)
                         if response:
                             st.session_state.messages.append({"role": "assistant", "content": response.get("text", "")})
-                            audio_bytes = text_to_speech(response.get("text", ""))
-                            if audio_bytes:
-                                st.session_state.audio_playback = audio_bytes
+                            # Synthesize in the background so the reply renders while audio is generated
+                            st.session_state.audio_playback = start_text_to_speech(response.get("text", ""))
                     
                     # Reset recording
                     st.session_state.audio_recording = None
@@ -159,15 +253,19 @@ with st.sidebar:
 # Main content area - Chat interface
 st.header("Financial Assistant Chat")
 
+# Audio for the latest assistant response is played once, after the history
+pending_audio = st.session_state.pop("audio_playback", None)
+
 # Display chat messages
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.write(message["content"])
-        
-        # Play audio for assistant responses
-        if message["role"] == "assistant" and st.session_state.get("audio_playback") is not None:
-            st.audio(st.session_state.audio_playback, format="audio/wav")
-            st.session_state.audio_playback = None
+
+# Play audio for the latest assistant response
+if pending_audio is not None and st.session_state.messages and st.session_state.messages[-1]["role"] == "assistant":
+    audio_bytes = text_to_speech(pending_audio)
+    if audio_bytes:
+        st.audio(audio_bytes, format="audio/wav")
 
 # Text input for chat
 query = st.chat_input("Ask about financial markets...")
@@ -178,59 +276,70 @@ if query:
         response = process_query(query)
         if response:
             st.session_state.messages.append({"role": "assistant", "content": response.get("text", "")})
-            audio_bytes = text_to_speech(response.get("text", ""))
-            if audio_bytes:
-                st.session_state.audio_playback = audio_bytes
+            # Synthesize in the background so the reply renders while audio is generated
+            st.session_state.audio_playback = start_text_to_speech(response.get("text", ""))
                 
     # Force a rerun to update the UI
     st.rerun()
 
-# Market Overview Section
-st.header("Market Overview")
-
-# Create two columns
-col1, col2 = st.columns(2)
-
-with col1:
-    st.subheader("Major Indices")
-    try:
-        response = requests.get(f"{ORCHESTRATOR_URL}/api/indices")
-        if response.status_code == 200:
-            indices = response.json()
-            for idx, data in indices.items():
-                delta = data.get("change_percent", 0)
+@st.fragment(run_every="30s")
+def market_overview():
+    """Render the Market Overview panels; refreshes on its own timer."""
+    # Market Overview Section
+    st.header("Market Overview")
+    
+    # Fetch both panels' data in one round of concurrent requests
+    (indices, indices_error), (portfolio, portfolio_error) = fetch_overview()
+    
+    # Create two columns
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Major Indices")
+        try:
+            if indices_error is not None:
+                raise indices_error
+            if indices is not None:
+                for idx, data in indices.items():
+                    delta = data.get("change_percent", 0)
+                    st.metric(
+                        label=idx, 
+                        value=f"{data.get('price', 0):.2f}", 
+                        delta=f"{delta:.2f}%"
+                    )
+            else:
+                st.error("Failed to load market indices")
+        except requests.HTTPError:
+            st.error("Failed to load market indices")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+    
+    with col2:
+        st.subheader("Your Portfolio Summary")
+        try:
+            if portfolio_error is not None:
+                raise portfolio_error
+            if portfolio is not None:
                 st.metric(
-                    label=idx, 
-                    value=f"{data.get('price', 0):.2f}", 
-                    delta=f"{delta:.2f}%"
+                    label="Total Value", 
+                    value=f"${portfolio.get('total_value', 0):,.2f}", 
+                    delta=f"{portfolio.get('daily_change_percent', 0):.2f}%"
                 )
-        else:
-            st.error("Failed to load market indices")
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
-
-with col2:
-    st.subheader("Your Portfolio Summary")
-    try:
-        response = requests.get(f"{ORCHESTRATOR_URL}/api/portfolio")
-        if response.status_code == 200:
-            portfolio = response.json()
-            st.metric(
-                label="Total Value", 
-                value=f"${portfolio.get('total_value', 0):,.2f}", 
-                delta=f"{portfolio.get('daily_change_percent', 0):.2f}%"
-            )
-            
-            # Show allocation
-            st.caption("Allocation by Region")
-            regions = portfolio.get("allocation", {}).get("regions", {})
-            for region, percentage in regions.items():
-                st.progress(percentage / 100, text=f"{region}: {percentage}%")
-                
-        else:
+    
+                # Show allocation
+                st.caption("Allocation by Region")
+                regions = portfolio.get("allocation", {}).get("regions", {})
+                for region, percentage in regions.items():
+                    st.progress(percentage / 100, text=f"{region}: {percentage}%")
+    
+            else:
+                st.error("Failed to load portfolio data")
+        except requests.HTTPError:
             st.error("Failed to load portfolio data")
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+
+market_overview()
 
 # Footer
 st.divider()
@@ -1,5 +1,11 @@
 import streamlit as st
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import threading
 import os
 from datetime import datetime
 
@@ -14,6 +20,23 @@ st.set_page_config(
 #ORCHESTRATOR_URL = "http://localhost:8000"
 ORCHESTRATOR_URL = "http://0.0.0.0:8000"
 
+# Connect and read timeouts (seconds) for orchestrator calls
+REQUEST_TIMEOUT = (3, 30)
+
+# Portfolio fields shown in the Market Overview panel
+PORTFOLIO_FIELDS = "total_value,daily_change_percent,allocation.regions"
+
+# Shared HTTP session so calls to the orchestrator reuse pooled connections
+SESSION = requests.Session()
+SESSION.headers["Connection"] = "keep-alive"
+SESSION.headers["Accept-Encoding"] = "gzip"
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_current_date():
     """Get the current date formatted for display."""
     now = datetime.now()
@@ -22,9 +45,10 @@ def get_current_date():
 def process_query(query):
     """Send the query to the orchestrator and get a response."""
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{ORCHESTRATOR_URL}/process",
-            json={"query": query}
+            json={"query": query},
+            timeout=REQUEST_TIMEOUT
         )
         if response.status_code == 200:
             return response.json()
@@ -35,6 +59,119 @@ def process_query(query):
         st.error(f"Error connecting to orchestrator: {str(e)}")
         return None
 
+def _json_or_raise(response):
+    """Return the parsed JSON body of a response, raising on a non-200 status.
+    
+    Raising (rather than returning None) keeps st.cache_data from memoizing
+    a failed call for the full TTL.
+    """
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_indices():
+    """Fetch market indices from the orchestrator."""
+    return _json_or_raise(SESSION.get(f"{ORCHESTRATOR_URL}/api/indices", timeout=REQUEST_TIMEOUT))
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_portfolio():
+    """Fetch portfolio data from the orchestrator."""
+    return _json_or_raise(SESSION.get(
+        f"{ORCHESTRATOR_URL}/api/portfolio",
+        params={"fields": PORTFOLIO_FIELDS},
+        timeout=REQUEST_TIMEOUT
+    ))
+
+def _with_script_ctx(fn):
+    """Wrap fn so it runs under the calling script's ScriptRunContext.
+    
+    st.cache_data needs the context to resolve the session; worker threads
+    don't inherit it.
+    """
+    ctx = get_script_run_ctx()
+    
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+    
+    return run
+
+def _outcome(future):
+    """Return (result, None) for a completed future, or (None, error) if it raised."""
+    try:
+        return future.result(), None
+    except Exception as e:
+        return None, e
+
+def fetch_overview():
+    """
+    Fetch market indices and portfolio data concurrently.
+    
+    Returns:
+        ((indices, error), (portfolio, error)) so each panel fails on its own
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        indices_future = executor.submit(_with_script_ctx(fetch_indices))
+        portfolio_future = executor.submit(_with_script_ctx(fetch_portfolio))
+    return _outcome(indices_future), _outcome(portfolio_future)
+
+@st.fragment(run_every="30s")
+def market_overview():
+    """Render the Market Overview panels; refreshes on its own timer."""
+    # Market Overview Section
+    st.header("Market Overview")
+    
+    # Fetch both panels' data in one round of concurrent requests
+    (indices, indices_error), (portfolio, portfolio_error) = fetch_overview()
+    
+    # Create two columns for market data
+    market_col1, market_col2 = st.columns(2)
+    
+    with market_col1:
+        st.subheader("Major Indices")
+        try:
+            if indices_error is not None:
+                raise indices_error
+            if indices is not None:
+                for idx, data in indices.items():
+                    delta = data.get("change_percent", 0)
+                    st.metric(
+                        label=idx, 
+                        value=f"{data.get('price', 0):.2f}", 
+                        delta=f"{delta:.2f}%"
+                    )
+            else:
+                st.error("Failed to load market indices")
+        except requests.HTTPError:
+            st.error("Failed to load market indices")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+    
+    with market_col2:
+        st.subheader("Your Portfolio Summary")
+        try:
+            if portfolio_error is not None:
+                raise portfolio_error
+            if portfolio is not None:
+                st.metric(
+                    label="Total Value", 
+                    value=f"${portfolio.get('total_value', 0):,.2f}", 
+                    delta=f"{portfolio.get('daily_change_percent', 0):.2f}%"
+                )
+                
+                # Show allocation
+                st.caption("Allocation by Region")
+                regions = portfolio.get("allocation", {}).get("regions", {})
+                for region, percentage in regions.items():
+                    st.progress(percentage / 100, text=f"{region}: {percentage}%")
+            
+            else:
+                st.error("Failed to load portfolio data")
+        except requests.HTTPError:
+            st.error("Failed to load portfolio data")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+
 # Initialize session state for chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -69,7 +206,7 @@ with col_sidebar:
                 response = process_query(query)
                 if response:
                     st.session_state.messages.append({"role": "assistant", "content": response.get("text", "")})
-
+    
     # Text input for questions
     st.subheader("Ask a Question")
     query = st.text_input("Enter your financial query:")
@@ -82,53 +219,8 @@ with col_sidebar:
 
 # Main content area with market data and chat
 with col_main:
-    # Market Overview Section
-    st.header("Market Overview")
-
-    # Create two columns for market data
-    market_col1, market_col2 = st.columns(2)
-
-    with market_col1:
-        st.subheader("Major Indices")
-        try:
-            response = requests.get(f"{ORCHESTRATOR_URL}/api/indices")
-            if response.status_code == 200:
-                indices = response.json()
-                for idx, data in indices.items():
-                    delta = data.get("change_percent", 0)
-                    st.metric(
-                        label=idx, 
-                        value=f"{data.get('price', 0):.2f}", 
-                        delta=f"{delta:.2f}%"
-                    )
-            else:
-                st.error("Failed to load market indices")
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
-
-    with market_col2:
-        st.subheader("Your Portfolio Summary")
-        try:
-            response = requests.get(f"{ORCHESTRATOR_URL}/api/portfolio")
-            if response.status_code == 200:
-                portfolio = response.json()
-                st.metric(
-                    label="Total Value", 
-                    value=f"${portfolio.get('total_value', 0):,.2f}", 
-                    delta=f"{portfolio.get('daily_change_percent', 0):.2f}%"
-                )
-                
-                # Show allocation
-                st.caption("Allocation by Region")
-                regions = portfolio.get("allocation", {}).get("regions", {})
-                for region, percentage in regions.items():
-                    st.progress(percentage / 100, text=f"{region}: {percentage}%")
-                    
-            else:
-                st.error("Failed to load portfolio data")
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
-
+    market_overview()
+    
     # Chat interface
     st.header("Financial Assistant Chat")
     
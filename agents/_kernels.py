@@ -0,0 +1,208 @@
+"""
+Numeric kernels for the Analysis Agent.
+Batch risk metrics over an aligned (T, N) close matrix, JIT-compiled with
+Numba when it is installed and computed with vectorized NumPy otherwise.
+"""
+
+import numpy as np
+from typing import Tuple
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Trading days per year, used to annualize daily statistics
+TRADING_DAYS = 252
+
+# Lookback windows in trading days
+VOL_WINDOW = 20
+BETA_WINDOW = 60
+RISK_WINDOW = 252
+
+RISK_FREE_RATE = 0.035
+VAR_QUANTILE = 0.05  # 95% confidence
+
+def betas(R: np.ndarray, m: np.ndarray) -> np.ndarray:
+    """
+    Calculate betas of every column of a returns matrix against market returns.
+    
+    Args:
+        R: (T, N) matrix of stock returns, aligned with m
+        m: (T,) vector of market returns
+    
+    Returns:
+        (N,) array of betas (1.0 where the market has no variance)
+    """
+    mc = m - m.mean()
+    market_variance = mc @ mc
+    if market_variance == 0:
+        return np.ones(R.shape[1])  # Default to market beta
+    
+    Rc = R - R.mean(axis=0)
+    return Rc.T @ mc / market_variance
+
+def beta_from_returns(returns: np.ndarray, mc: np.ndarray, mv: float) -> float:
+    """
+    Calculate beta of one return vector against precomputed market statistics.
+    
+    Args:
+        returns: (T,) stock returns aligned with mc (NaN where the stock has no data)
+        mc: (T,) centered market returns
+        mv: Sum of squared centered market returns (mc @ mc)
+    
+    Returns:
+        Beta value (1.0 where the market has no variance)
+    """
+    ok = np.isfinite(returns)
+    if not ok.all():
+        # Missing stock days change the market sample, so recenter on the overlap
+        return float(betas(returns[ok][:, None], mc[ok])[0])
+    
+    if mv == 0:
+        return 1.0  # Default to market beta
+    
+    # mc sums to zero, so the stock side needs no centering
+    return float(returns @ mc / mv)
+
+def _compute_metrics_numpy(P: np.ndarray, m: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Vectorized NumPy implementation of compute_metrics."""
+    T, N = P.shape
+    R = np.diff(np.log(P), axis=0)
+    
+    vol = R[-VOL_WINDOW:].std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+    
+    tail = R[-RISK_WINDOW:]
+    mean_returns = tail.mean(axis=0) * TRADING_DAYS
+    std_devs = tail.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+    sharpe = np.divide(mean_returns - RISK_FREE_RATE, std_devs, out=np.zeros_like(mean_returns), where=std_devs > 0)
+    var95 = np.quantile(tail, VAR_QUANTILE, axis=0) * 100
+    
+    aligned = np.isfinite(m)
+    beta = betas(R[aligned][-BETA_WINDOW:], m[aligned][-BETA_WINDOW:])
+    
+    # Drawdown: trough is the largest drop from the running max, peak the high before it
+    drawdown = (P / np.maximum.accumulate(P, axis=0) - 1) * 100
+    trough = drawdown.argmin(axis=0)
+    peak = np.where(np.arange(T)[:, None] <= trough, P, -np.inf).argmax(axis=0)
+    max_drawdown = drawdown[trough, np.arange(N)]
+    
+    return vol, beta, sharpe, max_drawdown, var95, trough, peak
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True, error_model='numpy')
+    def _compute_metrics_jit(P, m):
+        """Numba implementation of compute_metrics, one column per thread."""
+        T, N = P.shape
+        n = T - 1
+        
+        # Market rows usable for beta: the last BETA_WINDOW with a finite return
+        rows = np.empty(min(n, BETA_WINDOW), dtype=np.int64)
+        count = 0
+        for t in range(n - 1, -1, -1):
+            if count == rows.size:
+                break
+            if np.isfinite(m[t]):
+                rows[count] = t
+                count += 1
+        rows = rows[:count]
+        
+        m_mean = 0.0
+        for k in range(count):
+            m_mean += m[rows[k]]
+        m_mean /= max(count, 1)
+        m_var = 0.0
+        for k in range(count):
+            m_var += (m[rows[k]] - m_mean) ** 2
+        
+        vol = np.empty(N)
+        beta = np.empty(N)
+        sharpe = np.empty(N)
+        max_drawdown = np.empty(N)
+        var95 = np.empty(N)
+        trough = np.empty(N, dtype=np.int64)
+        peak = np.empty(N, dtype=np.int64)
+        
+        for j in prange(N):
+            r = np.empty(n)
+            for t in range(n):
+                r[t] = np.log(P[t + 1, j]) - np.log(P[t, j])
+            
+            # Volatility over the short window
+            w = r[max(n - VOL_WINDOW, 0):]
+            vol[j] = np.sqrt(((w - w.mean()) ** 2).sum() / (w.size - 1)) * np.sqrt(TRADING_DAYS)
+            
+            # Sharpe ratio and VaR over the risk window
+            w = r[max(n - RISK_WINDOW, 0):]
+            mu = w.mean() * TRADING_DAYS
+            sd = np.sqrt(((w - w.mean()) ** 2).sum() / (w.size - 1)) * np.sqrt(TRADING_DAYS)
+            sharpe[j] = (mu - RISK_FREE_RATE) / sd if sd > 0 else 0.0
+            
+            s = np.sort(w)
+            pos = VAR_QUANTILE * (s.size - 1)
+            lo = int(np.floor(pos))
+            hi = min(lo + 1, s.size - 1)
+            var95[j] = (s[lo] + (s[hi] - s[lo]) * (pos - lo)) * 100
+            
+            # Beta against the market rows
+            if m_var == 0:
+                beta[j] = 1.0
+            else:
+                r_mean = 0.0
+                for k in range(count):
+                    r_mean += r[rows[k]]
+                r_mean /= count
+                cov = 0.0
+                for k in range(count):
+                    cov += (r[rows[k]] - r_mean) * (m[rows[k]] - m_mean)
+                beta[j] = cov / m_var
+            
+            # Drawdown with a running max in the same column pass
+            running_max = P[0, j]
+            running_peak = 0
+            worst = 0.0
+            trough[j] = 0
+            peak[j] = 0
+            for t in range(T):
+                if P[t, j] > running_max:
+                    running_max = P[t, j]
+                    running_peak = t
+                dd = (P[t, j] / running_max - 1) * 100
+                if dd < worst:
+                    worst = dd
+                    trough[j] = t
+                    peak[j] = running_peak
+            max_drawdown[j] = worst
+        
+        return vol, beta, sharpe, max_drawdown, var95, trough, peak
+
+def compute_metrics(P: np.ndarray, m: np.ndarray, dtype: type = np.float32) -> Tuple[np.ndarray, ...]:
+    """
+    Calculate per-ticker risk metrics for an aligned close matrix.
+    
+    Args:
+        P: (T, N) matrix of closing prices on a common index
+        m: (T - 1,) vector of market log returns aligned with P's returns
+           (NaN where the market has no data)
+        dtype: Working precision for the reductions; float32 halves the
+           memory traffic and is ample for indicative risk metrics
+    
+    Returns:
+        Tuple of (N,) arrays: annualized volatility, beta, Sharpe ratio,
+        max drawdown (percent), 95% VaR (percent), trough row, peak row
+    """
+    P = np.ascontiguousarray(P, dtype=dtype)
+    m = np.ascontiguousarray(m, dtype=dtype)
+    
+    if NUMBA_AVAILABLE:
+        results = _compute_metrics_jit(P, m)
+    else:
+        results = _compute_metrics_numpy(P, m)
+    
+    # Hand back float64 metrics regardless of the working precision
+    vol, beta, sharpe, max_drawdown, var95, trough, peak = results
+    return (
+        vol.astype(np.float64), beta.astype(np.float64), sharpe.astype(np.float64),
+        max_drawdown.astype(np.float64), var95.astype(np.float64), trough, peak
+    )
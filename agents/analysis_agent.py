@@ -5,12 +5,118 @@ Handles financial analysis, risk assessment, and metrics calculation.
 
 import pandas as pd
 import numpy as np
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Union
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
+from agents._kernels import (
+    BETA_WINDOW, RISK_WINDOW, TRADING_DAYS, VAR_QUANTILE, VOL_WINDOW,
+    beta_from_returns, betas, compute_metrics
+)
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of concurrent price-history requests
+MAX_FETCH_WORKERS = 16
+
+# Benchmark used for beta calculations
+MARKET_TICKER = "^GSPC"
+
+# Representative stocks by region and sector
+_REGION_MAPPING = {
+    'Asia': {
+        'Technology': ['TSM', '005930.KS', '9988.HK', '0700.HK', '6758.T'],  # TSMC, Samsung, Alibaba, Tencent, Sony
+        'Finance': ['8306.T', '8316.T', '3988.HK', '1398.HK', '000001.SS'],  # Mitsubishi UFJ, Sumitomo Mitsui, BOC, ICBC, PINS
+        'Consumer': ['9633.T', '6758.T', '2330.TW', '1177.HK', '1211.HK'],  # Nintendo, Sony, LG, Chow Tai Fook, BYD
+        'Healthcare': ['4502.T', '4503.T', '1177.HK', '3320.HK', '1093.HK'],  # Takeda, Astellas, Sino Biopharm, China Bio, CSPC
+    },
+    'Europe': {
+        'Technology': ['ASML.AS', 'SAP.DE', 'CAP.PA', 'STM.PA', 'ERIC-B.ST'],  # ASML, SAP, Capgemini, STMicro, Ericsson
+        'Finance': ['HSBA.L', 'BNP.PA', 'SAN.MC', 'BBVA.MC', 'DBK.DE'],  # HSBC, BNP Paribas, Santander, BBVA, Deutsche Bank
+        'Consumer': ['MC.PA', 'OR.PA', 'NESN.SW', 'UL.AS', 'AIR.PA'],  # LVMH, L'Oreal, Nestle, Unilever, Airbus
+        'Healthcare': ['ROG.SW', 'SAN.PA', 'NOVN.SW', 'AZN.L', 'GSK.L'],  # Roche, Sanofi, Novartis, AstraZeneca, GSK
+    },
+    'North America': {
+        'Technology': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META'],  # Apple, Microsoft, Alphabet, Amazon, Meta
+        'Finance': ['JPM', 'BAC', 'WFC', 'C', 'GS'],  # JPMorgan, Bank of America, Wells Fargo, Citigroup, Goldman Sachs
+        'Consumer': ['COST', 'WMT', 'HD', 'NKE', 'MCD'],  # Costco, Walmart, Home Depot, Nike, McDonald's
+        'Healthcare': ['JNJ', 'PFE', 'MRK', 'ABT', 'UNH'],  # Johnson & Johnson, Pfizer, Merck, Abbott, UnitedHealth
+    }
+}
+
+# All tickers for each region, in sector order
+_REGION_ALL_TICKERS = {
+    region: tuple(ticker for sector_tickers in sectors.values() for ticker in sector_tickers)
+    for region, sectors in _REGION_MAPPING.items()
+}
+
+# Risk levels by average annualized volatility (percent); a level applies
+# above its lower bin edge, so side="left" keeps the boundaries exclusive
+_RISK_LEVELS = ("Low", "Moderate", "Moderate to High", "High", "Very High")
+_RISK_LEVEL_BINS = np.array([10, 15, 20, 30])
+
+def _returns(prices: Union[pd.Series, np.ndarray]) -> np.ndarray:
+    """
+    Calculate daily log returns of a price series.
+    
+    Args:
+        prices: Series or array of prices
+        
+    Returns:
+        Array of log returns with missing values dropped
+    """
+    arr = prices.values if hasattr(prices, 'values') else prices
+    returns = np.diff(np.log(np.asarray(arr, dtype=np.float64)))
+    return returns[np.isfinite(returns)]
+
+def _daily_closes(data: pd.DataFrame) -> pd.Series:
+    """
+    Get closing prices indexed by naive calendar date.
+    Exchanges stamp daily bars in their own time zones, so tz-aware indexes from
+    different markets never line up until reduced to local dates.
+    
+    Args:
+        data: Price history with a Close column
+        
+    Returns:
+        Series of closing prices, one per trading date
+    """
+    close = data['Close']
+    if isinstance(close.index, pd.DatetimeIndex):
+        index = close.index.tz_localize(None) if close.index.tz is not None else close.index
+        close = close.set_axis(index.normalize())
+        close = close[~close.index.duplicated(keep='last')]
+    return close
+
+def _ticker_metrics(prices: pd.Series, market: Tuple[np.ndarray, float, pd.Index]) -> Dict[str, float]:
+    """
+    Calculate the risk exposure metrics for a single ticker.
+    Defined at module level so it can be dispatched to worker processes.
+    
+    Args:
+        prices: Series of stock prices
+        market: Tuple of (centered market returns, their sum of squares, index)
+            over the beta window
+        
+    Returns:
+        Dictionary with volatility (percentage), beta and 95% VaR
+    """
+    returns = pd.Series(np.diff(np.log(prices.values)), index=prices.index[1:])
+    finite = returns.values[np.isfinite(returns.values)]
+    mc, mv, market_index = market
+    
+    recent = finite[-VOL_WINDOW:]
+    tail = finite[-RISK_WINDOW:]
+    
+    return {
+        'volatility': float(recent.std(ddof=1) * np.sqrt(TRADING_DAYS)) * 100,  # Convert to percentage
+        'beta': beta_from_returns(returns.reindex(market_index).values, mc, mv),
+        'var_95': float(np.quantile(tail, VAR_QUANTILE)) * 100  # Convert to percentage
+    }
+
 class AnalysisAgent:
     """
     Agent responsible for financial analysis and metrics calculation.
@@ -18,14 +124,114 @@ class AnalysisAgent:
     
     def __init__(self):
         """Initialize the analysis agent."""
-        self.cache = {}
+        # Memoized price data and derived metrics: key -> (monotonic timestamp, value)
+        self.cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self.cache_duration = 300  # 5 minutes
+        self._cache_lock = threading.Lock()
+    
+    def _memoize(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        """
+        Return a memoized value, computing and storing it on a miss.
+        
+        Args:
+            key: Cache key
+            compute: Zero-argument callable producing the value
+            
+        Returns:
+            Cached or freshly computed value
+        """
+        value = self._get_memo(key)
+        if value is None:
+            value = compute()
+            self._set_memo(key, value)
+        return value
     
-    def calculate_volatility(self, prices: pd.Series, window: int = 20) -> float:
+    def _get_memo(self, key: Tuple) -> Any:
+        """
+        Get a memoized value if it has not expired.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value or None
+        """
+        with self._cache_lock:
+            hit = self.cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < self.cache_duration:
+            return hit[1]
+        return None
+    
+    def _set_memo(self, key: Tuple, value: Any) -> None:
+        """
+        Store a memoized value.
+        
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        with self._cache_lock:
+            self.cache[key] = (time.monotonic(), value)
+    
+    def _cached_get(self, api_agent, ticker: str, period: str, interval: str) -> pd.DataFrame:
+        """
+        Get stock data through the analysis cache.
+        
+        Args:
+            api_agent: API agent instance
+            ticker: Stock ticker symbol
+            period: Time period
+            interval: Data interval
+            
+        Returns:
+            DataFrame with stock data
+        """
+        return self._memoize(
+            ("data", ticker, period, interval),
+            lambda: api_agent.get_stock_data(ticker, period=period, interval=interval)
+        )
+    
+    def _fetch_stock_data(self, api_agent, tickers: List[str], period: str, interval: str) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+        """
+        Retrieve stock data for several tickers concurrently.
+        
+        Args:
+            api_agent: API agent instance
+            tickers: List of stock tickers
+            period: Time period
+            interval: Data interval
+            
+        Returns:
+            Tuple of (data by ticker in request order, errors by ticker)
+        """
+        results = {}
+        errors = {}
+        
+        if not tickers:
+            return results, errors
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(tickers))) as executor:
+            futures = {
+                executor.submit(self._cached_get, api_agent, ticker, period, interval): ticker
+                for ticker in dict.fromkeys(tickers)
+            }
+            
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    results[ticker] = future.result()
+                except Exception as e:
+                    errors[ticker] = e
+        
+        ordered = {ticker: results[ticker] for ticker in dict.fromkeys(tickers) if ticker in results}
+        return ordered, errors
+    
+    def calculate_volatility(self, prices: Union[pd.Series, np.ndarray], window: int = 20) -> float:
         """
         Calculate volatility (standard deviation) of a price series.
         
         Args:
-            prices: Series of prices
+            prices: Series or array of prices
             window: Lookback window in days
             
         Returns:
@@ -33,69 +239,65 @@ class AnalysisAgent:
         """
         try:
             # Calculate daily returns
-            returns = prices.pct_change().dropna()
+            returns = _returns(prices)
             
-            # Calculate rolling standard deviation
-            if len(returns) < window:
-                # Not enough data, use all available
-                volatility = returns.std() * np.sqrt(252)  # Annualized
-            else:
-                # Use rolling window
-                volatility = returns.iloc[-window:].std() * np.sqrt(252)  # Annualized
-                
-            return volatility
+            # Use the rolling window, or all available data if there is not enough
+            tail = returns[-window:] if returns.size > window else returns
+            volatility = tail.std(ddof=1) * np.sqrt(252)  # Annualized
+            
+            return float(volatility)
         except Exception as e:
             logger.error(f"Error calculating volatility: {str(e)}")
             return 0.0
     
-    def calculate_beta(self, stock_prices: pd.Series, market_prices: pd.Series, window: int = 60) -> float:
+    def calculate_beta(self, stock_prices: Union[pd.Series, np.ndarray], market_prices: Union[pd.Series, np.ndarray], window: int = 60) -> float:
         """
         Calculate beta of a stock relative to the market.
         
         Args:
-            stock_prices: Series of stock prices
-            market_prices: Series of market prices (e.g., S&P 500)
+            stock_prices: Series of stock prices, or an array already aligned with market_prices
+            market_prices: Series of market prices (e.g., S&P 500), or an aligned array
             window: Lookback window in days
             
         Returns:
             Beta value
         """
         try:
+            if isinstance(stock_prices, np.ndarray) and isinstance(market_prices, np.ndarray):
+                # Arrays are aligned by position, so skip the index alignment
+                sp = np.asarray(stock_prices, dtype=np.float64)
+                mp = np.asarray(market_prices, dtype=np.float64)
+                s = np.diff(sp) / sp[:-1]
+                m = np.diff(mp) / mp[:-1]
+                mask = np.isfinite(s) & np.isfinite(m)
+                return float(betas(s[mask][-window:, None], m[mask][-window:])[0])
+            
             # Calculate daily returns
             stock_returns = stock_prices.pct_change().dropna()
             market_returns = market_prices.pct_change().dropna()
             
-            # Align the two series
-            returns = pd.DataFrame({
-                'stock': stock_returns,
-                'market': market_returns
-            }).dropna()
+            # Align the two series and drop dates missing from either
+            s, m = stock_returns.align(market_returns, join='inner')
+            mask = ~(s.isna() | m.isna()).values
             
             # Use only the specified window
-            if len(returns) > window:
-                returns = returns.iloc[-window:]
-                
-            # Calculate covariance and variance
-            covariance = returns.cov().iloc[0, 1]
-            market_variance = returns['market'].var()
+            sv = s.values[mask][-window:]
+            mv = m.values[mask][-window:]
             
             # Calculate beta
-            if market_variance == 0:
-                return 1.0  # Default to market beta
-                
-            beta = covariance / market_variance
+            beta = float(betas(sv[:, None], mv)[0])
             
             return beta
         except Exception as e:
             logger.error(f"Error calculating beta: {str(e)}")
             return 1.0  # Default to market beta
     
-    def calculate_sharpe_ratio(self, returns: pd.Series, risk_free_rate: float = 0.035, window: int = 252) -> float:
+    def calculate_sharpe_ratio(self, returns: Union[pd.Series, np.ndarray], risk_free_rate: float = 0.035, window: int = 252) -> float:
         """
         Calculate Sharpe ratio for a series of returns.
         
         Args:
-            returns: Series of returns
+            returns: Series or array of returns
             risk_free_rate: Annual risk-free rate
             window: Lookback window in days
             
@@ -103,13 +305,17 @@ class AnalysisAgent:
             Sharpe ratio
         """
         try:
+            # Convert once at the boundary and work on the raw array
+            arr = returns.values if hasattr(returns, 'values') else returns
+            arr = np.asarray(arr, dtype=np.float64)
+            arr = arr[np.isfinite(arr)]
+            
             # Use the specified window
-            if len(returns) > window:
-                returns = returns.iloc[-window:]
-                
+            tail = arr[-window:] if arr.size > window else arr
+            
             # Calculate mean return and standard deviation
-            mean_return = returns.mean() * 252  # Annualized
-            std_dev = returns.std() * np.sqrt(252)  # Annualized
+            mean_return = tail.mean() * 252  # Annualized
+            std_dev = tail.std(ddof=1) * np.sqrt(252)  # Annualized
             
             # Calculate Sharpe ratio
             if std_dev == 0:
@@ -117,36 +323,36 @@ class AnalysisAgent:
                 
             sharpe = (mean_return - risk_free_rate) / std_dev
             
-            return sharpe
+            return float(sharpe)
         except Exception as e:
             logger.error(f"Error calculating Sharpe ratio: {str(e)}")
             return 0.0
     
-    def calculate_drawdown(self, prices: pd.Series) -> Dict[str, float]:
+    def calculate_drawdown(self, prices: Union[pd.Series, np.ndarray]) -> Dict[str, float]:
         """
         Calculate maximum drawdown for a price series.
         
         Args:
-            prices: Series of prices
+            prices: Series or array of prices (duration needs a Series with a DatetimeIndex)
             
         Returns:
             Dictionary with maximum drawdown and duration
         """
         try:
-            # Calculate running maximum
-            running_max = prices.cummax()
+            p = np.asarray(prices.values if hasattr(prices, 'values') else prices, dtype=np.float64)
             
-            # Calculate drawdown
-            drawdown = (prices / running_max - 1) * 100
+            # Calculate running maximum and drawdown in one pass over the raw array
+            running_max = np.maximum.accumulate(p)
+            drawdown = (p / running_max - 1) * 100
             
-            # Find maximum drawdown
-            max_drawdown = drawdown.min()
-            max_drawdown_idx = drawdown.idxmin()
-            
-            # Find the peak before the drawdown
-            peak_idx = prices.iloc[:drawdown.idxmin()].idxmax()
+            # Find maximum drawdown and the peak before it
+            i = int(drawdown.argmin())
+            j = int(p[:i + 1].argmax())
+            max_drawdown = float(drawdown[i])
             
             # Calculate duration in days
+            max_drawdown_idx = prices.index[i] if isinstance(prices, pd.Series) else None
+            peak_idx = prices.index[j] if isinstance(prices, pd.Series) else None
             if isinstance(peak_idx, pd.Timestamp) and isinstance(max_drawdown_idx, pd.Timestamp):
                 duration = (max_drawdown_idx - peak_idx).days
             else:
@@ -163,12 +369,12 @@ class AnalysisAgent:
                 'duration': 0
             }
     
-    def calculate_var(self, returns: pd.Series, confidence: float = 0.95, window: int = 252) -> float:
+    def calculate_var(self, returns: Union[pd.Series, np.ndarray], confidence: float = 0.95, window: int = 252) -> float:
         """
         Calculate Value at Risk (VaR) using historical method.
         
         Args:
-            returns: Series of returns
+            returns: Series or array of returns
             confidence: Confidence level (e.g., 0.95 for 95%)
             window: Lookback window in days
             
@@ -177,17 +383,64 @@ class AnalysisAgent:
         """
         try:
             # Use the specified window
-            if len(returns) > window:
-                returns = returns.iloc[-window:]
+            a = np.asarray(returns.values if hasattr(returns, 'values') else returns, dtype=np.float64)[-window:]
+            if a.size == 0:
+                return 0.0
                 
-            # Calculate VaR
-            var = returns.quantile(1 - confidence)
+            # Calculate VaR as the interpolated quantile, the same definition
+            # the metric kernels use
+            var = np.nanquantile(a, 1 - confidence)
             
-            return var * 100  # Convert to percentage
+            return float(var) * 100  # Convert to percentage
         except Exception as e:
             logger.error(f"Error calculating VaR: {str(e)}")
             return 0.0
     
+    def _get_market_centered(self, api_agent, period: str, interval: str) -> Tuple[np.ndarray, float, pd.Index]:
+        """
+        Get the benchmark's centered log returns over the beta window.
+        
+        Args:
+            api_agent: API agent instance
+            period: Time period
+            interval: Data interval
+            
+        Returns:
+            Tuple of (centered market returns, their sum of squares, index)
+        """
+        def compute():
+            market_close = self._cached_get(api_agent, MARKET_TICKER, period, interval)['Close']
+            market_returns = pd.Series(np.diff(np.log(market_close.values)), index=market_close.index[1:]).dropna().iloc[-BETA_WINDOW:]
+            mc = market_returns.values - market_returns.values.mean()
+            return mc, float(mc @ mc), market_returns.index
+        
+        return self._memoize(("market_centered", period, interval), compute)
+    
+    def _compute_ticker_metrics(self, prices: Dict[str, pd.Series], market: Tuple[np.ndarray, float, pd.Index]) -> Dict[str, Dict[str, float]]:
+        """
+        Calculate risk exposure metrics for several tickers.
+        
+        Args:
+            prices: Dictionary of price series with ticker as key
+            market: Centered market returns tuple from _get_market_centered
+            
+        Returns:
+            Dictionary of metrics with ticker as key; tickers that fail are
+            logged and omitted
+        """
+        results = {}
+        
+        # A few microseconds of NumPy per ticker, so this stays in-process: worker
+        # start-up and pickling would cost far more, and forking from the threaded
+        # server is unsafe
+        for ticker, series in prices.items():
+            try:
+                results[ticker] = _ticker_metrics(series, market)
+            except Exception as e:
+                logger.error(f"Error calculating metrics for {ticker}: {str(e)}")
+        
+        return results
+    
     def analyze_portfolio(self, api_agent, portfolio_tickers: List[str], weights: List[float] = None) -> Dict[str, Any]:
         """
         Analyze a portfolio of stocks.
@@ -208,12 +461,13 @@ class AnalysisAgent:
             # Ensure weights sum to 1.0
             weights = [w / sum(weights) for w in weights]
             
-            # Get market data (S&P 500 as benchmark)
-            market_data = api_agent.get_stock_data("^GSPC", period="1y", interval="1d")
+            # Get data for each stock and the market (S&P 500 as benchmark) concurrently
+            fetched, errors = self._fetch_stock_data(api_agent, list(portfolio_tickers) + [MARKET_TICKER], period="1y", interval="1d")
+            if MARKET_TICKER in errors:
+                raise errors[MARKET_TICKER]
+            market_data = fetched[MARKET_TICKER]
             
-            # Get data for each stock
             stock_data = {}
-            returns_data = {}
             portfolio_metrics = {
                 'tickers': portfolio_tickers,
                 'weights': weights,
@@ -223,28 +477,9 @@ class AnalysisAgent:
             
             for ticker in portfolio_tickers:
                 try:
-                    data = api_agent.get_stock_data(ticker, period="1y", interval="1d")
-                    stock_data[ticker] = data
-                    
-                    # Calculate returns
-                    returns = data['Close'].pct_change().dropna()
-                    returns_data[ticker] = returns
-                    
-                    # Calculate individual metrics
-                    volatility = self.calculate_volatility(data['Close'])
-                    beta = self.calculate_beta(data['Close'], market_data['Close'])
-                    sharpe = self.calculate_sharpe_ratio(returns)
-                    drawdown = self.calculate_drawdown(data['Close'])
-                    var = self.calculate_var(returns)
-                    
-                    portfolio_metrics['individual_metrics'][ticker] = {
-                        'volatility': volatility * 100,  # Convert to percentage
-                        'beta': beta,
-                        'sharpe_ratio': sharpe,
-                        'max_drawdown': drawdown['max_drawdown'],
-                        'drawdown_duration': drawdown['duration'],
-                        'var_95': var
-                    }
+                    if ticker in errors:
+                        raise errors[ticker]
+                    stock_data[ticker] = fetched[ticker]
                     
                 except Exception as e:
                     logger.error(f"Error analyzing ticker {ticker}: {str(e)}")
@@ -252,46 +487,77 @@ class AnalysisAgent:
                         'error': str(e)
                     }
             
-            # Calculate portfolio returns
-            portfolio_returns = pd.Series(0.0, index=next(iter(returns_data.values())).index)
+            # Each ticker is measured on its own trading dates, with the market
+            # reindexed onto them (NaN where the benchmark did not trade)
+            market_close = _daily_closes(market_data)
+            closes = {}
+            ticker_betas = {}
             
-            for ticker, weight in zip(portfolio_tickers, weights):
-                if ticker in returns_data and returns_data[ticker] is not None:
-                    # Align indices
-                    portfolio_returns = portfolio_returns.add(returns_data[ticker] * weight, fill_value=0)
+            for ticker, data in stock_data.items():
+                close = _daily_closes(data).dropna()
+                if len(close) < 2:
+                    portfolio_metrics['individual_metrics'][ticker] = {
+                        'error': f"Not enough price history for {ticker}"
+                    }
+                    continue
+                
+                m = np.diff(np.log(market_close.reindex(close.index).values))
+                volatility, beta, sharpe, drawdown, var_95, trough, peak = compute_metrics(close.values[:, None], m)
+                
+                # Calculate drawdown duration in days
+                duration = (close.index[trough[0]] - close.index[peak[0]]).days if isinstance(close.index, pd.DatetimeIndex) else 0
+                
+                portfolio_metrics['individual_metrics'][ticker] = {
+                    'volatility': float(volatility[0]) * 100,  # Convert to percentage
+                    'beta': float(beta[0]),
+                    'sharpe_ratio': float(sharpe[0]),
+                    'max_drawdown': float(drawdown[0]),
+                    'drawdown_duration': duration,
+                    'var_95': float(var_95[0])
+                }
+                closes[ticker] = close
+                ticker_betas[ticker] = float(beta[0])
             
-            # Calculate portfolio metrics
-            portfolio_volatility = portfolio_returns.std() * np.sqrt(252)  # Annualized
-            portfolio_sharpe = self.calculate_sharpe_ratio(portfolio_returns)
-            portfolio_var = self.calculate_var(portfolio_returns)
+            tickers = list(closes)
+            weight_by_ticker = dict(zip(portfolio_tickers, weights))
+            w = np.array([weight_by_ticker[t] for t in tickers])
+            
+            # Per-ticker returns on the union of dates; a ticker that did not
+            # trade on a date contributes nothing to that day's portfolio return
+            returns_df = pd.concat({t: closes[t].pct_change().iloc[1:] for t in tickers}, axis=1)
+            portfolio_returns = returns_df.fillna(0.0) @ w
             
-            # Calculate correlation matrix
-            returns_df = pd.DataFrame(returns_data)
-            correlation_matrix = returns_df.corr().round(2)
+            # Covariance and correlation over the dates each pair has in common
+            log_returns_df = pd.concat({t: np.log(closes[t]).diff().iloc[1:] for t in tickers}, axis=1)
+            cov = log_returns_df.cov().to_numpy()
+            corr = log_returns_df.corr().to_numpy()
+            
+            # Calculate portfolio metrics
+            portfolio_volatility = np.sqrt(w @ cov @ w * 252)  # Annualized
+            portfolio_sharpe = self.calculate_sharpe_ratio(portfolio_returns.values)
+            portfolio_var = self.calculate_var(portfolio_returns.values)
             
             # Calculate portfolio beta
-            portfolio_beta = 0.0
-            for ticker, weight in zip(portfolio_tickers, weights):
-                if ticker in portfolio_metrics['individual_metrics']:
-                    portfolio_beta += portfolio_metrics['individual_metrics'][ticker].get('beta', 0) * weight
+            portfolio_beta = float(w @ np.array([ticker_betas[t] for t in tickers]))
             
             # Calculate portfolio drawdown
             # Create portfolio value series
-            portfolio_value = pd.Series(1.0, index=portfolio_returns.index)
-            for i in range(1, len(portfolio_returns)):
-                portfolio_value.iloc[i] = portfolio_value.iloc[i-1] * (1 + portfolio_returns.iloc[i])
+            portfolio_value = (1.0 + portfolio_returns).cumprod()
             
             portfolio_drawdown = self.calculate_drawdown(portfolio_value)
             
             # Store portfolio-level metrics
             portfolio_metrics['portfolio_metrics'] = {
-                'volatility': portfolio_volatility * 100,  # Convert to percentage
+                'volatility': float(portfolio_volatility) * 100,  # Convert to percentage
                 'beta': portfolio_beta,
                 'sharpe_ratio': portfolio_sharpe,
                 'max_drawdown': portfolio_drawdown['max_drawdown'],
                 'drawdown_duration': portfolio_drawdown['duration'],
                 'var_95': portfolio_var,
-                'correlation_matrix': correlation_matrix.to_dict()
+                'correlation_matrix': {
+                    'tickers': tickers,
+                    'matrix': np.round(corr, 2).tolist()
+                }
             }
             
             return portfolio_metrics
@@ -315,51 +581,26 @@ class AnalysisAgent:
             Dictionary with risk analysis
         """
         try:
-            # Define stocks for the region
-            region_mapping = {
-                'Asia': {
-                    'Technology': ['TSM', '005930.KS', '9988.HK', '0700.HK', '6758.T'],  # TSMC, Samsung, Alibaba, Tencent, Sony
-                    'Finance': ['8306.T', '8316.T', '3988.HK', '1398.HK', '000001.SS'],  # Mitsubishi UFJ, Sumitomo Mitsui, BOC, ICBC, PINS
-                    'Consumer': ['9633.T', '6758.T', '2330.TW', '1177.HK', '1211.HK'],  # Nintendo, Sony, LG, Chow Tai Fook, BYD
-                    'Healthcare': ['4502.T', '4503.T', '1177.HK', '3320.HK', '1093.HK'],  # Takeda, Astellas, Sino Biopharm, China Bio, CSPC
-                },
-                'Europe': {
-                    'Technology': ['ASML.AS', 'SAP.DE', 'CAP.PA', 'STM.PA', 'ERIC-B.ST'],  # ASML, SAP, Capgemini, STMicro, Ericsson
-                    'Finance': ['HSBA.L', 'BNP.PA', 'SAN.MC', 'BBVA.MC', 'DBK.DE'],  # HSBC, BNP Paribas, Santander, BBVA, Deutsche Bank
-                    'Consumer': ['MC.PA', 'OR.PA', 'NESN.SW', 'UL.AS', 'AIR.PA'],  # LVMH, L'Oreal, Nestle, Unilever, Airbus
-                    'Healthcare': ['ROG.SW', 'SAN.PA', 'NOVN.SW', 'AZN.L', 'GSK.L'],  # Roche, Sanofi, Novartis, AstraZeneca, GSK
-                },
-                'North America': {
-                    'Technology': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META'],  # Apple, Microsoft, Alphabet, Amazon, Meta
-                    'Finance': ['JPM', 'BAC', 'WFC', 'C', 'GS'],  # JPMorgan, Bank of America, Wells Fargo, Citigroup, Goldman Sachs
-                    'Consumer': ['COST', 'WMT', 'HD', 'NKE', 'MCD'],  # Costco, Walmart, Home Depot, Nike, McDonald's
-                    'Healthcare': ['JNJ', 'PFE', 'MRK', 'ABT', 'UNH'],  # Johnson & Johnson, Pfizer, Merck, Abbott, UnitedHealth
-                }
-            }
-            
             # Get tickers for the region and sector
-            if region not in region_mapping:
+            if region not in _REGION_MAPPING:
                 return {'error': f"Region '{region}' not supported"}
                 
-            if sector and sector not in region_mapping[region]:
+            if sector and sector not in _REGION_MAPPING[region]:
                 return {'error': f"Sector '{sector}' not supported for region '{region}'"}
                 
             if sector:
-                tickers = region_mapping[region][sector]
+                tickers = list(_REGION_MAPPING[region][sector])
             else:
                 # Combine all sectors for the region
-                tickers = []
-                for sector_tickers in region_mapping[region].values():
-                    tickers.extend(sector_tickers)
+                tickers = list(_REGION_ALL_TICKERS[region])
             
-            # Get data for each ticker
-            stock_data = {}
-            for ticker in tickers:
-                try:
-                    data = api_agent.get_stock_data(ticker, period="1mo", interval="1d")
-                    stock_data[ticker] = data
-                except Exception as e:
-                    logger.error(f"Error getting data for {ticker}: {str(e)}")
+            # Get data for each ticker and the market concurrently
+            stock_data, errors = self._fetch_stock_data(api_agent, list(tickers) + [MARKET_TICKER], period="1mo", interval="1d")
+            for ticker, e in errors.items():
+                logger.error(f"Error getting data for {ticker}: {str(e)}")
+            if MARKET_TICKER in errors:
+                raise errors[MARKET_TICKER]
+            del stock_data[MARKET_TICKER]
             
             # Calculate metrics
             exposure_metrics = {
@@ -369,38 +610,31 @@ class AnalysisAgent:
                 'metrics': {}
             }
             
-            # Calculate average metrics
-            volatilities = []
-            betas = []
-            variances = []
-            
-            # Get market data
-            market_data = api_agent.get_stock_data("^GSPC", period="1mo", interval="1d")
+            # Centered market returns shared by every ticker's beta
+            market = self._get_market_centered(api_agent, period="1mo", interval="1d")
             
+            # Serve memoized metrics and compute the rest in one batch
+            metrics_by_ticker = {}
+            pending = {}
             for ticker, data in stock_data.items():
                 if data is not None and not data.empty:
-                    try:
-                        # Calculate returns
-                        returns = data['Close'].pct_change().dropna()
-                        
-                        # Calculate metrics
-                        volatility = self.calculate_volatility(data['Close'])
-                        beta = self.calculate_beta(data['Close'], market_data['Close'])
-                        var = self.calculate_var(returns)
-                        
-                        # Store metrics
-                        exposure_metrics['metrics'][ticker] = {
-                            'volatility': volatility * 100,  # Convert to percentage
-                            'beta': beta,
-                            'var_95': var
-                        }
-                        
-                        volatilities.append(volatility * 100)
-                        betas.append(beta)
-                        variances.append(var)
-                        
-                    except Exception as e:
-                        logger.error(f"Error calculating metrics for {ticker}: {str(e)}")
+                    metrics = self._get_memo(("risk_metrics", ticker, "1mo", "1d"))
+                    if metrics is None:
+                        pending[ticker] = data['Close']
+                    else:
+                        metrics_by_ticker[ticker] = metrics
+            
+            computed = self._compute_ticker_metrics(pending, market)
+            for ticker, metrics in computed.items():
+                self._set_memo(("risk_metrics", ticker, "1mo", "1d"), metrics)
+            metrics_by_ticker.update(computed)
+            
+            # Store metrics in ticker order
+            exposure_metrics['metrics'] = {t: metrics_by_ticker[t] for t in stock_data if t in metrics_by_ticker}
+            
+            volatilities = [m['volatility'] for m in exposure_metrics['metrics'].values()]
+            betas = [m['beta'] for m in exposure_metrics['metrics'].values()]
+            variances = [m['var_95'] for m in exposure_metrics['metrics'].values()]
             
             # Calculate average metrics
             exposure_metrics['average_metrics'] = {
@@ -411,22 +645,13 @@ class AnalysisAgent:
             
             # Determine risk level
             avg_volatility = exposure_metrics['average_metrics']['volatility']
-            if avg_volatility > 30:
-                risk_level = "Very High"
-            elif avg_volatility > 20:
-                risk_level = "High"
-            elif avg_volatility > 15:
-                risk_level = "Moderate to High"
-            elif avg_volatility > 10:
-                risk_level = "Moderate"
-            else:
-                risk_level = "Low"
-                
+            risk_level = _RISK_LEVELS[int(np.searchsorted(_RISK_LEVEL_BINS, avg_volatility))]
+            
             exposure_metrics['risk_level'] = risk_level
             
             # Get recent earnings surprises from api_agent
             earnings_surprises = {}
-            asia_tech_exposure = api_agent.get_asia_tech_exposure()
+            asia_tech_exposure = self._memoize(("asia_tech_exposure",), api_agent.get_asia_tech_exposure)
             if 'earnings_surprises' in asia_tech_exposure:
                 earnings_surprises = asia_tech_exposure['earnings_surprises']
             
@@ -467,7 +692,7 @@ class AnalysisAgent:
             indicators = api_agent.get_economic_indicators()
             
             # Get Asia tech exposure (contains earnings surprises)
-            asia_tech = api_agent.get_asia_tech_exposure()
+            asia_tech = self._memoize(("asia_tech_exposure",), api_agent.get_asia_tech_exposure)
             
             # Compile morning brief
             brief = {
@@ -486,3 +711,39 @@ class AnalysisAgent:
                 'error': str(e),
                 'date': datetime.now().strftime("%Y-%m-%d")
             }
+    
+    async def agenerate_morning_brief(self, api_agent, region: str = 'Asia', sector: str = 'Technology') -> Dict[str, Any]:
+        """
+        Async variant of generate_morning_brief that fetches its sections concurrently.
+        
+        Args:
+            api_agent: API agent instance
+            region: Region to focus on
+            sector: Sector to focus on
+            
+        Returns:
+            Dictionary with morning brief data
+        """
+        try:
+            # The sections are independent, so run the blocking fetches side by side
+            indices, exposure, indicators, asia_tech = await asyncio.gather(
+                asyncio.to_thread(api_agent.get_market_indices),
+                asyncio.to_thread(self.analyze_risk_exposure, api_agent, region, sector),
+                asyncio.to_thread(api_agent.get_economic_indicators),
+                asyncio.to_thread(self._memoize, ("asia_tech_exposure",), api_agent.get_asia_tech_exposure)
+            )
+            
+            return {
+                'date': datetime.now().strftime("%Y-%m-%d"),
+                'indices': indices,
+                'economic_indicators': indicators,
+                'region_exposure': exposure,
+                'asia_tech': asia_tech
+            }
+            
+        except Exception as e:
+            logger.error(f"Error generating morning brief: {str(e)}")
+            return {
+                'error': str(e),
+                'date': datetime.now().strftime("%Y-%m-%d")
+            }
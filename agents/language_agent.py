@@ -4,14 +4,137 @@ Handles natural language processing and generation using LLMs.
 """
 
 import os
+import asyncio
 import logging
-import json
-from typing import Dict, List, Any, Optional
+import orjson
+import hashlib
+from typing import Dict, List, Any, AsyncIterator, Iterator, Optional, Tuple
 import time
-from openai import OpenAI
+import threading
+import importlib.util
+from collections import OrderedDict
+from functools import lru_cache
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from utils.cache import SemanticCache
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of concurrent async API requests, to stay under rate limits
+MAX_CONCURRENT_REQUESTS = 8
+
+# HTTP/2 needs the optional h2 package; fall back to pooled HTTP/1.1 without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Embedding model used to key the semantic completion cache
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Completions sampled above this temperature are not cached
+CACHE_MAX_TEMPERATURE = 0.3
+
+# Time to live for exact-match cached completions in seconds
+EXACT_CACHE_TTL = 3600
+
+# Number of exact-match completions kept in memory
+EXACT_CACHE_SIZE = 1024
+
+# Upper bound on completion tokens for a batched request
+BATCH_MAX_TOKENS = 4000
+
+# Number of normalized queries whose intent analysis is kept in memory
+INTENT_CACHE_SIZE = 2048
+
+# Input token budgets for documents sent to the model
+SUMMARY_MAX_INPUT_TOKENS = 12000
+KEYPOINTS_MAX_INPUT_TOKENS = 6000
+
+# System prompts, kept byte-identical across calls so they share cache keys.
+# Stable instructions live here and per-request data goes last in the user
+# message, so the provider's prompt-prefix cache covers as much as possible.
+_SYSTEM_ADVISOR = """You are a professional financial advisor who specializes in market analysis.
+When responding to queries, use the provided context to give accurate and detailed information.
+Always maintain a formal, professional tone. For financial data, provide specific numbers and percentages.
+If answering questions about risk or investment advice, emphasize that these are analyses, not recommendations.
+Format currency values with appropriate symbols and use two decimal places for percentages.
+Keep responses concise, factual, and focused on the query."""
+
+_SYSTEM_BRIEF = """You are a professional financial advisor delivering a morning market brief.
+Your briefing should sound like a professional financial analyst summarizing key market information.
+Focus on being concise, informative, and insightful. Use a formal, authoritative tone.
+Explain what the data means for the client in practical terms.
+Create a concise, professional morning brief that a financial advisor would deliver to a client.
+Focus specifically on the Asia tech stock exposure and any earnings surprises. Mention the change in allocation.
+The brief should be about 3-4 sentences, direct and informative."""
+
+_SYSTEM_SUMMARY = """You are a financial analyst tasked with summarizing complex financial documents.
+Create a concise, fact-based summary that captures the most important information.
+Focus on key financial metrics, risk factors, and material changes or events.
+Use a professional, neutral tone and avoid any subjective judgments or recommendations.
+Focus on the key points, important financial data, and any significant information an investor should know."""
+
+_SYSTEM_INTENT = """You are a financial assistant that analyzes user queries to determine their intent.
+Respond with a JSON object containing the following fields:
+- primary_intent: The main category of the query (market_info, portfolio_analysis, risk_assessment, stock_specific, economic_data)
+- entities: Any specific entities mentioned (e.g., company names, indices, regions, sectors)
+- timeframe: The relevant timeframe for the query (e.g., today, week, month, year)
+- requires_numeric_data: Boolean indicating if the query needs specific numeric data
+- confidence: Your confidence in this analysis (0-1)"""
+
+_SYSTEM_KEYPOINTS = """You are a financial analyst tasked with extracting the most important points from financial text.
+Identify the key facts, figures, and insights that would be most relevant to an investor.
+Focus on concrete data points, trends, and significant information.
+Provide each key point as a separate item in a list.
+Each point should be concise, informative, and focused on financial information."""
+
+# Fallback intent when a query cannot be analyzed
+_DEFAULT_INTENT = {
+    "primary_intent": "unknown",
+    "entities": [],
+    "timeframe": "current",
+    "requires_numeric_data": True,
+    "confidence": 0.0
+}
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Get the tokenizer for the chat model, or None if it is unavailable."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        logger.error(f"Error loading tokenizer: {str(e)}")
+        return None
+
+def _truncate_tokens(text: str, max_tokens: int, marker: str) -> str:
+    """
+    Truncate text to a token budget.
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Maximum number of tokens to keep
+        marker: Suffix appended when the text is truncated
+    
+    Returns:
+        Text that fits the budget
+    """
+    enc = _encoding()
+    if enc is None:
+        # Without a tokenizer, assume roughly 4 characters per token
+        max_chars = max_tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars] + marker
+    
+    ids = enc.encode(text, disallowed_special=())
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens]) + marker
+
 class LanguageAgent:
     """
     Agent responsible for natural language processing and generation.
@@ -21,121 +144,449 @@ class LanguageAgent:
     def __init__(self):
         """Initialize the language agent."""
         self.api_key = os.environ.get("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key)
+        # Pooled keep-alive client so consecutive calls reuse the TLS connection
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=120.0),
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        self.client = OpenAI(api_key=self.api_key, http_client=self.http_client)
+        self.async_client = AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=120.0),
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+        )
+        self._async_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
         self.model = "gpt-4o"
         self.max_tokens = 2000
         self.temperature = 0.3
-        self.cache = {}
+        # Semantic matches are only used for data-free prompts (document summaries)
+        self.cache = SemanticCache(threshold=0.92, max_entries=1024)
+        self._exact_cache: OrderedDict = OrderedDict()  # key -> (monotonic expiry, completion), least recent first
+        self._exact_lock = threading.Lock()
+        self._pending: Dict[str, asyncio.Future] = {}  # exact key -> in-flight async completion
+        self._intent_cache: OrderedDict = OrderedDict()  # normalized query -> intent, least recent first
+        self._intent_lock = threading.Lock()
     
-    def generate_response(self, query: str, context: List[Dict[str, Any]] = None) -> str:
+    @staticmethod
+    def _exact_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
         """
-        Generate a natural language response to a query.
+        Build an exact-match cache key for a completion request.
         
         Args:
-            query: User query
-            context: Optional context from retriever
+            model: Model name
+            messages: Chat messages
+            params: Chat completion parameters
             
         Returns:
-            Generated response
+            SHA-256 hex digest of the canonical request payload
         """
-        try:
-            # Prepare context
-            context_text = ""
-            if context:
-                context_text = "Context information:\n"
-                for i, item in enumerate(context):
-                    context_text += f"[{i+1}] {item['content']}\n\n"
-            
-            # Prepare system message
-            system_message = """You are a professional financial advisor who specializes in market analysis. 
-            When responding to queries, use the provided context to give accurate and detailed information.
-            Always maintain a formal, professional tone. For financial data, provide specific numbers and percentages.
-            If answering questions about risk or investment advice, emphasize that these are analyses, not recommendations.
-            Format currency values with appropriate symbols and use two decimal places for percentages.
-            Keep responses concise, factual, and focused on the query."""
-            
-            # Prepare messages
-            messages = [
-                {"role": "system", "content": system_message},
-            ]
+        payload = orjson.dumps({
+            "model": model,
+            "messages": messages,
+            "temperature": params.get("temperature"),
+            "max_tokens": params.get("max_tokens"),
+            "response_format": params.get("response_format")
+        }, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _cache_keys(self, messages: List[Dict[str, str]], params: Dict[str, Any]) -> Tuple[str, str, str]:
+        """
+        Build the cache keys for a completion request.
+        
+        Args:
+            messages: Chat messages
+            params: Chat completion parameters
             
-            if context_text:
-                messages.append({"role": "user", "content": f"{context_text}\n\nBased on this context, please answer: {query}"})
-            else:
-                messages.append({"role": "user", "content": query})
+        Returns:
+            Tuple of (exact-match key, semantic cache scope, text to embed)
+        """
+        exact_key = self._exact_key(self.model, messages, params)
+        
+        # Only prompts issued with the same model, parameters and system prompt can match
+        scope = orjson.dumps({
+            "model": self.model,
+            "params": params,
+            "system": [m["content"] for m in messages if m["role"] == "system"]
+        }, option=orjson.OPT_SORT_KEYS).decode()
+        prompt = "\n".join(m["content"] for m in messages if m["role"] != "system")
+        
+        return exact_key, scope, prompt
+    
+    def _get_exact(self, exact_key: str) -> Optional[str]:
+        """
+        Get an unexpired exact-match cached completion.
+        
+        Args:
+            exact_key: Exact-match cache key
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
+        Returns:
+            Cached completion or None
+        """
+        with self._exact_lock:
+            hit = self._exact_cache.get(exact_key)
+            if hit is None or hit[0] <= time.monotonic():
+                return None
+            self._exact_cache.move_to_end(exact_key)
+        
+        logger.info("Using cached completion")
+        return hit[1]
+    
+    def _store_completion(self, exact_key: str, scope: str, embedding: Optional[List[float]], content: str) -> None:
+        """
+        Store a completion in the exact-match and semantic caches.
+        
+        Args:
+            exact_key: Exact-match cache key
+            scope: Semantic cache scope
+            embedding: Prompt embedding, or None if it could not be computed
+            content: Completion text
+        """
+        if not content:
+            return
+        
+        with self._exact_lock:
+            self._exact_cache[exact_key] = (time.monotonic() + EXACT_CACHE_TTL, content)
+            self._exact_cache.move_to_end(exact_key)
+            if len(self._exact_cache) > EXACT_CACHE_SIZE:
+                self._exact_cache.popitem(last=False)
+        
+        if embedding is not None:
+            self.cache.set(scope, embedding, content)
+    
+    def _cached_completion(self, messages: List[Dict[str, str]], semantic: bool = False, **params) -> str:
+        """
+        Create a chat completion, serving identical or semantically similar prompts from cache.
+        
+        Args:
+            messages: Chat messages
+            semantic: Whether similar prompts may share a completion; only for prompts
+                without market data, since prompts differing in a ticker or price embed alike
+            **params: Additional chat completion parameters (max_tokens, temperature, response_format)
+            
+        Returns:
+            Completion text
+        """
+        temperature = params.setdefault("temperature", self.temperature)
+        cacheable = temperature <= CACHE_MAX_TEMPERATURE
+        embedding = None
+        
+        # Identical requests are answered from the exact-match cache without an embedding call
+        exact_key, scope, prompt = self._cache_keys(messages, params)
+        cached = self._get_exact(exact_key)
+        if cached is not None:
+            return cached
+        
+        if cacheable and semantic:
+            try:
+                embedding = self.client.embeddings.create(model=EMBEDDING_MODEL, input=prompt).data[0].embedding
+                cached = self.cache.get(scope, embedding)
+                if cached is not None:
+                    logger.info("Using semantically cached completion")
+                    return cached
+            except Exception as e:
+                logger.error(f"Error checking completion cache: {str(e)}")
+                embedding = None
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            **params
+        )
+        content = response.choices[0].message.content
+        
+        if cacheable:
+            self._store_completion(exact_key, scope, embedding, content)
+        
+        return content
+    
+    async def _acached_completion(self, messages: List[Dict[str, str]], semantic: bool = False, **params) -> str:
+        """
+        Async variant of _cached_completion, bounded by the request semaphore.
+        Identical cacheable requests already in flight are awaited rather than repeated.
+        
+        Args:
+            messages: Chat messages
+            semantic: Whether similar prompts may share a completion (see _cached_completion)
+            **params: Additional chat completion parameters (max_tokens, temperature, response_format)
+            
+        Returns:
+            Completion text
+        """
+        temperature = params.setdefault("temperature", self.temperature)
+        cacheable = temperature <= CACHE_MAX_TEMPERATURE
+        
+        exact_key, scope, prompt = self._cache_keys(messages, params)
+        cached = self._get_exact(exact_key)
+        if cached is not None:
+            return cached
+        
+        if not cacheable:
+            return await self._acomplete(messages, exact_key, scope, prompt, False, False, params)
+        
+        # Coalesce retries and repeated polls that arrive while the first request runs.
+        # The completion runs as its own task, so a caller that is cancelled (e.g. its
+        # client disconnected) stops waiting without failing the others
+        pending = self._pending.get(exact_key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._acomplete(messages, exact_key, scope, prompt, True, semantic, params)
+            )
+            self._pending[exact_key] = pending
+            pending.add_done_callback(lambda task: self._finish_pending(exact_key, task))
+        else:
+            logger.info("Waiting for identical in-flight completion")
+        
+        return await asyncio.shield(pending)
+    
+    def _finish_pending(self, exact_key: str, task: asyncio.Task) -> None:
+        """
+        Forget a finished in-flight completion.
+        
+        Args:
+            exact_key: Exact-match cache key
+            task: Completed task
+        """
+        if self._pending.get(exact_key) is task:
+            del self._pending[exact_key]
+        
+        # Waiters re-raise any error; don't warn when none are left
+        if not task.cancelled():
+            task.exception()
+    
+    async def _acomplete(self, messages: List[Dict[str, str]], exact_key: str, scope: str, prompt: str,
+                         cacheable: bool, semantic: bool, params: Dict[str, Any]) -> str:
+        """
+        Create a chat completion after an exact-match cache miss, checking the semantic cache first
+        when allowed.
+        
+        Args:
+            messages: Chat messages
+            exact_key: Exact-match cache key
+            scope: Semantic cache scope
+            prompt: Text to embed for the semantic cache
+            cacheable: Whether the completion may be stored in the caches
+            semantic: Whether the semantic cache may serve and store the completion
+            params: Chat completion parameters
+            
+        Returns:
+            Completion text
+        """
+        embedding = None
+        
+        async with self._async_semaphore:
+            if cacheable and semantic:
+                try:
+                    result = await self.async_client.embeddings.create(model=EMBEDDING_MODEL, input=prompt)
+                    embedding = result.data[0].embedding
+                    cached = self.cache.get(scope, embedding)
+                    if cached is not None:
+                        logger.info("Using semantically cached completion")
+                        return cached
+                except Exception as e:
+                    logger.error(f"Error checking completion cache: {str(e)}")
+                    embedding = None
+            
+            response = await self.async_client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+                **params
             )
+        content = response.choices[0].message.content
+        
+        if cacheable:
+            self._store_completion(exact_key, scope, embedding, content)
+        
+        return content
+    
+    def _stream_completion(self, messages: List[Dict[str, str]], **params) -> Iterator[str]:
+        """
+        Stream a chat completion, yielding text as it is generated.
+        
+        Args:
+            messages: Chat messages
+            **params: Additional chat completion parameters (max_tokens, temperature)
             
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
-            return f"I apologize, but I encountered an error processing your request. Please try again later. Error: {str(e)}"
+        Returns:
+            Iterator over completion text fragments
+        """
+        temperature = params.setdefault("temperature", self.temperature)
+        exact_key, scope, _ = self._cache_keys(messages, params)
+        
+        # An identical earlier request is replayed in one piece
+        cached = self._get_exact(exact_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **params
+        )
+        
+        parts = []
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+        
+        # Only completed streams are cached; skipping the embedding keeps the stream tail short
+        if temperature <= CACHE_MAX_TEMPERATURE:
+            self._store_completion(exact_key, scope, None, "".join(parts))
     
-    def generate_morning_brief(self, brief_data: Dict[str, Any]) -> str:
+    async def _astream_completion(self, messages: List[Dict[str, str]], **params) -> AsyncIterator[str]:
         """
-        Generate a morning market brief narrative.
+        Async variant of _stream_completion, bounded by the request semaphore.
         
         Args:
-            brief_data: Data for the morning brief
+            messages: Chat messages
+            **params: Additional chat completion parameters (max_tokens, temperature)
             
         Returns:
-            Generated brief narrative
+            Iterator over completion text fragments
         """
-        try:
-            # Extract key data
-            date = brief_data.get('date', 'today')
-            
-            # Extract indices data
-            indices_text = ""
-            indices = brief_data.get('indices', {})
-            for name, data in indices.items():
-                price = data.get('price', 0)
-                change = data.get('change_percent', 0)
-                direction = "up" if change > 0 else "down"
-                indices_text += f"The {name} is at {price:.2f}, {direction} {abs(change):.2f}%. "
-            
-            # Extract asia tech exposure
-            asia_tech = brief_data.get('asia_tech', {})
-            exposure = asia_tech.get('exposure', {})
-            exposure_percentage = exposure.get('percentage', 0)
-            previous_percentage = exposure.get('previous_percentage', 0)
-            exposure_change = exposure.get('change', 0)
-            exposure_direction = exposure.get('movement_direction', 'unchanged')
-            
-            # Extract earnings surprises
-            surprises_text = ""
-            earnings_surprises = asia_tech.get('earnings_surprises', {})
-            for company, surprise in earnings_surprises.items():
-                direction = "beat" if surprise > 0 else "missed"
-                surprises_text += f"{company} {direction} estimates by {abs(surprise):.1f}%. "
-            
-            if not surprises_text:
-                surprises_text = "No significant earnings surprises to report. "
-                
-            # Extract sentiment
-            sentiment = asia_tech.get('sentiment', 'neutral')
+        temperature = params.setdefault("temperature", self.temperature)
+        exact_key, scope, _ = self._cache_keys(messages, params)
+        
+        # An identical earlier request is replayed in one piece
+        cached = self._get_exact(exact_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        async with self._async_semaphore:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                stream=True,
+                **params
+            )
             
-            # Extract region exposure
-            region_exposure = brief_data.get('region_exposure', {})
-            risk_level = region_exposure.get('risk_level', 'moderate')
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        
+        # Only completed streams are cached; skipping the embedding keeps the stream tail short
+        if temperature <= CACHE_MAX_TEMPERATURE:
+            self._store_completion(exact_key, scope, None, "".join(parts))
+    
+    @staticmethod
+    def _intent_key(query: str) -> str:
+        """Normalize a query so trivially different phrasings share an intent cache entry."""
+        return " ".join(query.lower().split())
+    
+    def _get_intent(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached intent analysis, marking it recently used."""
+        with self._intent_lock:
+            intent = self._intent_cache.get(key)
+            if intent is None:
+                return None
+            self._intent_cache.move_to_end(key)
+        logger.info("Using cached query intent")
+        return dict(intent)
+    
+    def _set_intent(self, key: str, intent: Dict[str, Any]) -> None:
+        """Cache an intent analysis, evicting the least recently used entry when full."""
+        with self._intent_lock:
+            self._intent_cache[key] = dict(intent)
+            self._intent_cache.move_to_end(key)
+            if len(self._intent_cache) > INTENT_CACHE_SIZE:
+                self._intent_cache.popitem(last=False)
+    
+    def _response_messages(self, query: str, context: List[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a query response.
+        
+        Args:
+            query: User query
+            context: Optional context from retriever
             
-            # Prepare system message
-            system_message = """You are a professional financial advisor delivering a morning market brief. 
-            Your briefing should sound like a professional financial analyst summarizing key market information.
-            Focus on being concise, informative, and insightful. Use a formal, authoritative tone.
-            Explain what the data means for the client in practical terms."""
+        Returns:
+            Chat messages
+        """
+        # Prepare context
+        context_text = ""
+        if context:
+            context_text = "Context information:\n"
+            for i, item in enumerate(context):
+                context_text += f"[{i+1}] {item['content']}\n\n"
+        
+        # Prepare messages
+        messages = [
+            {"role": "system", "content": _SYSTEM_ADVISOR},
+        ]
+        
+        if context_text:
+            messages.append({"role": "user", "content": f"{context_text}\n\nBased on this context, please answer: {query}"})
+        else:
+            messages.append({"role": "user", "content": query})
+        
+        return messages
+    
+    def _brief_messages(self, brief_data: Dict[str, Any]) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a morning brief narrative.
+        
+        Args:
+            brief_data: Data for the morning brief
             
-            # Prepare prompt
-            prompt = f"""Generate a brief morning market update based on the following data:
+        Returns:
+            Chat messages
+        """
+        # Extract key data
+        date = brief_data.get('date', 'today')
+        
+        # Extract indices data
+        indices_text = ""
+        indices = brief_data.get('indices', {})
+        for name, data in indices.items():
+            price = data.get('price', 0)
+            change = data.get('change_percent', 0)
+            direction = "up" if change > 0 else "down"
+            indices_text += f"The {name} is at {price:.2f}, {direction} {abs(change):.2f}%. "
+        
+        # Extract asia tech exposure
+        asia_tech = brief_data.get('asia_tech', {})
+        exposure = asia_tech.get('exposure', {})
+        exposure_percentage = exposure.get('percentage', 0)
+        previous_percentage = exposure.get('previous_percentage', 0)
+        exposure_change = exposure.get('change', 0)
+        exposure_direction = exposure.get('movement_direction', 'unchanged')
+        
+        # Extract earnings surprises
+        surprises_text = ""
+        earnings_surprises = asia_tech.get('earnings_surprises', {})
+        for company, surprise in earnings_surprises.items():
+            direction = "beat" if surprise > 0 else "missed"
+            surprises_text += f"{company} {direction} estimates by {abs(surprise):.1f}%. "
+        
+        if not surprises_text:
+            surprises_text = "No significant earnings surprises to report. "
+            
+        # Extract sentiment
+        sentiment = asia_tech.get('sentiment', 'neutral')
+        
+        # Extract region exposure
+        region_exposure = brief_data.get('region_exposure', {})
+        risk_level = region_exposure.get('risk_level', 'moderate')
+        
+        # Prepare prompt
+        prompt = f"""Generate the morning brief from the following data:
 
 Date: {date}
 
@@ -154,27 +605,107 @@ Market Sentiment:
 - Regional sentiment: {sentiment}
 
 Risk Assessment:
-- Risk level: {risk_level}
+- Risk level: {risk_level}"""
 
-Please create a concise, professional morning brief that a financial advisor would deliver to a client. 
-Focus specifically on the Asia tech stock exposure and any earnings surprises. Mention the change in allocation.
-The brief should be about 3-4 sentences, direct and informative."""
+        # Prepare messages
+        messages = [
+            {"role": "system", "content": _SYSTEM_BRIEF},
+            {"role": "user", "content": prompt}
+        ]
+        
+        return messages
+    
+    def _summary_messages(self, document: str, max_length: int = 500) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a document summary.
+        
+        Args:
+            document: Document text to summarize
+            max_length: Maximum length of summary in characters
+            
+        Returns:
+            Chat messages
+        """
+        # Limit document length to avoid token limits
+        document = _truncate_tokens(document, SUMMARY_MAX_INPUT_TOKENS, "... [document truncated]")
+        
+        # Prepare prompt
+        prompt = f"""Summarize this document in no more than {max_length} characters.
 
+Document:
+{document}"""
+        
+        # Prepare messages
+        messages = [
+            {"role": "system", "content": _SYSTEM_SUMMARY},
+            {"role": "user", "content": prompt}
+        ]
+        
+        return messages
+    
+    def _intent_messages(self, query: str) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for query intent analysis.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Chat messages
+        """
+        # Prepare messages
+        messages = [
+            {"role": "system", "content": _SYSTEM_INTENT},
+            {"role": "user", "content": f"Analyze the intent of this query: {query}"}
+        ]
+        
+        return messages
+    
+    def generate_response(self, query: str, context: List[Dict[str, Any]] = None) -> str:
+        """
+        Generate a natural language response to a query.
+        
+        Args:
+            query: User query
+            context: Optional context from retriever
+            
+        Returns:
+            Generated response
+        """
+        try:
+            messages = self._response_messages(query, context)
+            
             # Call OpenAI API
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ]
+            return self._cached_completion(
+                messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            )
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            return f"I apologize, but I encountered an error processing your request. Please try again later. Error: {str(e)}"
+    
+    def generate_morning_brief(self, brief_data: Dict[str, Any]) -> str:
+        """
+        Generate a morning market brief narrative.
+        
+        Args:
+            brief_data: Data for the morning brief
+            
+        Returns:
+            Generated brief narrative
+        """
+        try:
+            messages = self._brief_messages(brief_data)
+            
+            # Call OpenAI API
+            return self._cached_completion(
+                messages,
                 max_tokens=500,
                 temperature=0.3
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             logger.error(f"Error generating morning brief: {str(e)}")
             return f"I apologize, but I couldn't generate the morning brief due to an error. Please try again later. Error: {str(e)}"
@@ -191,38 +722,17 @@ The brief should be about 3-4 sentences, direct and informative."""
             Document summary
         """
         try:
-            # Prepare system message
-            system_message = """You are a financial analyst tasked with summarizing complex financial documents.
-            Create a concise, fact-based summary that captures the most important information.
-            Focus on key financial metrics, risk factors, and material changes or events.
-            Use a professional, neutral tone and avoid any subjective judgments or recommendations."""
-            
-            # Limit document length to avoid token limits
-            if len(document) > 15000:
-                document = document[:15000] + "... [document truncated]"
-            
-            # Prepare prompt
-            prompt = f"""Please summarize the following financial document in a concise way (no more than {max_length} characters).
-            Focus on the key points, important financial data, and any significant information an investor should know.
-
-            Document:
-            {document}"""
+            messages = self._summary_messages(document, max_length)
             
             # Call OpenAI API
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ]
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+            # Summaries carry no market data, so similar documents may share one
+            return self._cached_completion(
+                messages,
+                semantic=True,
                 max_tokens=1000,
                 temperature=0.3
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             logger.error(f"Error summarizing document: {str(e)}")
             return f"Error summarizing document: {str(e)}"
@@ -237,46 +747,230 @@ The brief should be about 3-4 sentences, direct and informative."""
         Returns:
             Dictionary with query intent analysis
         """
+        key = self._intent_key(query)
+        cached = self._get_intent(key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Prepare system message
-            system_message = """You are a financial assistant that analyzes user queries to determine their intent.
-            Respond with a JSON object containing the following fields:
-            - primary_intent: The main category of the query (market_info, portfolio_analysis, risk_assessment, stock_specific, economic_data)
-            - entities: Any specific entities mentioned (e.g., company names, indices, regions, sectors)
-            - timeframe: The relevant timeframe for the query (e.g., today, week, month, year)
-            - requires_numeric_data: Boolean indicating if the query needs specific numeric data
-            - confidence: Your confidence in this analysis (0-1)"""
-            
-            # Prepare messages
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": f"Analyze the intent of this query: {query}"}
-            ]
+            messages = self._intent_messages(query)
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+            content = self._cached_completion(
+                messages,
                 max_tokens=500,
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
             
             # Parse JSON response
-            intent_analysis = json.loads(response.choices[0].message.content)
+            intent_analysis = orjson.loads(content)
+            self._set_intent(key, intent_analysis)
             
             return intent_analysis
             
         except Exception as e:
             logger.error(f"Error analyzing query intent: {str(e)}")
-            return {
-                "primary_intent": "unknown",
-                "entities": [],
-                "timeframe": "current",
-                "requires_numeric_data": True,
-                "confidence": 0.0,
-                "error": str(e)
-            }
+            return {**_DEFAULT_INTENT, "error": str(e)}
+    
+    async def agenerate_response(self, query: str, context: List[Dict[str, Any]] = None) -> str:
+        """
+        Async variant of generate_response.
+        
+        Args:
+            query: User query
+            context: Optional context from retriever
+            
+        Returns:
+            Generated response
+        """
+        try:
+            return await self._acached_completion(
+                self._response_messages(query, context),
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            )
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            return f"I apologize, but I encountered an error processing your request. Please try again later. Error: {str(e)}"
+    
+    async def agenerate_morning_brief(self, brief_data: Dict[str, Any]) -> str:
+        """
+        Async variant of generate_morning_brief.
+        
+        Args:
+            brief_data: Data for the morning brief
+            
+        Returns:
+            Generated brief narrative
+        """
+        try:
+            return await self._acached_completion(
+                self._brief_messages(brief_data),
+                max_tokens=500,
+                temperature=0.3
+            )
+        except Exception as e:
+            logger.error(f"Error generating morning brief: {str(e)}")
+            return f"I apologize, but I couldn't generate the morning brief due to an error. Please try again later. Error: {str(e)}"
+    
+    async def asummarize_financial_document(self, document: str, max_length: int = 500) -> str:
+        """
+        Async variant of summarize_financial_document.
+        
+        Args:
+            document: Document text to summarize
+            max_length: Maximum length of summary in characters
+            
+        Returns:
+            Document summary
+        """
+        try:
+            return await self._acached_completion(
+                self._summary_messages(document, max_length),
+                semantic=True,
+                max_tokens=1000,
+                temperature=0.3
+            )
+        except Exception as e:
+            logger.error(f"Error summarizing document: {str(e)}")
+            return f"Error summarizing document: {str(e)}"
+    
+    async def aanalyze_query_intent(self, query: str) -> Dict[str, Any]:
+        """
+        Async variant of analyze_query_intent.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Dictionary with query intent analysis
+        """
+        key = self._intent_key(query)
+        cached = self._get_intent(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            content = await self._acached_completion(
+                self._intent_messages(query),
+                max_tokens=500,
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            intent_analysis = orjson.loads(content)
+            self._set_intent(key, intent_analysis)
+            return intent_analysis
+        except Exception as e:
+            logger.error(f"Error analyzing query intent: {str(e)}")
+            return {**_DEFAULT_INTENT, "error": str(e)}
+    
+    def generate_response_stream(self, query: str, context: List[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Generate a response to a query, yielding text as it is produced.
+        
+        Args:
+            query: User query
+            context: Optional context from retriever
+            
+        Returns:
+            Iterator over response text fragments
+        """
+        try:
+            yield from self._stream_completion(
+                self._response_messages(query, context),
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            )
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            yield f"I apologize, but I encountered an error processing your request. Please try again later. Error: {str(e)}"
+    
+    async def agenerate_response_stream(self, query: str, context: List[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Async variant of generate_response_stream.
+        
+        Args:
+            query: User query
+            context: Optional context from retriever
+            
+        Returns:
+            Iterator over response text fragments
+        """
+        try:
+            async for delta in self._astream_completion(
+                self._response_messages(query, context),
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            ):
+                yield delta
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            yield f"I apologize, but I encountered an error processing your request. Please try again later. Error: {str(e)}"
+    
+    def generate_morning_brief_stream(self, brief_data: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generate a morning brief narrative, yielding text as it is produced.
+        
+        Args:
+            brief_data: Data for the morning brief
+            
+        Returns:
+            Iterator over brief text fragments
+        """
+        try:
+            yield from self._stream_completion(
+                self._brief_messages(brief_data),
+                max_tokens=500,
+                temperature=0.3
+            )
+        except Exception as e:
+            logger.error(f"Error generating morning brief: {str(e)}")
+            yield f"I apologize, but I couldn't generate the morning brief due to an error. Please try again later. Error: {str(e)}"
+    
+    def analyze_query_intents_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze the intent of several queries with a single API request.
+        
+        Args:
+            queries: List of user queries
+            
+        Returns:
+            List of query intent analyses, in the same order as the queries
+        """
+        if not queries:
+            return []
+        
+        try:
+            numbered = "\n".join(f"{i+1}. {query}" for i, query in enumerate(queries))
+            prompt = f"""Analyze the intent of each of these {len(queries)} queries.
+Return a JSON object {{"results": [...]}} where results[i] is the analysis of query i+1.
+
+{numbered}"""
+            
+            messages = [
+                {"role": "system", "content": _SYSTEM_INTENT},
+                {"role": "user", "content": prompt}
+            ]
+            
+            content = self._cached_completion(
+                messages,
+                max_tokens=min(500 * len(queries), BATCH_MAX_TOKENS),
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            
+            results = orjson.loads(content).get("results", [])
+            
+            # Pad any missing analyses so the output lines up with the input
+            return [
+                results[i] if i < len(results) and isinstance(results[i], dict) else dict(_DEFAULT_INTENT)
+                for i in range(len(queries))
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error analyzing query intents: {str(e)}")
+            return [{**_DEFAULT_INTENT, "error": str(e)} for _ in queries]
     
     def extract_key_points(self, text: str, max_points: int = 5) -> List[str]:
         """
@@ -290,40 +984,30 @@ The brief should be about 3-4 sentences, direct and informative."""
             List of key points
         """
         try:
-            # Prepare system message
-            system_message = """You are a financial analyst tasked with extracting the most important points from financial text.
-            Identify the key facts, figures, and insights that would be most relevant to an investor.
-            Focus on concrete data points, trends, and significant information.
-            Provide each key point as a separate item in a list."""
-            
             # Limit text length to avoid token limits
-            if len(text) > 8000:
-                text = text[:8000] + "... [text truncated]"
+            text = _truncate_tokens(text, KEYPOINTS_MAX_INPUT_TOKENS, "... [text truncated]")
             
             # Prepare prompt
-            prompt = f"""Extract the {max_points} most important key points from the following text.
-            Each point should be concise, informative, and focused on financial information.
-            Format each point as a separate item in a JSON array.
+            prompt = f"""Extract the {max_points} most important key points as a JSON object {{"key_points": [...]}}.
 
-            Text:
-            {text}"""
+Text:
+{text}"""
             
             # Call OpenAI API
             messages = [
-                {"role": "system", "content": system_message},
+                {"role": "system", "content": _SYSTEM_KEYPOINTS},
                 {"role": "user", "content": prompt}
             ]
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+            content = self._cached_completion(
+                messages,
                 max_tokens=500,
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
             
             # Parse JSON response
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(content)
             
             # Extract key points from the response
             key_points = result.get("key_points", [])
@@ -336,3 +1020,52 @@ The brief should be about 3-4 sentences, direct and informative."""
         except Exception as e:
             logger.error(f"Error extracting key points: {str(e)}")
             return [f"Error extracting key points: {str(e)}"]
+    
+    def extract_key_points_batch(self, texts: List[str], max_points: int = 5) -> List[List[str]]:
+        """
+        Extract key points from several texts with a single API request.
+        
+        Args:
+            texts: List of texts to analyze
+            max_points: Maximum number of key points to extract per text
+            
+        Returns:
+            List of key point lists, in the same order as the texts
+        """
+        if not texts:
+            return []
+        
+        try:
+            # Limit each text's length to avoid token limits
+            sections = []
+            for i, text in enumerate(texts):
+                text = _truncate_tokens(text, KEYPOINTS_MAX_INPUT_TOKENS, "... [text truncated]")
+                sections.append(f"Text {i+1}:\n{text}")
+            
+            prompt = f"""Extract the {max_points} most important key points from each of the following {len(texts)} texts.
+Return a JSON object {{"results": [[...], ...]}} where results[i] is the array of key points for text i+1.
+
+""" + "\n\n".join(sections)
+            
+            messages = [
+                {"role": "system", "content": _SYSTEM_KEYPOINTS},
+                {"role": "user", "content": prompt}
+            ]
+            
+            content = self._cached_completion(
+                messages,
+                max_tokens=min(500 * len(texts), BATCH_MAX_TOKENS),
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            
+            results = orjson.loads(content).get("results", [])
+            
+            return [
+                list(results[i])[:max_points] if i < len(results) and isinstance(results[i], list) else []
+                for i in range(len(texts))
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error extracting key points: {str(e)}")
+            return [[f"Error extracting key points: {str(e)}"] for _ in texts]
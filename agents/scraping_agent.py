@@ -3,19 +3,106 @@ Scraping Agent for the Finance Assistant.
 Handles crawling financial filings and news from various sources.
 """
 
+import importlib.util
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
+import orjson
+import pickle
 import trafilatura
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import pandas as pd
 import random
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# lxml's C parser is much faster than html.parser; fall back when it is not installed
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+SEC_TICKER_URL = "https://www.sec.gov/include/ticker.txt"
+
+# SEC republishes the ticker map at most daily
+CIK_MAP_TTL = 86400
+
+# Cache TTLs in seconds; published filings never change, headlines turn over quickly
+FILINGS_TTL = 86400
+NEWS_TTL = 900
+
+# Connect and read timeouts (seconds) for scraping requests
+REQUEST_TIMEOUT = (5, 30)
+
+# Chunk size for streamed filing downloads
+DOWNLOAD_CHUNK_SIZE = 65536
+
+# Headline words used for keyword sentiment scoring
+POSITIVE_WORDS = frozenset(['gain', 'rise', 'up', 'surge', 'jump', 'boost', 'rally', 'bullish', 'optimistic', 'growth'])
+NEGATIVE_WORDS = frozenset(['drop', 'fall', 'down', 'plunge', 'decline', 'lose', 'loss', 'bearish', 'pessimistic', 'crash'])
+
+# Whole words with simple inflections, so "up" no longer matches "upend"
+_INFLECTIONS = ("", "s", "es", "d", "ed", "ing")
+_POS_RE = re.compile(r"\b(?:" + "|".join(sorted(POSITIVE_WORDS)) + r")(?:s|es|d|ed|ing)?\b")
+_NEG_RE = re.compile(r"\b(?:" + "|".join(sorted(NEGATIVE_WORDS)) + r")(?:s|es|d|ed|ing)?\b")
+
+def _build_automaton(words: frozenset):
+    """Build an Aho-Corasick automaton over the inflected forms of a word set."""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        for suffix in _INFLECTIONS:
+            automaton.add_word(word + suffix, len(word + suffix))
+    automaton.make_automaton()
+    return automaton
+
+if AHOCORASICK_AVAILABLE:
+    # One pass over a headline finds every lexicon word, however large the lexicon grows
+    _POS_AC = _build_automaton(POSITIVE_WORDS)
+    _NEG_AC = _build_automaton(NEGATIVE_WORDS)
+else:
+    _POS_AC = _NEG_AC = None
+
+def _count_words(title: str, automaton, pattern: re.Pattern) -> int:
+    """
+    Count whole-word lexicon matches in a lower-cased headline.
+    
+    Args:
+        title: Lower-cased headline
+        automaton: Aho-Corasick automaton for the lexicon (used when available)
+        pattern: Equivalent compiled regex (used otherwise)
+    
+    Returns:
+        Number of matches
+    """
+    if automaton is None:
+        return len(pattern.findall(title))
+    
+    count = 0
+    n = len(title)
+    for end, length in automaton.iter(title):
+        start = end - length + 1
+        # Only count matches on word boundaries, as the regex does
+        if (start == 0 or not title[start - 1].isalnum()) and (end == n - 1 or not title[end + 1].isalnum()):
+            count += 1
+    return count
+
 class ScrapingAgent:
     """
     Agent responsible for scraping financial data from various sources.
@@ -23,12 +110,117 @@ class ScrapingAgent:
     
     def __init__(self):
         """Initialize the scraping agent."""
-        self.cache = {}
-        self.cache_expiry = {}
-        self.cache_duration = 3600  # 1 hour in seconds
+        self.cache_duration = 3600  # 1 hour in seconds, used for earnings calendars
+        self._cache_dir = Path(os.environ.get("FIN_CACHE_DIR", "~/.fin_cache")).expanduser()
+        
+        # Persist results across restarts when diskcache is installed
+        if DISKCACHE_AVAILABLE:
+            self.cache = diskcache.Cache(str(self._cache_dir / "scraping"))
+        else:
+            # Expiry times are on the monotonic clock
+            self.cache = {}
+            self.cache_expiry = {}
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        
+        # Shared session so repeated requests reuse pooled connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        ))
+        
+        self._scrapers = {
+            "yahoo_finance": self._scrape_yahoo,
+            "cnbc": self._scrape_cnbc,
+            "bloomberg": self._scrape_bloomberg
+        }
+        self._cik_map: Optional[Dict[str, str]] = None
+        self._cik_map_expiry = 0.0
+        self._cik_map_path = self._cache_dir / "sec_cik_map.pkl"
+    
+    def _get_cached(self, key: str) -> Any:
+        """
+        Get an unexpired cached value.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        if DISKCACHE_AVAILABLE:
+            return self.cache.get(key)
+        
+        if key in self.cache and self.cache_expiry.get(key, 0.0) > time.monotonic():
+            return self.cache[key]
+        return None
+    
+    def _set_cached(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value in the cache.
+        
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time to live in seconds
+        """
+        if DISKCACHE_AVAILABLE:
+            self.cache.set(key, value, expire=ttl)
+            return
+        
+        self.cache[key] = value
+        self.cache_expiry[key] = time.monotonic() + ttl
+    
+    def _load_cik_map(self) -> Dict[str, str]:
+        """
+        Load the SEC ticker to CIK mapping, from the local pickle if it is fresh.
+        
+        Returns:
+            Dictionary mapping upper-case tickers to CIK strings
+        """
+        try:
+            if time.time() - self._cik_map_path.stat().st_mtime < CIK_MAP_TTL:
+                with open(self._cik_map_path, 'rb') as f:
+                    return pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading cached CIK map: {str(e)}")
+        
+        # ticker.txt is tab-separated "ticker<TAB>cik" lines; tolerate the older colon format
+        resp = self.session.get(SEC_TICKER_URL, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        pairs = (line.split('\t' if '\t' in line else ':', 1) for line in resp.text.upper().splitlines() if line)
+        cik_map = {pair[0].strip(): pair[1].strip() for pair in pairs if len(pair) == 2 and pair[1].strip()}
+        
+        try:
+            self._cik_map_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._cik_map_path, 'wb') as f:
+                pickle.dump(cik_map, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.error(f"Error writing cached CIK map: {str(e)}")
+        
+        return cik_map
+    
+    def _resolve_cik(self, ticker: str) -> Optional[str]:
+        """
+        Resolve a ticker to its SEC CIK, refreshing the ticker map daily.
+        
+        Args:
+            ticker: Stock ticker symbol
+            
+        Returns:
+            CIK string, or None if the ticker is unknown
+        """
+        if self._cik_map is None or time.monotonic() > self._cik_map_expiry:
+            self._cik_map = self._load_cik_map()
+            self._cik_map_expiry = time.monotonic() + CIK_MAP_TTL
+        
+        return self._cik_map.get(ticker.upper())
     
     def get_sec_filings(self, ticker: str, filing_type: str = "10-K") -> List[Dict[str, Any]]:
         """
@@ -44,23 +236,16 @@ class ScrapingAgent:
         cache_key = f"filings_{ticker}_{filing_type}"
         
         # Check cache
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > datetime.now().timestamp():
+        cached = self._get_cached(cache_key)
+        if cached is not None:
             logger.info(f"Using cached data for {cache_key}")
-            return self.cache[cache_key]
+            return cached
         
         try:
             # Using SEC EDGAR API
             base_url = "https://data.sec.gov/submissions/CIK"
             
-            # Generate CIK with leading zeros
-            resp = requests.get(f"https://www.sec.gov/include/ticker.txt")
-            ticker_to_cik = {}
-            for line in resp.text.split('\n'):
-                if ':' in line:
-                    ticker_part, cik_part = line.strip().split(':')
-                    ticker_to_cik[ticker_part.upper()] = cik_part.strip()
-            
-            cik = ticker_to_cik.get(ticker.upper())
+            cik = self._resolve_cik(ticker)
             if not cik:
                 logger.error(f"CIK not found for ticker {ticker}")
                 return []
@@ -73,12 +258,12 @@ class ScrapingAgent:
             logger.info(f"Fetching SEC data from {url}")
             
             # Use cached headers with appropriate user agent
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
             if response.status_code != 200:
                 logger.error(f"Failed to fetch SEC data: {response.status_code} - {response.text}")
                 return []
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Find relevant filings
             filings = []
@@ -95,8 +280,7 @@ class ScrapingAgent:
                     })
             
             # Cache results
-            self.cache[cache_key] = filings
-            self.cache_expiry[cache_key] = datetime.now().timestamp() + self.cache_duration
+            self._set_cached(cache_key, filings, FILINGS_TTL)
             
             return filings
             
@@ -117,31 +301,31 @@ class ScrapingAgent:
         cache_key = f"filing_content_{filing_url}"
         
         # Check cache
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > datetime.now().timestamp():
+        cached = self._get_cached(cache_key)
+        if cached is not None:
             logger.info(f"Using cached filing content")
-            return self.cache[cache_key]
+            return cached
         
         try:
-            # Download the file content
-            response = requests.get(filing_url, headers=self.headers)
-            if response.status_code != 200:
-                logger.error(f"Failed to download filing: {response.status_code}")
-                return ""
-            
-            # Extract the text content
-            html_content = response.text
+            # Stream the file into one buffer; 10-K filings can run to tens of MB
+            with self.session.get(filing_url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                if response.status_code != 200:
+                    logger.error(f"Failed to download filing: {response.status_code}")
+                    return ""
+                
+                # Parse the raw bytes so no decoded str copy of the document is made
+                html_content = b"".join(response.iter_content(DOWNLOAD_CHUNK_SIZE))
             
             # Use trafilatura to extract clean text
             text = trafilatura.extract(html_content)
             
             if not text:
                 # Fallback to BeautifulSoup if trafilatura fails
-                soup = BeautifulSoup(html_content, 'html.parser')
+                soup = BeautifulSoup(html_content, HTML_PARSER)
                 text = soup.get_text()
             
             # Cache result
-            self.cache[cache_key] = text
-            self.cache_expiry[cache_key] = datetime.now().timestamp() + self.cache_duration
+            self._set_cached(cache_key, text, FILINGS_TTL)
             
             return text
             
@@ -165,85 +349,31 @@ class ScrapingAgent:
         cache_key = f"financial_news_{'-'.join(sources)}"
         
         # Check cache
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > datetime.now().timestamp():
+        cached = self._get_cached(cache_key)
+        if cached is not None:
             logger.info(f"Using cached news data")
-            return self.cache[cache_key]
+            return cached
         
         news_items = []
         
         try:
-            if "yahoo_finance" in sources:
-                # Scrape Yahoo Finance
-                url = "https://finance.yahoo.com/news/"
-                response = requests.get(url, headers=self.headers)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    articles = soup.find_all('h3')
-                    
-                    for article in articles[:10]:  # Limit to 10 articles
-                        link_tag = article.find('a')
-                        if link_tag and link_tag.has_attr('href'):
-                            href = link_tag['href']
-                            if href.startswith('/'):
-                                href = f"https://finance.yahoo.com{href}"
-                            
-                            news_items.append({
-                                'source': 'Yahoo Finance',
-                                'title': article.text.strip(),
-                                'url': href,
-                                'published': datetime.now().strftime("%Y-%m-%d")  # Actual date would be scraped
-                            })
-                            
-            if "cnbc" in sources:
-                # Scrape CNBC
-                url = "https://www.cnbc.com/markets/"
-                response = requests.get(url, headers=self.headers)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    articles = soup.find_all('div', class_='Card-titleContainer')
-                    
-                    for article in articles[:10]:  # Limit to 10 articles
-                        title_tag = article.find('a')
-                        if title_tag:
-                            title = title_tag.text.strip()
-                            href = title_tag.get('href', '')
-                            
-                            news_items.append({
-                                'source': 'CNBC',
-                                'title': title,
-                                'url': href,
-                                'published': datetime.now().strftime("%Y-%m-%d")
-                            })
-                            
-            if "bloomberg" in sources:
-                # Scrape Bloomberg
-                url = "https://www.bloomberg.com/markets"
-                response = requests.get(url, headers=self.headers)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    articles = soup.find_all('h3', class_='story-package-module__headline')
-                    
-                    for article in articles[:10]:  # Limit to 10 articles
-                        link_tag = article.find('a')
-                        if link_tag:
-                            title = link_tag.text.strip()
-                            href = link_tag.get('href', '')
-                            if not href.startswith('http'):
-                                href = f"https://www.bloomberg.com{href}"
-                            
-                            news_items.append({
-                                'source': 'Bloomberg',
-                                'title': title,
-                                'url': href,
-                                'published': datetime.now().strftime("%Y-%m-%d")
-                            })
+            # Fetch the sources concurrently; each scrape is dominated by network latency
+            scrapers = [self._scrapers[source] for source in sources if source in self._scrapers]
+            with ThreadPoolExecutor(max_workers=max(len(scrapers), 1)) as executor:
+                futures = {executor.submit(scraper): scraper for scraper in scrapers}
+                results = {}
+                for future in as_completed(futures):
+                    try:
+                        results[futures[future]] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error scraping {futures[future].__name__}: {str(e)}")
+            
+            # Keep the requested source order regardless of completion order
+            for scraper in scrapers:
+                news_items.extend(results.get(scraper, []))
             
             # Cache results
-            self.cache[cache_key] = news_items
-            self.cache_expiry[cache_key] = datetime.now().timestamp() + self.cache_duration
+            self._set_cached(cache_key, news_items, NEWS_TTL)
             
             return news_items
             
@@ -251,6 +381,102 @@ class ScrapingAgent:
             logger.error(f"Error scraping financial news: {str(e)}")
             return []
     
+    def _scrape_yahoo(self) -> List[Dict[str, Any]]:
+        """
+        Scrape headlines from Yahoo Finance.
+        
+        Returns:
+            List of news items
+        """
+        items = []
+        
+        url = "https://finance.yahoo.com/news/"
+        response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.text, HTML_PARSER, parse_only=SoupStrainer('h3'))
+            articles = soup.find_all('h3')
+            
+            for article in articles[:10]:  # Limit to 10 articles
+                link_tag = article.find('a')
+                if link_tag and link_tag.has_attr('href'):
+                    href = link_tag['href']
+                    if href.startswith('/'):
+                        href = f"https://finance.yahoo.com{href}"
+                    
+                    items.append({
+                        'source': 'Yahoo Finance',
+                        'title': article.text.strip(),
+                        'url': href,
+                        'published': datetime.now().strftime("%Y-%m-%d")  # Actual date would be scraped
+                    })
+        
+        return items
+    
+    def _scrape_cnbc(self) -> List[Dict[str, Any]]:
+        """
+        Scrape headlines from CNBC.
+        
+        Returns:
+            List of news items
+        """
+        items = []
+        
+        url = "https://www.cnbc.com/markets/"
+        response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.text, HTML_PARSER, parse_only=SoupStrainer('div', class_='Card-titleContainer'))
+            articles = soup.find_all('div', class_='Card-titleContainer')
+            
+            for article in articles[:10]:  # Limit to 10 articles
+                title_tag = article.find('a')
+                if title_tag:
+                    title = title_tag.text.strip()
+                    href = title_tag.get('href', '')
+                    
+                    items.append({
+                        'source': 'CNBC',
+                        'title': title,
+                        'url': href,
+                        'published': datetime.now().strftime("%Y-%m-%d")
+                    })
+        
+        return items
+    
+    def _scrape_bloomberg(self) -> List[Dict[str, Any]]:
+        """
+        Scrape headlines from Bloomberg.
+        
+        Returns:
+            List of news items
+        """
+        items = []
+        
+        url = "https://www.bloomberg.com/markets"
+        response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.text, HTML_PARSER, parse_only=SoupStrainer('h3', class_='story-package-module__headline'))
+            articles = soup.find_all('h3', class_='story-package-module__headline')
+            
+            for article in articles[:10]:  # Limit to 10 articles
+                link_tag = article.find('a')
+                if link_tag:
+                    title = link_tag.text.strip()
+                    href = link_tag.get('href', '')
+                    if not href.startswith('http'):
+                        href = f"https://www.bloomberg.com{href}"
+                    
+                    items.append({
+                        'source': 'Bloomberg',
+                        'title': title,
+                        'url': href,
+                        'published': datetime.now().strftime("%Y-%m-%d")
+                    })
+        
+        return items
+    
     def get_earnings_calendar(self, days: int = 7) -> List[Dict[str, Any]]:
         """
         Scrape upcoming earnings reports.
@@ -264,9 +490,10 @@ class ScrapingAgent:
         cache_key = f"earnings_calendar_{days}"
         
         # Check cache
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > datetime.now().timestamp():
+        cached = self._get_cached(cache_key)
+        if cached is not None:
             logger.info(f"Using cached earnings calendar")
-            return self.cache[cache_key]
+            return cached
         
         try:
             # Yahoo Finance earnings calendar
@@ -278,13 +505,13 @@ class ScrapingAgent:
             end_str = end_date.strftime("%Y-%m-%d")
             
             url = f"https://finance.yahoo.com/calendar/earnings?from={start_str}&to={end_str}"
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
             
             if response.status_code != 200:
                 logger.error(f"Failed to get earnings calendar: {response.status_code}")
                 return []
                 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.text, HTML_PARSER, parse_only=SoupStrainer('table'))
             table = soup.find('table')
             
             if not table:
@@ -310,8 +537,7 @@ class ScrapingAgent:
                     })
             
             # Cache results
-            self.cache[cache_key] = earnings
-            self.cache_expiry[cache_key] = datetime.now().timestamp() + self.cache_duration
+            self._set_cached(cache_key, earnings, self.cache_duration)
             
             return earnings
             
@@ -332,9 +558,10 @@ class ScrapingAgent:
         cache_key = f"sentiment_{keyword}"
         
         # Check cache
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > datetime.now().timestamp():
+        cached = self._get_cached(cache_key)
+        if cached is not None:
             logger.info(f"Using cached sentiment data for {keyword}")
-            return self.cache[cache_key]
+            return cached
         
         try:
             # Get news from multiple sources
@@ -344,22 +571,13 @@ class ScrapingAgent:
             relevant_news = [item for item in news if keyword.lower() in item['title'].lower()]
             
             # Basic sentiment analysis based on keywords
-            positive_words = ['gain', 'rise', 'up', 'surge', 'jump', 'boost', 'rally', 'bullish', 'optimistic', 'growth']
-            negative_words = ['drop', 'fall', 'down', 'plunge', 'decline', 'lose', 'loss', 'bearish', 'pessimistic', 'crash']
-            
             positive_count = 0
             negative_count = 0
             
             for item in relevant_news:
                 title = item['title'].lower()
-                
-                for word in positive_words:
-                    if word in title:
-                        positive_count += 1
-                        
-                for word in negative_words:
-                    if word in title:
-                        negative_count += 1
+                positive_count += _count_words(title, _POS_AC, _POS_RE)
+                negative_count += _count_words(title, _NEG_AC, _NEG_RE)
             
             # Calculate sentiment score
             total = positive_count + negative_count
@@ -392,8 +610,7 @@ class ScrapingAgent:
             }
             
             # Cache result
-            self.cache[cache_key] = result
-            self.cache_expiry[cache_key] = datetime.now().timestamp() + self.cache_duration
+            self._set_cached(cache_key, result, NEWS_TTL)
             
             return result
             
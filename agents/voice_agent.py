@@ -4,18 +4,31 @@ Handles speech recognition and synthesis.
 """
 
 import os
+import asyncio
 import logging
 import tempfile
-import base64
-import io
 import time
-from typing import Dict, Any, Optional, Union
-from openai import OpenAI
+from typing import Dict, Any, AsyncIterator, Optional, Union
+import aiofiles
+from openai import AsyncOpenAI
 import numpy as np
 import wave
 
+# SIMD base64 codec with the stdlib interface; fall back to the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 logger = logging.getLogger(__name__)
 
+# Bytes per chunk forwarded from streamed speech synthesis
+TTS_STREAM_CHUNK_SIZE = 4096
+
+# Chunks buffered between the synthesis download and the client; bounds memory
+# when the client reads slower than OpenAI sends
+TTS_STREAM_QUEUE_SIZE = 8
+
 class VoiceAgent:
     """
     Agent responsible for speech-to-text and text-to-speech operations.
@@ -25,10 +38,10 @@ class VoiceAgent:
     def __init__(self):
         """Initialize the voice agent."""
         self.api_key = os.environ.get("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = AsyncOpenAI(api_key=self.api_key)
         self.voice = "onyx"  # Default voice for TTS
     
-    def transcribe_audio(self, audio_file: str) -> Dict[str, Any]:
+    async def transcribe_audio(self, audio_file: str) -> Dict[str, Any]:
         """
         Transcribe audio file to text using Whisper.
         
@@ -39,11 +52,34 @@ class VoiceAgent:
             Dictionary with transcription result
         """
         try:
-            with open(audio_file, "rb") as audio:
-                transcription = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio
-                )
+            async with aiofiles.open(audio_file, "rb") as audio:
+                audio_bytes = await audio.read()
+        except Exception as e:
+            logger.error(f"Error reading audio file {audio_file}: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "text": ""
+            }
+        
+        return await self.transcribe_audio_bytes(audio_bytes, os.path.basename(audio_file))
+    
+    async def transcribe_audio_bytes(self, audio_bytes: bytes, filename: str = "audio.wav") -> Dict[str, Any]:
+        """
+        Transcribe in-memory audio to text using Whisper.
+        
+        Args:
+            audio_bytes: Encoded audio data
+            filename: File name sent with the upload; its extension tells Whisper the format
+            
+        Returns:
+            Dictionary with transcription result
+        """
+        try:
+            transcription = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(filename, audio_bytes)
+            )
             
             return {
                 "success": True,
@@ -57,7 +93,7 @@ class VoiceAgent:
                 "text": ""
             }
     
-    def text_to_speech(self, text: str) -> Dict[str, Any]:
+    async def text_to_speech(self, text: str) -> Dict[str, Any]:
         """
         Convert text to speech.
         
@@ -72,18 +108,14 @@ class VoiceAgent:
             if len(text) > 4096:
                 text = text[:4096]
             
-            response = self.client.audio.speech.create(
+            response = await self.client.audio.speech.create(
                 model="tts-1",
                 voice=self.voice,
                 input=text
             )
             
-            # Get audio data
-            audio_data = io.BytesIO(response.content)
-            
-            # Encode as base64 for easy transmission
-            audio_data.seek(0)
-            encoded_audio = base64.b64encode(audio_data.read()).decode('utf-8')
+            # Encode as base64 for easy transmission (base64 output is pure ASCII)
+            encoded_audio = base64.b64encode(response.content).decode('ascii')
             
             return {
                 "success": True,
@@ -97,6 +129,53 @@ class VoiceAgent:
                 "audio_base64": ""
             }
     
+    async def text_to_speech_stream(self, text: str, response_format: str = "opus") -> AsyncIterator[bytes]:
+        """
+        Convert text to speech, yielding audio bytes as they are synthesized.
+        
+        Args:
+            text: Text to convert to speech
+            response_format: Audio format (opus, mp3, aac, flac, wav or pcm)
+            
+        Returns:
+            Iterator over audio chunks (raises if synthesis fails)
+        """
+        # Limit text length to avoid issues
+        if len(text) > 4096:
+            text = text[:4096]
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=TTS_STREAM_QUEUE_SIZE)
+        
+        async def produce():
+            # Keep receiving from OpenAI while the consumer is sending to the client
+            try:
+                async with self.client.audio.speech.with_streaming_response.create(
+                    model="tts-1",
+                    voice=self.voice,
+                    input=text,
+                    response_format=response_format
+                ) as response:
+                    async for chunk in response.iter_bytes(chunk_size=TTS_STREAM_CHUNK_SIZE):
+                        await queue.put(chunk)
+            except Exception as e:
+                # Handed to the consumer, so the caller sees the failure
+                logger.error(f"Error streaming speech: {str(e)}")
+                await queue.put(e)
+                return
+            
+            # End of stream (not sent on cancellation, when nobody is reading)
+            await queue.put(None)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while (chunk := await queue.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            # Stop synthesis if the client went away mid-stream
+            producer.cancel()
+    
     def save_audio_to_file(self, audio_base64: str, output_file: str = "output.wav") -> str:
         """
         Save base64 encoded audio to a file.
@@ -109,7 +188,7 @@ class VoiceAgent:
             Path to saved file
         """
         try:
-            audio_data = base64.b64decode(audio_base64)
+            audio_data = base64.b64decode(audio_base64, validate=False)
             
             with open(output_file, 'wb') as f:
                 f.write(audio_data)
@@ -119,7 +198,7 @@ class VoiceAgent:
             logger.error(f"Error saving audio to file: {str(e)}")
             return ""
     
-    def process_voice_input(self, audio_file: str) -> Dict[str, Any]:
+    async def process_voice_input(self, audio_file: str) -> Dict[str, Any]:
         """
         Process voice input: transcribe and return text.
         
@@ -130,7 +209,7 @@ class VoiceAgent:
             Dictionary with processing result
         """
         # Transcribe audio
-        transcription = self.transcribe_audio(audio_file)
+        transcription = await self.transcribe_audio(audio_file)
         
         if not transcription["success"]:
             return {
@@ -144,7 +223,7 @@ class VoiceAgent:
             "text": transcription["text"]
         }
     
-    def process_voice_output(self, text: str) -> Dict[str, Any]:
+    async def process_voice_output(self, text: str) -> Dict[str, Any]:
         """
         Process voice output: convert text to speech.
         
@@ -155,7 +234,7 @@ class VoiceAgent:
             Dictionary with processing result
         """
         # Convert text to speech
-        speech = self.text_to_speech(text)
+        speech = await self.text_to_speech(text)
         
         if not speech["success"]:
             return {
@@ -169,7 +248,7 @@ class VoiceAgent:
             "audio_base64": speech["audio_base64"]
         }
     
-    def speak_financial_summary(self, summary: str) -> Dict[str, Any]:
+    async def speak_financial_summary(self, summary: str) -> Dict[str, Any]:
         """
         Generate speech for a financial summary with appropriate pacing.
         
@@ -185,7 +264,7 @@ class VoiceAgent:
             processed_text = summary
             
             # Convert processed text to speech
-            return self.process_voice_output(processed_text)
+            return await self.process_voice_output(processed_text)
             
         except Exception as e:
             logger.error(f"Error generating financial summary speech: {str(e)}")
@@ -194,3 +273,19 @@ class VoiceAgent:
                 "error": str(e),
                 "audio_base64": ""
             }
+    
+    async def speak_financial_summary_stream(self, summary: str, response_format: str = "mp3") -> AsyncIterator[bytes]:
+        """
+        Stream speech for a financial summary as it is synthesized.
+        
+        Args:
+            summary: Financial summary text
+            response_format: Audio format (opus, mp3, aac, flac, wav or pcm)
+            
+        Returns:
+            Iterator over audio chunks
+        """
+        processed_text = summary
+        
+        async for chunk in self.text_to_speech_stream(processed_text, response_format):
+            yield chunk
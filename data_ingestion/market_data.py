@@ -3,15 +3,79 @@ Market Data Ingestion for the Finance Assistant.
 Handles retrieval and processing of market data.
 """
 
+import os
+import httpx
+import numpy as np
 import pandas as pd
 import yfinance as yf
 import logging
 import time
+import threading
+from concurrent.futures import Future
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple
+from selectolax.parser import HTMLParser
+
+from utils.cache import FileCache
+from utils.market_hours import DAILY_INTERVALS, MARKET_TZ, daily_ttl, is_us_session
 
 logger = logging.getLogger(__name__)
 
+# Earnings calendars change at most a few times a day
+EARNINGS_CACHE_TTL = 3600
+
+# Cache TTL in seconds by data interval, aligned to how often bars change.
+# Daily and weekly bars are handled by _ttl_for, since they only move while
+# the US market is open.
+INTERVAL_TTLS = {
+    "1m": 60, "2m": 60, "5m": 60,
+    "15m": 300, "30m": 300, "60m": 300, "90m": 300, "1h": 300,
+    "1mo": 86400, "3mo": 86400
+}
+
+# Yahoo Finance rejects requests without a browser-like user agent
+_HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Major market indices (display name -> symbol)
+_INDICES = MappingProxyType({
+    "S&P 500": "^GSPC",
+    "Dow Jones": "^DJI",
+    "NASDAQ": "^IXIC",
+    "FTSE 100": "^FTSE",
+    "Nikkei 225": "^N225",
+    "Hang Seng": "^HSI"
+})
+
+# Sector ETFs (sector -> symbol)
+_SECTOR_ETFS = MappingProxyType({
+    "Technology": "XLK",
+    "Healthcare": "XLV",
+    "Financial": "XLF",
+    "Consumer Discretionary": "XLY",
+    "Consumer Staples": "XLP",
+    "Energy": "XLE",
+    "Utilities": "XLU",
+    "Materials": "XLB",
+    "Industrial": "XLI",
+    "Real Estate": "XLRE",
+    "Communication": "XLC"
+})
+
+# Economic indicators (display name -> symbol)
+_INDICATORS = MappingProxyType({
+    "10-Year Treasury Yield": "^TNX",
+    "30-Year Treasury Yield": "^TYX",
+    "Crude Oil": "CL=F",
+    "Gold": "GC=F",
+    "VIX": "^VIX",
+    "USD/EUR": "USDEUR=X",
+    "USD/JPY": "USDJPY=X"
+})
+
 class MarketDataIngestion:
     """
     Class for ingesting market data from various sources.
@@ -22,7 +86,73 @@ class MarketDataIngestion:
         """Initialize the market data ingestion."""
         self.cache = {}
         self.cache_expiry = {}
-        self.cache_duration = 300  # Cache duration in seconds (5 minutes)
+        self.cache_duration = 300  # Cache duration in seconds (5 minutes), used for unknown intervals
+        
+        # Shared across restarts and worker processes
+        cache_dir = Path(os.environ.get("FIN_CACHE_DIR", "~/.fin_cache")).expanduser() / "market_data"
+        self.file_cache = FileCache(cache_dir)
+        
+        # In-flight fetches by cache key, so concurrent misses share one request
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Pooled client for calendar page requests
+        self.http_client = httpx.Client(headers=_HTTP_HEADERS, timeout=10.0, follow_redirects=True)
+    
+    def _ttl_for(self, interval: str, symbol: str) -> float:
+        """
+        Get the cache TTL in seconds for a symbol's bars at a data interval.
+        
+        Args:
+            interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+            symbol: Ticker symbol; only US-session symbols are held until the next open
+        
+        Returns:
+            TTL in seconds
+        """
+        if interval in DAILY_INTERVALS:
+            return daily_ttl(datetime.now(tz=MARKET_TZ), us_session=is_us_session(symbol))
+        
+        return INTERVAL_TTLS.get(interval, self.cache_duration)
+    
+    def get_cached(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Get cached data, checking memory first and then the on-disk cache.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached DataFrame, or None if missing or expired
+        """
+        if key in self.cache and self.cache_expiry.get(key, 0) > time.time():
+            return self.cache[key]
+        
+        # The TTL stored with the entry decides freshness, since daily TTLs depend on
+        # when the entry was written; in memory it lives only for what remains of it
+        data, remaining = self.file_cache.get_with_lifetime(key)
+        if data is not None:
+            self.cache[key] = data
+            self.cache_expiry[key] = time.time() + remaining
+        
+        return data
+    
+    def set_cached(self, key: str, data: pd.DataFrame, ttl: float) -> None:
+        """
+        Store data in both the in-memory and on-disk caches.
+        Empty frames (failed or NaN-only downloads) are not cached.
+        
+        Args:
+            key: Cache key
+            data: DataFrame to cache
+            ttl: Time to live in seconds
+        """
+        if data.empty:
+            return
+        
+        self.cache[key] = data
+        self.cache_expiry[key] = time.time() + ttl
+        self.file_cache.set(key, data, ttl)
     
     def get_stock_data(self, ticker: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
         """
@@ -37,11 +167,24 @@ class MarketDataIngestion:
             DataFrame with stock data
         """
         cache_key = f"{ticker}_{period}_{interval}"
+        ttl = self._ttl_for(interval, ticker)
         
         # Check cache
-        if cache_key in self.cache and self.cache_expiry.get(cache_key, 0) > time.time():
+        cached = self.get_cached(cache_key)
+        if cached is not None:
             logger.info(f"Using cached data for {ticker}")
-            return self.cache[cache_key]
+            return cached
+        
+        # Coalesce concurrent misses for the same key into a single fetch
+        with self._inflight_lock:
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                future = Future()
+                self._inflight[cache_key] = future
+        
+        if inflight is not None:
+            logger.info(f"Waiting for in-flight fetch of {cache_key}")
+            return inflight.result()
         
         try:
             logger.info(f"Fetching stock data for {ticker}")
@@ -49,39 +192,128 @@ class MarketDataIngestion:
             data = stock.history(period=period, interval=interval)
             
             # Cache the result
-            self.cache[cache_key] = data
-            self.cache_expiry[cache_key] = time.time() + self.cache_duration
-            
-            return data
+            self.set_cached(cache_key, data, ttl)
         except Exception as e:
             logger.error(f"Error fetching stock data for {ticker}: {str(e)}")
-            return pd.DataFrame()
+            data = pd.DataFrame()
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+        
+        # Waiters get the same result, including the empty fallback on error
+        future.set_result(data)
+        return data
     
-    def get_market_indices(self) -> Dict[str, pd.DataFrame]:
+    def _batch_history(self, tickers: List[str], period: str = "1mo", interval: str = "1d") -> Dict[str, pd.DataFrame]:
         """
-        Get data for major market indices.
+        Get historical data for several tickers with a single batched download.
         
+        Args:
+            tickers: List of stock ticker symbols
+            period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+            interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+            
         Returns:
-            Dictionary with index data
+            Dictionary of DataFrames keyed by ticker (empty for tickers that could not be fetched)
         """
-        indices = {
-            "S&P 500": "^GSPC",
-            "Dow Jones": "^DJI",
-            "NASDAQ": "^IXIC",
-            "FTSE 100": "^FTSE",
-            "Nikkei 225": "^N225",
-            "Hang Seng": "^HSI"
-        }
-        
         result = {}
-        for name, ticker in indices.items():
+        missing = []
+        
+        # Serve what we can from the cache
+        for ticker in tickers:
+            cached = self.get_cached(f"{ticker}_{period}_{interval}")
+            if cached is not None:
+                result[ticker] = cached
+            else:
+                missing.append(ticker)
+        
+        if missing:
             try:
-                result[name] = self.get_stock_data(ticker)
-            except Exception as e:
-                logger.error(f"Error fetching index data for {name}: {str(e)}")
-                result[name] = pd.DataFrame()
+                logger.info(f"Fetching stock data for {', '.join(missing)}")
+                data = yf.download(
+                    missing,
+                    period=period,
+                    interval=interval,
+                    group_by="ticker",
+                    threads=True,
+                    progress=False
+                )
                 
-        return result
+                for ticker in missing:
+                    if isinstance(data.columns, pd.MultiIndex):
+                        if ticker not in data.columns.get_level_values(0):
+                            continue
+                        frame = data[ticker].dropna(how="all")
+                    else:
+                        frame = data.dropna(how="all")
+                    
+                    # yfinance returns all-NaN columns for a ticker that failed
+                    if frame.empty:
+                        continue
+                    
+                    # Cache each slice under the same key get_stock_data uses
+                    self.set_cached(f"{ticker}_{period}_{interval}", frame, self._ttl_for(interval, ticker))
+                    result[ticker] = frame
+            except Exception as e:
+                logger.error(f"Error fetching stock data for {', '.join(missing)}: {str(e)}")
+            
+            # Retry tickers the batch did not deliver one at a time
+            for ticker in missing:
+                if ticker not in result:
+                    result[ticker] = self.get_stock_data(ticker, period=period, interval=interval)
+        
+        return {ticker: result.get(ticker, pd.DataFrame()) for ticker in tickers}
+    
+    @staticmethod
+    def _close_matrix(history: Dict[str, pd.DataFrame], tickers: List[str]) -> pd.DataFrame:
+        """
+        Align closing prices from several histories into one date x ticker frame.
+        
+        Args:
+            history: Dictionary of DataFrames keyed by ticker
+            tickers: Tickers to include, in column order (missing ones are all-NaN)
+            
+        Returns:
+            DataFrame of closing prices
+        """
+        closes = pd.DataFrame({
+            ticker: data['Close'] for ticker, data in history.items()
+            if not data.empty and 'Close' in data
+        })
+        return closes.reindex(columns=tickers)
+    
+    @staticmethod
+    def _first_last(closes: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get each column's first and last valid close.
+        
+        Args:
+            closes: DataFrame of closing prices (date x ticker)
+            
+        Returns:
+            Tuple of (first, last) float64 arrays, NaN for columns with no data
+        """
+        P = closes.to_numpy(dtype=np.float64)
+        valid = np.isfinite(P)
+        cols = np.arange(P.shape[1])
+        
+        first = P[valid.argmax(axis=0), cols]
+        last = P[P.shape[0] - 1 - valid[::-1].argmax(axis=0), cols]
+        
+        empty = ~valid.any(axis=0)
+        first[empty] = np.nan
+        last[empty] = np.nan
+        return first, last
+    
+    def get_market_indices(self) -> Dict[str, pd.DataFrame]:
+        """
+        Get data for major market indices.
+        
+        Returns:
+            Dictionary with index data
+        """
+        history = self._batch_history(list(_INDICES.values()), period="1mo")
+        return {name: history[ticker] for name, ticker in _INDICES.items()}
     
     def get_sector_performance(self) -> Dict[str, float]:
         """
@@ -90,42 +322,23 @@ class MarketDataIngestion:
         Returns:
             Dictionary with sector performance (percentage change)
         """
-        # Sector ETFs
-        sectors = {
-            "Technology": "XLK",
-            "Healthcare": "XLV",
-            "Financial": "XLF",
-            "Consumer Discretionary": "XLY",
-            "Consumer Staples": "XLP",
-            "Energy": "XLE",
-            "Utilities": "XLU",
-            "Materials": "XLB",
-            "Industrial": "XLI",
-            "Real Estate": "XLRE",
-            "Communication": "XLC"
-        }
+        # Get 5-day performance
+        history = self._batch_history(list(_SECTOR_ETFS.values()), period="5d")
         
-        result = {}
-        for sector, ticker in sectors.items():
-            try:
-                # Get 5-day performance
-                data = self.get_stock_data(ticker, period="5d")
-                
-                if not data.empty:
-                    # Calculate percentage change
-                    first_close = data['Close'].iloc[0]
-                    last_close = data['Close'].iloc[-1]
-                    pct_change = (last_close - first_close) / first_close * 100
-                    
-                    result[sector] = round(pct_change, 2)
-                else:
-                    result[sector] = 0.0
-                    
-            except Exception as e:
-                logger.error(f"Error calculating sector performance for {sector}: {str(e)}")
-                result[sector] = 0.0
-                
-        return result
+        try:
+            closes = self._close_matrix(history, list(_SECTOR_ETFS.values()))
+            if closes.dropna(how="all").empty:
+                return dict.fromkeys(_SECTOR_ETFS, 0.0)
+            
+            # Percentage change from each ticker's first to last close in the window
+            first_close, last_close = self._first_last(closes)
+            pct_change = np.round((last_close / first_close - 1) * 100, 2)
+            
+            return dict(zip(_SECTOR_ETFS, np.nan_to_num(pct_change, nan=0.0).tolist()))
+            
+        except Exception as e:
+            logger.error(f"Error calculating sector performance: {str(e)}")
+            return dict.fromkeys(_SECTOR_ETFS, 0.0)
     
     def get_economic_indicators(self) -> Dict[str, float]:
         """
@@ -134,31 +347,45 @@ class MarketDataIngestion:
         Returns:
             Dictionary with economic indicators
         """
-        indicators = {
-            "10-Year Treasury Yield": "^TNX",
-            "30-Year Treasury Yield": "^TYX",
-            "Crude Oil": "CL=F",
-            "Gold": "GC=F",
-            "VIX": "^VIX",
-            "USD/EUR": "USDEUR=X",
-            "USD/JPY": "USDJPY=X"
-        }
+        history = self._batch_history(list(_INDICATORS.values()), period="1d")
         
-        result = {}
-        for name, ticker in indicators.items():
-            try:
-                data = self.get_stock_data(ticker, period="1d")
-                
-                if not data.empty:
-                    result[name] = data['Close'].iloc[-1]
-                else:
-                    result[name] = 0.0
-                    
-            except Exception as e:
-                logger.error(f"Error fetching indicator {name}: {str(e)}")
-                result[name] = 0.0
-                
-        return result
+        try:
+            closes = self._close_matrix(history, list(_INDICATORS.values()))
+            if closes.dropna(how="all").empty:
+                return dict.fromkeys(_INDICATORS, 0.0)
+            
+            # Latest close per indicator
+            _, last_close = self._first_last(closes)
+            
+            return dict(zip(_INDICATORS, np.nan_to_num(last_close, nan=0.0).tolist()))
+            
+        except Exception as e:
+            logger.error(f"Error fetching economic indicators: {str(e)}")
+            return dict.fromkeys(_INDICATORS, 0.0)
+    
+    def _fetch_table(self, url: str) -> Tuple[List[str], List[List[str]]]:
+        """
+        Fetch a page and extract the text of its first HTML table.
+        
+        Args:
+            url: Page URL
+            
+        Returns:
+            Tuple of (header names, rows of cell text)
+        """
+        response = self.http_client.get(url)
+        response.raise_for_status()
+        
+        table = HTMLParser(response.text).css_first("table")
+        if table is None:
+            return [], []
+        
+        headers = [cell.text(strip=True) for cell in table.css("thead th")]
+        rows = [
+            [cell.text(strip=True) for cell in row.css("td")]
+            for row in table.css("tbody tr")
+        ]
+        return headers, rows
     
     def get_earnings_calendar(self, days: int = 7) -> List[Dict[str, Any]]:
         """
@@ -172,27 +399,38 @@ class MarketDataIngestion:
         """
         try:
             # Define date range
-            start_date = datetime.now().strftime('%Y-%m-%d')
-            end_date = (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
+            now = datetime.now()
+            start_date = now.strftime('%Y-%m-%d')
+            end_date = (now + timedelta(days=days)).strftime('%Y-%m-%d')
             
-            # Use yfinance to get earnings calendar
-            calendar = pd.read_html(f'https://finance.yahoo.com/calendar/earnings?from={start_date}&to={end_date}')
+            # Check the on-disk cache for this date range
+            cache_key = f"earnings_{start_date}_{end_date}"
+            cached = self.file_cache.get(cache_key, EARNINGS_CACHE_TTL)
+            if cached is not None:
+                logger.info(f"Using cached earnings calendar for {start_date} to {end_date}")
+                return cached.to_dict('records')
             
-            if not calendar:
+            # Scrape the Yahoo Finance earnings calendar
+            headers, rows = self._fetch_table(f'https://finance.yahoo.com/calendar/earnings?from={start_date}&to={end_date}')
+            
+            if not rows:
                 return []
-                
-            earnings_df = calendar[0]
             
             # Convert to list of dictionaries
-            earnings = []
-            for _, row in earnings_df.iterrows():
-                earnings.append({
-                    'symbol': row['Symbol'],
-                    'company': row['Company'],
-                    'date': row['Earnings Date'],
-                    'eps_estimate': row['EPS Estimate']
-                })
-                
+            columns = [headers.index(name) for name in ('Symbol', 'Company', 'Earnings Date', 'EPS Estimate')]
+            earnings = [
+                {
+                    'symbol': row[columns[0]],
+                    'company': row[columns[1]],
+                    'date': row[columns[2]],
+                    'eps_estimate': row[columns[3]]
+                }
+                for row in rows if len(row) > max(columns)
+            ]
+            
+            # FileCache stores DataFrames, so round-trip the records through one
+            self.file_cache.set(cache_key, pd.DataFrame(earnings), EARNINGS_CACHE_TTL)
+            
             return earnings
                 
         except Exception as e:
@@ -207,25 +445,23 @@ class MarketDataIngestion:
             List of recent IPOs
         """
         try:
-            # Use yfinance to get IPO calendar
-            calendar = pd.read_html('https://finance.yahoo.com/calendar/ipo')
+            # Scrape the Yahoo Finance IPO calendar
+            headers, rows = self._fetch_table('https://finance.yahoo.com/calendar/ipo')
             
-            if not calendar:
+            if not rows:
                 return []
-                
-            ipo_df = calendar[0]
             
             # Convert to list of dictionaries
-            ipos = []
-            for _, row in ipo_df.iterrows():
-                ipos.append({
-                    'symbol': row['Symbol'],
-                    'company': row['Company'],
-                    'price_range': row['Price Range'],
-                    'date': row['Date']
-                })
-                
-            return ipos
+            columns = [headers.index(name) for name in ('Symbol', 'Company', 'Price Range', 'Date')]
+            return [
+                {
+                    'symbol': row[columns[0]],
+                    'company': row[columns[1]],
+                    'price_range': row[columns[2]],
+                    'date': row[columns[3]]
+                }
+                for row in rows if len(row) > max(columns)
+            ]
                 
         except Exception as e:
             logger.error(f"Error fetching recent IPOs: {str(e)}")
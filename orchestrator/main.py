@@ -3,17 +3,21 @@ Main Orchestrator for the Finance Assistant.
 Coordinates the different agents and handles the main workflow.
 """
 
+import io
 import logging
 import asyncio
 import time
-from typing import Dict, List, Any, Optional, Union
+import wave
+from typing import AsyncIterator, Dict, List, Any, Optional, Union
 import json
 import os
 from datetime import datetime
+import orjson
 
-from fastapi import FastAPI, Request, File, UploadFile, Form, Body, BackgroundTasks
+from fastapi import FastAPI, Request, Form, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 
 from agents.api_agent import APIAgent
@@ -28,8 +32,32 @@ from orchestrator.router import AgentRouter
 # Setup logging
 logger = setup_logger("orchestrator")
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, serializing NumPy values natively."""
+    
+    def render(self, content: Any) -> bytes:
+        # Anything orjson can't serialize natively (e.g. pandas scalars) falls back to str
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY, default=str)
+
+# Routes answering with an event stream or compressed audio, which gzip would
+# buffer or pointlessly recompress
+_UNCOMPRESSED_PATHS = frozenset({"/process/stream", "/voice/synthesize/stream", "/morning_brief/audio"})
+
+class SelectiveGZipMiddleware:
+    """GZip middleware that leaves streaming and audio routes uncompressed."""
+    
+    def __init__(self, app, minimum_size: int = 500):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in _UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
 # Create FastAPI app
-app = FastAPI(title="Finance Assistant Orchestrator")
+app = FastAPI(title="Finance Assistant Orchestrator", default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -40,6 +68,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON payloads for clients that accept gzip
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=500)
+
 # Initialize agents
 api_agent = APIAgent()
 scraping_agent = ScrapingAgent()
@@ -61,6 +92,8 @@ router = AgentRouter(
 # Set up periodic data ingestion
 last_data_ingestion = 0
 DATA_INGESTION_INTERVAL = 3600  # 1 hour in seconds
+shutdown_event = asyncio.Event()
+ingestion_task: Optional[asyncio.Task] = None
 
 async def ingest_data_periodically():
     """Periodically ingest data to keep the knowledge base updated."""
@@ -76,10 +109,10 @@ async def ingest_data_periodically():
             asia_tech_stocks = ["TSM", "9988.HK", "005930.KS", "0700.HK", "6758.T"]
             
             # Ingest data from API agent
-            retriever_agent.add_from_api_agent(api_agent, asia_tech_stocks)
+            await asyncio.to_thread(retriever_agent.add_from_api_agent, api_agent, asia_tech_stocks)
             
             # Ingest data from scraping agent
-            retriever_agent.add_from_scraping_agent(scraping_agent, asia_tech_stocks)
+            await asyncio.to_thread(retriever_agent.add_from_scraping_agent, scraping_agent, asia_tech_stocks)
             
             last_data_ingestion = current_time
             logger.info("Periodic data ingestion completed")
@@ -87,20 +120,71 @@ async def ingest_data_periodically():
         except Exception as e:
             logger.error(f"Error during periodic data ingestion: {str(e)}")
 
+async def ingestion_loop():
+    """Run data ingestion on a fixed interval until the server shuts down."""
+    while not shutdown_event.is_set():
+        await ingest_data_periodically()
+        
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=DATA_INGESTION_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+def silent_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    """Build a mono 16-bit WAV file of silence."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+async def warm_up_agents():
+    """Exercise each external dependency once so the first user request doesn't pay connection and import costs."""
+    logger.info("Warming up agents")
+    
+    results = await asyncio.gather(
+        voice_agent.transcribe_audio_bytes(silent_wav(), "warmup.wav"),
+        voice_agent.text_to_speech("hi"),
+        asyncio.to_thread(api_agent.get_stock_data, "SPY", "1d"),
+        language_agent.aanalyze_query_intent("hi"),
+        return_exceptions=True
+    )
+    
+    # Results are discarded; failures only mean the first real request warms up instead
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Error during warmup: {str(result)}")
+    
+    logger.info("Warmup completed")
+
 @app.on_event("startup")
 async def startup_event():
     """Run tasks when the server starts."""
-    # Initial data ingestion
-    await ingest_data_periodically()
+    global ingestion_task
+    
+    # Initial and hourly data ingestion run in the background
+    ingestion_task = asyncio.create_task(ingestion_loop())
+    
+    # Set SKIP_WARMUP=1 to skip the warmup calls (e.g. in tests)
+    if os.environ.get("SKIP_WARMUP") != "1":
+        await warm_up_agents()
+
+@app.on_event("shutdown")
+async def shutdown_event_handler():
+    """Stop background tasks when the server shuts down."""
+    shutdown_event.set()
+    if ingestion_task is not None:
+        await ingestion_task
 
 @app.post("/process")
-async def process_query(request: Dict[str, Any] = Body(...), background_tasks: BackgroundTasks = None):
+async def process_query(request: Dict[str, Any] = Body(...)):
     """
     Process a user query through the appropriate agents.
     
     Args:
         request: Request body with query
-        background_tasks: FastAPI background tasks
     
     Returns:
         JSON response with processed result
@@ -108,63 +192,103 @@ async def process_query(request: Dict[str, Any] = Body(...), background_tasks: B
     query = request.get("query", "")
     
     if not query:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400,
             content={"error": "No query provided"}
         )
         
     try:
         # Analyze query intent
-        intent = language_agent.analyze_query_intent(query)
-        
-        # Schedule periodic data ingestion
-        if background_tasks:
-            background_tasks.add_task(ingest_data_periodically)
+        intent = await language_agent.aanalyze_query_intent(query)
         
         # Route the query to appropriate agents
-        response = router.route_query(query, intent)
+        response = await router.route_query(query, intent)
         
         return response
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error processing query: {str(e)}"}
         )
 
+def sse_event(event: str, payload: Any) -> bytes:
+    """Encode one server-sent event with a JSON payload."""
+    data = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=str)
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+@app.post("/process/stream")
+async def process_query_stream(request: Dict[str, Any] = Body(...)):
+    """
+    Process a user query, streaming the result as server-sent events.
+    
+    A "data" event carries the agents' structured data as soon as it is available,
+    "token" events carry the response text as it is generated, and a final "done"
+    (or "error") event ends the stream.
+    
+    Args:
+        request: Request body with query
+    
+    Returns:
+        Event stream response
+    """
+    query = request.get("query", "")
+    
+    if not query:
+        return ORJSONResponse(
+            status_code=400,
+            content={"error": "No query provided"}
+        )
+    
+    async def events():
+        try:
+            intent = await language_agent.aanalyze_query_intent(query)
+            async for event, payload in router.route_query_stream(query, intent):
+                yield sse_event(event, {"payload": payload} if event == "data" else {"text": payload})
+            yield sse_event("done", {})
+        except Exception as e:
+            logger.error(f"Error processing query: {str(e)}")
+            yield sse_event("error", {"error": f"Error processing query: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/voice/transcribe")
-async def transcribe_audio(audio: UploadFile = File(...)):
+async def transcribe_audio(request: Request):
     """
     Transcribe audio to text.
     
     Args:
-        audio: Audio file
+        request: Request with either a multipart "audio" file or a raw audio body
     
     Returns:
         JSON response with transcription
     """
     try:
-        # Save the audio file temporarily
-        with open("temp_audio.wav", "wb") as temp_file:
-            temp_file.write(await audio.read())
-        
-        # Transcribe the audio
-        result = voice_agent.transcribe_audio("temp_audio.wav")
+        filename = "audio.wav"
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            audio_bytes = await form["audio"].read()
+            filename = form["audio"].filename or filename
+        else:
+            audio_bytes = await request.body()
         
-        # Clean up
-        if os.path.exists("temp_audio.wav"):
-            os.remove("temp_audio.wav")
+        # Transcribe straight from memory
+        result = await voice_agent.transcribe_audio_bytes(audio_bytes, filename)
         
         if result["success"]:
             return {"text": result["text"]}
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={"error": result.get("error", "Unknown error")}
             )
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error transcribing audio: {str(e)}"}
         )
@@ -183,28 +307,101 @@ async def synthesize_speech(request: Dict[str, Any] = Body(...)):
     text = request.get("text", "")
     
     if not text:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400,
             content={"error": "No text provided"}
         )
         
     try:
         # Convert text to speech
-        result = voice_agent.text_to_speech(text)
+        result = await voice_agent.text_to_speech(text)
         
         if result["success"]:
             return {"audio_base64": result["audio_base64"]}
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={"error": result.get("error", "Unknown error")}
             )
     except Exception as e:
         logger.error(f"Error synthesizing speech: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
+            status_code=500,
+            content={"error": f"Error synthesizing speech: {str(e)}"}
+        )
+
+# Media types for streamed speech formats
+AUDIO_MEDIA_TYPES = {
+    "opus": "audio/ogg",
+    "mp3": "audio/mpeg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+    "pcm": "audio/L16"
+}
+
+async def start_audio_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Wait for the first chunk of synthesized audio, so that a failure can still be
+    answered with an error status before the streaming response starts.
+    
+    Args:
+        chunks: Iterator over audio chunks
+    
+    Returns:
+        Iterator yielding the first chunk followed by the rest
+    """
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise RuntimeError("No audio data synthesized")
+    
+    async def replay():
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+    
+    return replay()
+
+@app.post("/voice/synthesize/stream")
+async def synthesize_speech_stream(request: Dict[str, Any] = Body(...)):
+    """
+    Convert text to speech, streaming audio as it is synthesized.
+    
+    Args:
+        request: Request body with text and an optional audio format (default opus)
+    
+    Returns:
+        Streaming response with raw audio
+    """
+    text = request.get("text", "")
+    response_format = request.get("format", "opus")
+    
+    if not text:
+        return ORJSONResponse(
+            status_code=400,
+            content={"error": "No text provided"}
+        )
+    
+    if response_format not in AUDIO_MEDIA_TYPES:
+        return ORJSONResponse(
+            status_code=400,
+            content={"error": f"Unsupported audio format: {response_format}"}
+        )
+    
+    try:
+        chunks = await start_audio_stream(voice_agent.text_to_speech_stream(text, response_format))
+    except Exception as e:
+        logger.error(f"Error synthesizing speech: {str(e)}")
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error synthesizing speech: {str(e)}"}
         )
+    
+    return StreamingResponse(chunks, media_type=AUDIO_MEDIA_TYPES[response_format])
 
 @app.get("/api/indices")
 async def get_market_indices():
@@ -219,25 +416,59 @@ async def get_market_indices():
         return indices
     except Exception as e:
         logger.error(f"Error getting market indices: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error getting market indices: {str(e)}"}
         )
 
+def select_fields(data: Dict[str, Any], fields: str) -> Dict[str, Any]:
+    """
+    Project a nested dictionary onto a set of fields.
+    
+    Args:
+        data: Dictionary to project
+        fields: Comma-separated field paths (dot notation supported)
+    
+    Returns:
+        Dictionary containing only the requested fields
+    """
+    result = {}
+    
+    for path in fields.split(","):
+        keys = path.strip().split(".")
+        source = data
+        target = result
+        
+        for key in keys[:-1]:
+            if not isinstance(source, dict) or key not in source:
+                break
+            source = source[key]
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and keys[-1] in source:
+                target[keys[-1]] = source[keys[-1]]
+    
+    return result
+
 @app.get("/api/portfolio")
-async def get_portfolio():
+async def get_portfolio(fields: Optional[str] = None):
     """
     Get portfolio data.
     
+    Args:
+        fields: Optional comma-separated list of fields to return (dot notation supported)
+    
     Returns:
         JSON response with portfolio data
     """
     try:
         portfolio = api_agent.get_portfolio_data()
+        if fields:
+            portfolio = select_fields(portfolio, fields)
         return portfolio
     except Exception as e:
         logger.error(f"Error getting portfolio data: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error getting portfolio data: {str(e)}"}
         )
@@ -255,7 +486,7 @@ async def get_sector_performance():
         return sectors
     except Exception as e:
         logger.error(f"Error getting sector performance: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error getting sector performance: {str(e)}"}
         )
@@ -273,11 +504,26 @@ async def get_asia_tech():
         return asia_tech
     except Exception as e:
         logger.error(f"Error getting Asia tech exposure: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error getting Asia tech exposure: {str(e)}"}
         )
 
+async def build_morning_brief() -> tuple:
+    """
+    Generate the morning brief data and its narrative.
+    
+    Returns:
+        Tuple of (brief data, narrative text)
+    """
+    # Generate brief data
+    brief_data = await analysis_agent.agenerate_morning_brief(api_agent)
+    
+    # Generate narrative
+    narrative = await language_agent.agenerate_morning_brief(brief_data)
+    
+    return brief_data, narrative
+
 @app.get("/morning_brief")
 async def get_morning_brief():
     """
@@ -287,14 +533,10 @@ async def get_morning_brief():
         JSON response with morning brief
     """
     try:
-        # Generate brief data
-        brief_data = analysis_agent.generate_morning_brief(api_agent)
-        
-        # Generate narrative
-        narrative = language_agent.generate_morning_brief(brief_data)
+        brief_data, narrative = await build_morning_brief()
         
         # Generate audio
-        audio_result = voice_agent.speak_financial_summary(narrative)
+        audio_result = await voice_agent.speak_financial_summary(narrative)
         
         return {
             "text": narrative,
@@ -303,11 +545,55 @@ async def get_morning_brief():
         }
     except Exception as e:
         logger.error(f"Error generating morning brief: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Error generating morning brief: {str(e)}"}
         )
 
+@app.get("/morning_brief/text")
+async def get_morning_brief_text():
+    """
+    Get the morning market brief without audio.
+    
+    Returns:
+        JSON response with the brief narrative and data
+    """
+    try:
+        brief_data, narrative = await build_morning_brief()
+        
+        return {
+            "text": narrative,
+            "data": brief_data
+        }
+    except Exception as e:
+        logger.error(f"Error generating morning brief: {str(e)}")
+        return ORJSONResponse(
+            status_code=500,
+            content={"error": f"Error generating morning brief: {str(e)}"}
+        )
+
+@app.get("/morning_brief/audio")
+async def get_morning_brief_audio():
+    """
+    Get the spoken morning market brief as raw streamed audio.
+    
+    Returns:
+        Streaming MP3 response
+    """
+    try:
+        # Narrative generation is cached, so within the cache TTL this matches /morning_brief/text
+        _, narrative = await build_morning_brief()
+        
+        chunks = await start_audio_stream(voice_agent.speak_financial_summary_stream(narrative, "mp3"))
+        
+        return StreamingResponse(chunks, media_type=AUDIO_MEDIA_TYPES["mp3"])
+    except Exception as e:
+        logger.error(f"Error generating morning brief audio: {str(e)}")
+        return ORJSONResponse(
+            status_code=500,
+            content={"error": f"Error generating morning brief audio: {str(e)}"}
+        )
+
 def start():
     """Start the FastAPI server."""
     uvicorn.run("orchestrator.main:app", host="0.0.0.0", port=8000, reload=False)
@@ -1,16 +1,92 @@
 """
-Agent Router for the Finance Assistant.
+Router for the Finance Assistant.
 Routes queries to the appropriate agents based on intent.
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+import re
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Any, AsyncIterator, Callable, Tuple
+import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# TTL in seconds for memoized agent fetches, by kind of data
+FETCH_CACHE_TTLS = {
+    "stock_data": 30,
+    "stock_news": 300,
+    "indices": 30,
+    "sectors": 30,
+    "indicators": 30
+}
+FETCH_CACHE_SIZE = 1024
+
+# Well-known company names mapped to tickers, for queries that name a company
+_COMMON_STOCKS = MappingProxyType({
+    "apple": "AAPL",
+    "microsoft": "MSFT",
+    "google": "GOOGL",
+    "amazon": "AMZN",
+    "tesla": "TSLA",
+    "facebook": "META",
+    "nvidia": "NVDA",
+    "tsmc": "TSM",
+    "samsung": "005930.KS",
+    "alibaba": "BABA",
+    "tencent": "0700.HK"
+})
+_COMMON_STOCKS_RE = re.compile(r"\b(" + "|".join(map(re.escape, _COMMON_STOCKS)) + r")\b", re.IGNORECASE)
+
+# Uppercase words of up to five letters are taken as tickers, except common words and acronyms
+_TICKER_RE = re.compile(r"\b[A-Z]{1,5}\b")
+_TICKER_STOPWORDS = frozenset({
+    "A", "I", "THE", "IS", "OF", "AND", "OR", "TO", "IN", "ON", "AT", "FOR", "VS", "OK",
+    "US", "USA", "UK", "EU", "CEO", "CFO", "ETF", "EPS", "IPO", "GDP", "CPI", "AI", "IT", "PE"
+})
+
+# Entity values recognized as regions and sectors in risk queries
+_REGIONS = frozenset({"asia", "europe", "north america", "emerging markets"})
+_SECTORS = frozenset({"technology", "finance", "healthcare", "consumer", "energy"})
+
+# High-confidence intents whose simple lookups are answered from data without the LLM
+FAST_PATH_INTENTS = frozenset({"stock_specific", "economic_data"})
+FAST_PATH_MIN_CONFIDENCE = 0.9
+
+# Bars kept per ticker for stock queries: the latest close and the one before it
+PRICE_CHANGE_BARS = 2
+
+# Defaults for risk queries that name no region, and tech queries that name no sector
+DEFAULT_REGION = "Asia"
+DEFAULT_TECH_SECTOR = "Technology"
+
+def _price_changes(frames: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the latest close and its percent change from the previous close for several price histories.
+    
+    Args:
+        frames: Non-empty price history DataFrames with a Close column
+        
+    Returns:
+        Tuple of (latest prices, percent changes) arrays aligned with frames;
+        a history with a single bar counts as unchanged
+    """
+    tails = [frame['Close'].to_numpy()[-2:] for frame in frames]
+    closes = np.array([(tail[0], tail[-1]) for tail in tails], dtype=np.float64).reshape(-1, 2)
+    
+    prev, latest = closes[:, 0], closes[:, 1]
+    return latest, (latest - prev) / prev * 100
+
+def _to_json(data: Any) -> str:
+    """Serialize agent data compactly for the LLM context (NumPy values natively, anything else as str)."""
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY, default=str).decode()
+
 class AgentRouter:
     """
-    Router that directs queries to the appropriate agents based on intent analysis.
+    Routes queries to appropriate agents based on the query intent.
     """
     
     def __init__(self, api_agent, scraping_agent, retriever_agent, analysis_agent, language_agent, voice_agent):
@@ -32,319 +108,359 @@ class AgentRouter:
         self.language_agent = language_agent
         self.voice_agent = voice_agent
         
-        # Define confidence threshold for retrieval
-        self.retrieval_confidence_threshold = 0.6
+        # Memoized agent fetches: key -> (monotonic expiry, value), least recently used first
+        self._fetch_cache: OrderedDict = OrderedDict()
+        # Fetches in progress by cache key, so concurrent misses share one upstream call
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        
+        # Intent handlers; anything else falls back to _handle_default
+        self._handlers = {
+            "market_info": self._handle_market_info,
+            "portfolio_analysis": self._handle_portfolio_analysis,
+            "risk_assessment": self._handle_risk_assessment,
+            "stock_specific": self._handle_stock_specific,
+            "economic_data": self._handle_economic_data
+        }
     
-    def route_query(self, query: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+    async def route_query(self, query: str, intent: Dict[str, Any]) -> Dict[str, Any]:
         """
         Route a query to the appropriate agents based on intent.
         
         Args:
             query: User query
-            intent: Intent analysis from language agent
+            intent: Query intent analysis
             
         Returns:
             Response dictionary
         """
-        try:
-            # Extract intent information
-            primary_intent = intent.get("primary_intent", "unknown")
-            entities = intent.get("entities", [])
-            confidence = intent.get("confidence", 0.0)
-            
-            logger.info(f"Routing query with intent: {primary_intent}, confidence: {confidence}")
-            
-            # Handle different intents
-            if primary_intent == "market_info":
-                return self._handle_market_info(query, entities)
-            elif primary_intent == "portfolio_analysis":
-                return self._handle_portfolio_analysis(query, entities)
-            elif primary_intent == "risk_assessment":
-                return self._handle_risk_assessment(query, entities)
-            elif primary_intent == "stock_specific":
-                return self._handle_stock_specific(query, entities)
-            elif primary_intent == "economic_data":
-                return self._handle_economic_data(query, entities)
-            else:
-                # Default to retrieval-based response
-                return self._fallback_retrieval(query, confidence)
-                
-        except Exception as e:
-            logger.error(f"Error routing query: {str(e)}")
-            
-            # Fallback to simple language model response
-            response = self.language_agent.generate_response(query)
-            
-            return {
-                "text": response,
-                "source": "language_agent",
-                "error": str(e)
-            }
+        result = await self._dispatch(query, intent)
+        
+        # Generate the response from the handler's context unless it already answered
+        if "text" not in result:
+            result["text"] = await self.language_agent.agenerate_response(query, result.pop("context"))
+        
+        return result
     
-    def _handle_market_info(self, query: str, entities: List[str]) -> Dict[str, Any]:
+    async def route_query_stream(self, query: str, intent: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
         """
-        Handle market information queries.
+        Route a query like route_query, emitting the response as it is produced.
         
         Args:
             query: User query
-            entities: Entities from intent analysis
+            intent: Query intent analysis
             
         Returns:
-            Response dictionary
+            Iterator over (event, payload) pairs: one ("data", data) pair as soon as the
+            agents' data is available, then ("token", text) pairs as the response is generated
         """
-        try:
-            # Get relevant data based on entities
-            data = {}
-            
-            # Check for indices
-            if any(entity in ["indices", "index", "market"] for entity in entities):
-                data["indices"] = self.api_agent.get_market_indices()
-                
-            # Check for sectors
-            if any("""
-Router for the Finance Assistant.
-Routes queries to the appropriate agents based on intent.
-"""
-
-import logging
-import json
-from typing import Dict, List, Any, Optional, Union
-
-logger = logging.getLogger(__name__)
-
-class AgentRouter:
-    """
-    Routes queries to appropriate agents based on the query intent.
-    """
-    
-    def __init__(self, api_agent, scraping_agent, retriever_agent, analysis_agent, language_agent, voice_agent):
-        """
-        Initialize the agent router.
+        result = await self._dispatch(query, intent)
+        yield "data", result["data"]
         
-        Args:
-            api_agent: API agent instance
-            scraping_agent: Scraping agent instance
-            retriever_agent: Retriever agent instance
-            analysis_agent: Analysis agent instance
-            language_agent: Language agent instance
-            voice_agent: Voice agent instance
-        """
-        self.api_agent = api_agent
-        self.scraping_agent = scraping_agent
-        self.retriever_agent = retriever_agent
-        self.analysis_agent = analysis_agent
-        self.language_agent = language_agent
-        self.voice_agent = voice_agent
+        if "text" in result:
+            yield "token", result["text"]
+            return
+        
+        async for delta in self.language_agent.agenerate_response_stream(query, result["context"]):
+            yield "token", delta
     
-    def route_query(self, query: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+    async def _dispatch(self, query: str, intent: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Route a query to the appropriate agents based on intent.
+        Run the handler for a query's intent.
         
         Args:
             query: User query
             intent: Query intent analysis
             
         Returns:
-            Response dictionary
+            Handler result
         """
         primary_intent = intent.get("primary_intent", "unknown")
         entities = intent.get("entities", [])
+        confidence = intent.get("confidence", 0.0)
         
-        logger.info(f"Routing query with primary intent: {primary_intent}")
+        logger.info(f"Routing query with primary intent: {primary_intent}, confidence: {confidence}")
         
-        # Get relevant context from retriever agent
-        context = self.retriever_agent.retrieve(query, k=5)
+        # Process based on intent; each handler retrieves context alongside its own data
+        handler = self._handlers.get(primary_intent, self._handle_default)
+        if primary_intent in FAST_PATH_INTENTS and confidence > FAST_PATH_MIN_CONFIDENCE:
+            return await handler(query, entities, use_llm=False)
+        return await handler(query, entities)
+    
+    async def _cached_fetch(self, kind: str, fn: Callable, *args) -> Any:
+        """
+        Call a blocking agent method in a worker thread, memoizing the result.
+        Concurrent calls with the same key while a fetch is in progress await that fetch.
         
-        # Process based on intent
-        if primary_intent == "market_info":
-            return self._handle_market_info(query, entities, context)
-            
-        elif primary_intent == "portfolio_analysis":
-            return self._handle_portfolio_analysis(query, entities, context)
-            
-        elif primary_intent == "risk_assessment":
-            return self._handle_risk_assessment(query, entities, context)
+        Args:
+            kind: Kind of data, selecting the TTL from FETCH_CACHE_TTLS
+            fn: Agent method to call
+            *args: Positional arguments for the method (part of the cache key)
             
-        elif primary_intent == "stock_specific":
-            return self._handle_stock_specific(query, entities, context)
+        Returns:
+            Cached or freshly fetched value
+        """
+        key = (kind, *args)
+        hit = self._fetch_cache.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            self._fetch_cache.move_to_end(key)
+            return hit[1]
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, kind, fn, args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shielded, so a caller that goes away does not cancel the fetch for the others
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, key: Tuple, kind: str, fn: Callable, args: Tuple) -> Any:
+        """
+        Run a blocking agent method in a worker thread and memoize its result.
+        
+        Args:
+            key: Cache key
+            kind: Kind of data, selecting the TTL from FETCH_CACHE_TTLS
+            fn: Agent method to call
+            args: Positional arguments for the method
             
-        elif primary_intent == "economic_data":
-            return self._handle_economic_data(query, entities, context)
+        Returns:
+            Fetched value
+        """
+        value = await asyncio.to_thread(fn, *args)
+        
+        self._fetch_cache[key] = (time.monotonic() + FETCH_CACHE_TTLS[kind], value)
+        self._fetch_cache.move_to_end(key)
+        if len(self._fetch_cache) > FETCH_CACHE_SIZE:
+            self._fetch_cache.popitem(last=False)
+        
+        return value
+    
+    async def _retrieve(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Get relevant context from the retriever agent without blocking the event loop.
+        
+        Args:
+            query: User query
             
-        else:
-            # Default handling for unknown intents
-            return self._handle_default(query, context)
+        Returns:
+            List of context documents
+        """
+        return await asyncio.to_thread(self.retriever_agent.retrieve, query, k=5)
     
-    def _handle_market_info(self, query: str, entities: List[str], context: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _handle_market_info(self, query: str, entities: List[str]) -> Dict[str, Any]:
         """
         Handle market information queries.
         
         Args:
             query: User query
             entities: Entities in the query
-            context: Context from retriever
             
         Returns:
-            Response dictionary
+            Dictionary with the response data, and either the context to answer from or the answer text
         """
-        # Get market indices
-        indices = self.api_agent.get_market_indices()
-        
-        # Get sector performance
-        sectors = self.api_agent.get_sector_performance()
+        # Get market indices, sector performance and context concurrently
+        indices, sectors, context = await asyncio.gather(
+            self._cached_fetch("indices", self.api_agent.get_market_indices),
+            self._cached_fetch("sectors", self.api_agent.get_sector_performance),
+            self._retrieve(query)
+        )
         
         # Add this data to the context
         context.append({
-            "content": f"Current market indices: {json.dumps(indices, indent=2)}",
+            "content": f"Current market indices: {_to_json(indices)}",
             "metadata": {"type": "market_indices"}
         })
         
         context.append({
-            "content": f"Current sector performance: {json.dumps(sectors, indent=2)}",
+            "content": f"Current sector performance: {_to_json(sectors)}",
             "metadata": {"type": "sector_performance"}
         })
         
-        # Generate response using language agent
-        text = self.language_agent.generate_response(query, context)
-        
         return {
-            "text": text,
+            "context": context,
             "data": {
                 "indices": indices,
                 "sectors": sectors
             }
         }
     
-    def _handle_portfolio_analysis(self, query: str, entities: List[str], context: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _handle_portfolio_analysis(self, query: str, entities: List[str]) -> Dict[str, Any]:
         """
         Handle portfolio analysis queries.
         
         Args:
             query: User query
             entities: Entities in the query
-            context: Context from retriever
             
         Returns:
-            Response dictionary
+            Dictionary with the response data, and either the context to answer from or the answer text
         """
-        # Get portfolio data
-        portfolio = self.api_agent.get_portfolio_data()
+        # Get portfolio data and context concurrently
+        portfolio, context = await asyncio.gather(
+            asyncio.to_thread(self.api_agent.get_portfolio_data),
+            self._retrieve(query)
+        )
         
         # Add to context
         context.append({
-            "content": f"Portfolio data: {json.dumps(portfolio, indent=2)}",
+            "content": f"Portfolio data: {_to_json(portfolio)}",
             "metadata": {"type": "portfolio_data"}
         })
         
-        # Generate response
-        text = self.language_agent.generate_response(query, context)
-        
         return {
-            "text": text,
+            "context": context,
             "data": portfolio
         }
     
-    def _handle_risk_assessment(self, query: str, entities: List[str], context: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _handle_risk_assessment(self, query: str, entities: List[str]) -> Dict[str, Any]:
         """
         Handle risk assessment queries.
         
         Args:
             query: User query
             entities: Entities in the query
-            context: Context from retriever
             
         Returns:
-            Response dictionary
+            Dictionary with the response data, and either the context to answer from or the answer text
         """
         # Extract region and sector from entities
         region = None
         sector = None
         
         for entity in entities:
-            if entity.lower() in ["asia", "europe", "north america", "emerging markets"]:
+            entity_lower = entity.lower()
+            if entity_lower in _REGIONS:
                 region = entity
-            elif entity.lower() in ["technology", "finance", "healthcare", "consumer", "energy"]:
+            elif entity_lower in _SECTORS:
                 sector = entity
         
         # Default to Asia/Technology if not specified
+        query_lower = query.lower()
+        tech_query = "tech" in query_lower
         if not region:
-            region = "Asia"
-        if not sector and "tech" in query.lower():
-            sector = "Technology"
+            region = DEFAULT_REGION
+        if not sector and tech_query:
+            sector = DEFAULT_TECH_SECTOR
         
-        # Get risk exposure
-        exposure = self.analysis_agent.analyze_risk_exposure(self.api_agent, region, sector)
+        # Get risk exposure, context and (for Asia tech queries) the Asia tech exposure concurrently
+        asia_tech_query = tech_query and "asia" in query_lower
+        calls = [
+            asyncio.to_thread(self.analysis_agent.analyze_risk_exposure, self.api_agent, region, sector),
+            self._retrieve(query)
+        ]
+        if asia_tech_query:
+            calls.append(asyncio.to_thread(self.api_agent.get_asia_tech_exposure))
+        
+        exposure, context, *rest = await asyncio.gather(*calls)
         
         # Add to context
         context.append({
-            "content": f"Risk exposure for {region}/{sector if sector else 'all sectors'}: {json.dumps(exposure, indent=2)}",
+            "content": f"Risk exposure for {region}/{sector if sector else 'all sectors'}: {_to_json(exposure)}",
             "metadata": {"type": "risk_exposure"}
         })
         
         # If the query is specifically about Asia tech stocks
-        if "asia" in query.lower() and "tech" in query.lower():
-            asia_tech = self.api_agent.get_asia_tech_exposure()
+        if asia_tech_query:
+            asia_tech = rest[0]
             context.append({
-                "content": f"Asia tech exposure: {json.dumps(asia_tech, indent=2)}",
+                "content": f"Asia tech exposure: {_to_json(asia_tech)}",
                 "metadata": {"type": "asia_tech_exposure"}
             })
         
-        # Generate response
-        text = self.language_agent.generate_response(query, context)
-        
         return {
-            "text": text,
+            "context": context,
             "data": exposure
         }
     
-    def _handle_stock_specific(self, query: str, entities: List[str], context: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _handle_stock_specific(self, query: str, entities: List[str], use_llm: bool = True) -> Dict[str, Any]:
         """
         Handle stock-specific queries.
         
         Args:
             query: User query
             entities: Entities in the query
-            context: Context from retriever
+            use_llm: If False, a price lookup for a single ticker is answered directly from the quote
             
         Returns:
-            Response dictionary
+            Dictionary with the response data, and either the context to answer from or the answer text
         """
-        # Extract stock tickers from entities
+        # Extract stock tickers from the entities and from the query itself, which
+        # catches tickers the intent analysis missed
         tickers = []
-        for entity in entities:
-            # Simple heuristic for identifying tickers
-            if entity.isupper() and len(entity) <= 5:
-                tickers.append(entity)
-        
-        # If no tickers found, extract from common stocks mentioned in query
-        common_stocks = {
-            "apple": "AAPL",
-            "microsoft": "MSFT",
-            "google": "GOOGL",
-            "amazon": "AMZN",
-            "tesla": "TSLA",
-            "facebook": "META",
-            "nvidia": "NVDA",
-            "tsmc": "TSM",
-            "samsung": "005930.KS",
-            "alibaba": "BABA",
-            "tencent": "0700.HK"
-        }
-        
-        query_lower = query.lower()
-        for name, ticker in common_stocks.items():
-            if name in query_lower and ticker not in tickers:
+        for candidate in entities + _TICKER_RE.findall(query):
+            if _TICKER_RE.fullmatch(candidate) and candidate not in _TICKER_STOPWORDS and candidate not in tickers:
+                tickers.append(candidate)
+        
+        # Also pick up common stocks mentioned by company name, in one scan of the query
+        for match in _COMMON_STOCKS_RE.finditer(query):
+            ticker = _COMMON_STOCKS[match.group(1).lower()]
+            if ticker not in tickers:
                 tickers.append(ticker)
         
+        # Plain price lookups need neither context, news nor the LLM
+        if not use_llm and len(tickers) == 1 and "price" in query.lower():
+            ticker = tickers[0]
+            try:
+                data = await self._cached_fetch("stock_data", self.api_agent.get_stock_data, ticker, "1d", "1h", PRICE_CHANGE_BARS)
+                if not data.empty:
+                    latest, pct = _price_changes([data])
+                    latest_price, pct_change = float(latest[0]), float(pct[0])
+                    
+                    return {
+                        "text": f"{ticker} is trading at ${latest_price:.2f} ({pct_change:+.2f}%)",
+                        "data": {
+                            "stocks": {ticker: {"price": latest_price, "change_percent": pct_change}}
+                        }
+                    }
+            except Exception as e:
+                logger.error(f"Error getting data for {ticker}: {str(e)}")
+        
+        # Context for the query and for each ticker, retrieved in one batch
+        queries = [query] + [f"{ticker} news" for ticker in tickers]
+        retrieval = asyncio.to_thread(self.retriever_agent.retrieve_batch, queries, k=5)
+        
+        # Fetch price data and news for every ticker, plus the context, concurrently;
+        # failures come back as exceptions so one ticker cannot sink the others
+        calls = []
+        for ticker in tickers:
+            calls.append(self._cached_fetch("stock_data", self.api_agent.get_stock_data, ticker, "1d", "1h", PRICE_CHANGE_BARS))
+            calls.append(self._cached_fetch("stock_news", self.api_agent.get_stock_news, ticker))
+        contexts, *results = await asyncio.gather(retrieval, *calls, return_exceptions=True)
+        if isinstance(contexts, BaseException):
+            raise contexts
+        
+        # Query context first, then the top ticker documents not already included
+        context = contexts[0]
+        seen = {doc["content"] for doc in context}
+        for ticker_context in contexts[1:]:
+            for doc in ticker_context[:3]:
+                if doc["content"] not in seen:
+                    seen.add(doc["content"])
+                    context.append(doc)
+        
+        # Price changes for every ticker with data, in one vectorized pass
+        frames = {}
+        for ticker, data in zip(tickers, results[0::2]):
+            if isinstance(data, BaseException):
+                logger.error(f"Error getting data for {ticker}: {str(data)}")
+            elif not data.empty:
+                frames[ticker] = data
+        
+        quotes = {}
+        if frames:
+            latest, pct = _price_changes(list(frames.values()))
+            quotes = dict(zip(frames, zip(latest.tolist(), pct.tolist())))
+        
         # Get stock data for each ticker
         stock_data = {}
-        for ticker in tickers:
+        for ticker, data, news in zip(tickers, results[0::2], results[1::2]):
+            if isinstance(data, BaseException):
+                continue
+            
             try:
-                data = self.api_agent.get_stock_data(ticker)
-                if not data.empty:
-                    latest_price = data['Close'].iloc[-1]
-                    prev_price = data['Close'].iloc[-2] if len(data) > 1 else data['Close'].iloc[-1]
-                    pct_change = ((latest_price - prev_price) / prev_price) * 100
+                if ticker in quotes:
+                    latest_price, pct_change = quotes[ticker]
                     
                     stock_data[ticker] = {
                         "price": latest_price,
@@ -357,8 +473,9 @@ class AgentRouter:
                         "metadata": {"type": "stock_data", "ticker": ticker}
                     })
                     
-                # Get news for the ticker
-                news = self.api_agent.get_stock_news(ticker)
+                # Add news for the ticker
+                if isinstance(news, BaseException):
+                    raise news
                 if news:
                     news_text = f"Recent news for {ticker}:\n"
                     for item in news[:3]:  # Limit to 3 news items
@@ -371,62 +488,71 @@ class AgentRouter:
             except Exception as e:
                 logger.error(f"Error getting data for {ticker}: {str(e)}")
         
-        # Generate response
-        text = self.language_agent.generate_response(query, context)
-        
         return {
-            "text": text,
+            "context": context,
             "data": {
                 "stocks": stock_data
             }
         }
     
-    def _handle_economic_data(self, query: str, entities: List[str], context: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _handle_economic_data(self, query: str, entities: List[str], use_llm: bool = True) -> Dict[str, Any]:
         """
         Handle economic data queries.
         
         Args:
             query: User query
             entities: Entities in the query
-            context: Context from retriever
+            use_llm: If False, a query naming exactly one indicator is answered directly with its value
             
         Returns:
-            Response dictionary
+            Dictionary with the response data, and either the context to answer from or the answer text
         """
-        # Get economic indicators
-        indicators = self.api_agent.get_economic_indicators()
+        if not use_llm:
+            indicators = await self._cached_fetch("indicators", self.api_agent.get_economic_indicators)
+            query_lower = query.lower()
+            named = [name for name in indicators if name.lower() in query_lower]
+            if len(named) == 1:
+                return {
+                    "text": f"{named[0]}: {indicators[named[0]]}",
+                    "data": {
+                        "indicators": indicators
+                    }
+                }
+        
+        # Get economic indicators and context concurrently
+        indicators, context = await asyncio.gather(
+            self._cached_fetch("indicators", self.api_agent.get_economic_indicators),
+            self._retrieve(query)
+        )
         
         # Add to context
         context.append({
-            "content": f"Economic indicators: {json.dumps(indicators, indent=2)}",
+            "content": f"Economic indicators: {_to_json(indicators)}",
             "metadata": {"type": "economic_indicators"}
         })
         
-        # Generate response
-        text = self.language_agent.generate_response(query, context)
-        
         return {
-            "text": text,
+            "context": context,
             "data": {
                 "indicators": indicators
             }
         }
     
-    def _handle_default(self, query: str, context: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _handle_default(self, query: str, entities: List[str]) -> Dict[str, Any]:
         """
         Handle default/unknown queries.
         
         Args:
             query: User query
-            context: Context from retriever
+            entities: Entities in the query
             
         Returns:
-            Response dictionary
+            Dictionary with the response data, and either the context to answer from or the answer text
         """
-        # Use the retriever to get context, then generate response
-        text = self.language_agent.generate_response(query, context)
+        # Use the retriever to get context for the response
+        context = await self._retrieve(query)
         
         return {
-            "text": text,
+            "context": context,
             "data": {}
         }
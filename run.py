@@ -4,28 +4,36 @@ Starts the FastAPI orchestrator and Streamlit frontend.
 """
 
 import os
+import atexit
 import subprocess
 import threading
 import time
 import logging
 import signal
+import socket
 import sys
+from typing import Optional
 from utils.logger import setup_logger
 
 # Setup logging
 logger = setup_logger("run", log_level="INFO", log_file="logs/app.log")
 
+# Seconds Streamlit gets to exit after SIGTERM before it is killed
+SHUTDOWN_TIMEOUT = 5.0
+
+# Streamlit process, which leads its own process group
+_streamlit: Optional[subprocess.Popen] = None
+
 def start_orchestrator():
     """Start the FastAPI orchestrator service."""
     logger.info("Starting orchestrator service...")
     try:
-        # Run the FastAPI server
-        subprocess.run([
-            "python", "-m", "uvicorn", 
-            "orchestrator.main:app", 
-            "--host", "0.0.0.0", 
-            "--port", "8000"
-        ])
+        # Run the FastAPI server in this process rather than a second interpreter;
+        # uvicorn leaves signal handling to the main thread
+        import uvicorn
+        from orchestrator.main import app
+        
+        uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
     except Exception as e:
         logger.error(f"Error starting orchestrator: {str(e)}")
         sys.exit(1)
@@ -33,20 +41,64 @@ def start_orchestrator():
 def start_streamlit():
     """Start the Streamlit frontend."""
     logger.info("Starting Streamlit frontend...")
+    global _streamlit
     try:
-        # Run the Streamlit app
-        subprocess.run([
+        # Run the Streamlit app in a new session, so shutdown can signal all of its processes
+        _streamlit = subprocess.Popen([
             "Streamlit", "run", 
             "app.py",
             "--server.port", "5000",
             "--server.address", "0.0.0.0"
-        ])
+        ], start_new_session=True)
+        try:
+            _streamlit.wait()
+        finally:
+            stop_streamlit()
     except Exception as e:
         logger.error(f"Error starting Streamlit: {str(e)}")
         sys.exit(1)
 
+def stop_streamlit():
+    """Terminate the Streamlit process group, killing it if it does not exit in time."""
+    if _streamlit is None or _streamlit.poll() is not None:
+        return
+    
+    try:
+        os.killpg(_streamlit.pid, signal.SIGTERM)
+        _streamlit.wait(timeout=SHUTDOWN_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        os.killpg(_streamlit.pid, signal.SIGKILL)
+        _streamlit.wait()
+    except ProcessLookupError:
+        pass
+
+# Also stop Streamlit on exit paths that bypass start_streamlit's cleanup
+atexit.register(stop_streamlit)
+
+def wait_ready(host: str, port: int, timeout: float = 30.0, interval: float = 0.05) -> bool:
+    """
+    Wait until a TCP port accepts connections.
+    
+    Args:
+        host: Host to connect to
+        port: Port to connect to
+        timeout: Maximum time to wait in seconds
+        interval: Delay between connection attempts in seconds
+    
+    Returns:
+        True if the port accepted a connection before the timeout
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
+
 def handle_exit(signum, frame):
-    """Handle exit signals."""
+    """Handle exit signals (start_streamlit stops Streamlit as the exit unwinds)."""
     logger.info("Shutting down Finance Assistant...")
     sys.exit(0)
 
@@ -57,21 +109,20 @@ def main():
     signal.signal(signal.SIGTERM, handle_exit)
     
     # Create logs directory if it doesn't exist
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
+    os.makedirs("logs", exist_ok=True)
     
     # Create data directory if it doesn't exist
-    if not os.path.exists("data"):
-        os.makedirs("data")
+    os.makedirs("data", exist_ok=True)
     
     # Start orchestrator in a separate thread
     orchestrator_thread = threading.Thread(target=start_orchestrator)
     orchestrator_thread.daemon = True
     orchestrator_thread.start()
     
-    # Wait for orchestrator to start
+    # Wait for orchestrator to start accepting connections
     logger.info("Waiting for orchestrator to start...")
-    time.sleep(5)
+    if not wait_ready("127.0.0.1", 8000):
+        logger.warning("Orchestrator not ready after 30 seconds, starting Streamlit anyway")
     
     # Start Streamlit
     start_streamlit()
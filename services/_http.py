@@ -0,0 +1,241 @@
+"""
+Shared HTTP client for the Finance Assistant services.
+All service classes talking to the same orchestrator share one connection pool.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import importlib.util
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import httpx
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package; fall back to pooled HTTP/1.1 without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Connection pool limits for each orchestrator client
+MAX_KEEPALIVE_CONNECTIONS = 64
+MAX_CONNECTIONS = 128
+
+# Connections opened ahead of traffic by warm_client
+WARM_CONNECTIONS = 4
+
+# Timeouts in seconds: fail fast when the orchestrator is unreachable or the pool is exhausted,
+# and bound how long a stalled response can hold a connection
+CONNECT_TIMEOUT = 2.0
+POOL_TIMEOUT = 5.0
+REQUEST_TIMEOUT = httpx.Timeout(connect=CONNECT_TIMEOUT, read=15.0, write=10.0, pool=POOL_TIMEOUT)
+
+# Retries for transport errors (connection refused, reset, timeouts), with jittered exponential backoff
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.1
+RETRY_BACKOFF_MAX = 2.0
+
+# Transport errors raised before a request reaches the server, the only ones retried
+# for requests that are not idempotent
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Server error statuses retried for idempotent requests (the orchestrator reports upstream failures as 500)
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+# Consecutive failed requests before an orchestrator is short-circuited, and for how long
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_TIMEOUT = 30.0
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while an orchestrator's circuit is open."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    Once open, calls fail fast until the reset timeout passes; the next call is then let
+    through as a trial, closing the circuit on success or reopening it on failure.
+    """
+    
+    def __init__(self, fail_max: int = BREAKER_FAIL_MAX, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        """
+        Initialize the circuit breaker.
+        
+        Args:
+            fail_max: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+    
+    def check(self) -> None:
+        """Raise CircuitOpenError if calls are currently short-circuited."""
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            raise CircuitOpenError("Circuit open after repeated connection failures")
+        # Half-open: let this call through, and keep the others out until it resolves
+        self.opened_at = time.monotonic()
+    
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self.opened_at = None
+    
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit once the limit is reached."""
+        self.failures += 1
+        if self.failures >= self.fail_max:
+            self.opened_at = time.monotonic()
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_client(base_url: str) -> httpx.AsyncClient:
+    """
+    Get the shared client for an orchestrator, creating it on first use.
+    
+    Args:
+        base_url: Base URL for the orchestrator service
+    
+    Returns:
+        Keep-alive HTTP client for the base URL
+    """
+    client = _clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=REQUEST_TIMEOUT,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=MAX_CONNECTIONS
+            )
+        )
+        _clients[base_url] = client
+    return client
+
+def _file_positions(files: Any) -> Optional[List[Tuple[Any, int]]]:
+    """
+    Get the current positions of the file objects in a files argument.
+    
+    Args:
+        files: files argument of the request (mapping or list of (field, value) pairs)
+    
+    Returns:
+        List of (file object, position) pairs, or None if a file cannot be rewound
+    """
+    values = files.values() if isinstance(files, Mapping) else (value for _, value in files)
+    positions = []
+    
+    for value in values:
+        file = value[1] if isinstance(value, tuple) else value
+        if isinstance(file, (bytes, str)):
+            continue
+        
+        seekable = getattr(file, "seekable", None)
+        if seekable is None or not seekable():
+            return None
+        positions.append((file, file.tell()))
+    
+    return positions
+
+async def send(client: httpx.AsyncClient, method: str, url: str, retry_server_errors: Optional[bool] = None, **kwargs) -> httpx.Response:
+    """
+    Send a request, retrying failed attempts and failing fast while the orchestrator's circuit is open.
+    
+    Requests that may be repeated safely retry any transport error; the others only retry
+    CONNECT_ERRORS, which occur before the server has seen the request. File uploads are
+    rewound before each retry and sent only once if they are not seekable.
+    
+    Args:
+        client: Client from get_client
+        method: HTTP method
+        url: Path relative to the client's base URL
+        retry_server_errors: Whether the request is idempotent, so that RETRY_STATUSES responses
+            and all transport errors are retried (defaults to True for GET, False otherwise)
+        **kwargs: Additional request arguments (json, files, params)
+    
+    Returns:
+        HTTP response (the last one, if server errors were retried)
+    """
+    if retry_server_errors is None:
+        retry_server_errors = method == "GET"
+    
+    attempts = RETRY_ATTEMPTS
+    positions = []
+    if kwargs.get("files"):
+        positions = _file_positions(kwargs["files"])
+        if positions is None:
+            attempts = 1
+            positions = []
+    
+    if "json" in kwargs:
+        # Encode JSON bodies with orjson rather than the stdlib encoder httpx uses
+        kwargs["content"] = orjson.dumps(kwargs.pop("json"))
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Type": "application/json"}
+    
+    breaker = _breakers.setdefault(str(client.base_url), CircuitBreaker())
+    breaker.check()
+    
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        
+        if attempt:
+            for file, position in positions:
+                file.seek(position)
+        
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if last_attempt or not (retry_server_errors or isinstance(e, CONNECT_ERRORS)):
+                breaker.record_failure()
+                raise
+            error = str(e)
+        else:
+            # The orchestrator answered, so the circuit stays closed even on a server error
+            breaker.record_success()
+            if last_attempt or not retry_server_errors or response.status_code not in RETRY_STATUSES:
+                return response
+            error = f"HTTP {response.status_code}"
+        
+        delay = min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX)
+        logger.warning(f"Retrying {method} {url} in {delay:.2f}s after error: {error}")
+        await asyncio.sleep(delay + random.uniform(0, delay))
+
+async def warm_client(base_url: str, connections: int = WARM_CONNECTIONS) -> int:
+    """
+    Open pooled connections to an orchestrator before real traffic arrives, e.g. on application startup.
+    
+    Args:
+        base_url: Base URL for the orchestrator service
+        connections: Number of concurrent requests, and so keep-alive connections, to open
+    
+    Returns:
+        Number of connections that answered
+    """
+    client = get_client(base_url)
+    connections = min(connections, MAX_KEEPALIVE_CONNECTIONS)
+    
+    # Any response opens the connection, so the status does not matter; nor do failures
+    results = await asyncio.gather(
+        *(client.request("HEAD", "/") for _ in range(connections)),
+        return_exceptions=True
+    )
+    
+    warmed = sum(isinstance(result, httpx.Response) for result in results)
+    if warmed < connections:
+        logger.warning(f"Warmed {warmed} of {connections} connections to {base_url}")
+    return warmed
+
+async def close_clients() -> None:
+    """Close all shared clients and their pooled connections, e.g. on application shutdown."""
+    clients = list(_clients.values())
+    _clients.clear()
+    
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.error(f"Error closing HTTP client: {str(e)}")
@@ -4,26 +4,19 @@ Provides access to the API agent functionality.
 """
 
 import os
-import requests
 import logging
 from typing import Dict, List, Any, Optional
-from fastapi import HTTPException
+
+from services.base_service import BaseService
 
 logger = logging.getLogger(__name__)
 
-class APIService:
+class APIService(BaseService):
     """
     Service class for accessing API agent functionality.
     """
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        """
-        Initialize the API service.
-        
-        Args:
-            base_url: Base URL for the orchestrator service
-        """
-        self.base_url = base_url
+    service_name = "API service"
     
     async def get_market_indices(self) -> Dict[str, Any]:
         """
@@ -32,18 +25,7 @@ class APIService:
         Returns:
             Dictionary with market indices
         """
-        try:
-            url = f"{self.base_url}/api/indices"
-            response = requests.get(url)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Error getting market indices: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting market indices")
-        except Exception as e:
-            logger.error(f"Error connecting to API service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to API service: {str(e)}")
+        return await self._get("/api/indices", "Error getting market indices")
     
     async def get_portfolio(self) -> Dict[str, Any]:
         """
@@ -52,18 +34,7 @@ class APIService:
         Returns:
             Dictionary with portfolio data
         """
-        try:
-            url = f"{self.base_url}/api/portfolio"
-            response = requests.get(url)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Error getting portfolio data: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting portfolio data")
-        except Exception as e:
-            logger.error(f"Error connecting to API service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to API service: {str(e)}")
+        return await self._get("/api/portfolio", "Error getting portfolio data")
     
     async def get_sector_performance(self) -> Dict[str, float]:
         """
@@ -72,18 +43,7 @@ class APIService:
         Returns:
             Dictionary with sector performance
         """
-        try:
-            url = f"{self.base_url}/api/sectors"
-            response = requests.get(url)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Error getting sector performance: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting sector performance")
-        except Exception as e:
-            logger.error(f"Error connecting to API service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to API service: {str(e)}")
+        return await self._get("/api/sectors", "Error getting sector performance")
     
     async def get_asia_tech_exposure(self) -> Dict[str, Any]:
         """
@@ -92,18 +52,7 @@ class APIService:
         Returns:
             Dictionary with Asia tech exposure
         """
-        try:
-            url = f"{self.base_url}/api/asia_tech"
-            response = requests.get(url)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Error getting Asia tech exposure: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting Asia tech exposure")
-        except Exception as e:
-            logger.error(f"Error connecting to API service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to API service: {str(e)}")
+        return await self._get("/api/asia_tech", "Error getting Asia tech exposure")
     
     async def get_morning_brief(self) -> Dict[str, Any]:
         """
@@ -112,15 +61,4 @@ class APIService:
         Returns:
             Dictionary with morning brief
         """
-        try:
-            url = f"{self.base_url}/morning_brief"
-            response = requests.get(url)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Error getting morning brief: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting morning brief")
-        except Exception as e:
-            logger.error(f"Error connecting to API service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to API service: {str(e)}")
+        return await self._get("/morning_brief", "Error getting morning brief")
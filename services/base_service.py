@@ -0,0 +1,88 @@
+"""
+Base Service for the Finance Assistant.
+Shared request handling for the service classes.
+"""
+
+import orjson
+import logging
+from typing import Dict, Any
+from fastapi import HTTPException
+
+from services._http import get_client, send
+
+logger = logging.getLogger(__name__)
+
+class BaseService:
+    """
+    Base class for services calling the orchestrator.
+    """
+    
+    # Name used in connection error messages
+    service_name = "orchestrator service"
+    
+    def __init__(self, base_url: str = "http://localhost:8000"):
+        """
+        Initialize the service.
+        
+        Args:
+            base_url: Base URL for the orchestrator service
+        """
+        self.base_url = base_url
+        
+        # Keep-alive client shared with the other services, so calls reuse connections
+        self._client = get_client(base_url)
+    
+    async def _request(self, method: str, path: str, error: str, decode: bool = True, **kwargs) -> Any:
+        """
+        Send a request to the orchestrator, raising HTTPException on failure or a non-200 response.
+        
+        Args:
+            method: HTTP method
+            path: Path relative to the orchestrator's base URL
+            error: Message logged and returned when the orchestrator answers with an error
+            decode: Whether to decode the response body as JSON
+            **kwargs: Additional arguments for send (json, files, timeout, retry_server_errors)
+        
+        Returns:
+            Decoded response body, or the HTTP response itself if decode is False
+        """
+        try:
+            response = await send(self._client, method, path, **kwargs)
+            
+            if response.status_code == 200:
+                return orjson.loads(response.content) if decode else response
+            else:
+                logger.error(f"{error}: {response.status_code} - {response.text}")
+                raise HTTPException(status_code=response.status_code, detail=error)
+        except Exception as e:
+            logger.error(f"Error connecting to {self.service_name}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error connecting to {self.service_name}: {str(e)}")
+    
+    async def _get(self, path: str, error: str, **kwargs) -> Any:
+        """
+        Send a GET request to the orchestrator and decode its JSON response.
+        
+        Args:
+            path: Path relative to the orchestrator's base URL
+            error: Message logged and returned when the orchestrator answers with an error
+            **kwargs: Additional arguments for send
+        
+        Returns:
+            Decoded response body
+        """
+        return await self._request("GET", path, error, **kwargs)
+    
+    async def _post(self, path: str, payload: Dict[str, Any], error: str, **kwargs) -> Any:
+        """
+        Send a JSON POST request to the orchestrator and decode its JSON response.
+        
+        Args:
+            path: Path relative to the orchestrator's base URL
+            payload: Request body
+            error: Message logged and returned when the orchestrator answers with an error
+            **kwargs: Additional arguments for send
+        
+        Returns:
+            Decoded response body
+        """
+        return await self._request("POST", path, error, json=payload, **kwargs)
@@ -4,18 +4,26 @@ Provides access to the retriever agent functionality.
 """
 
 import os
-import requests
 import logging
 from typing import Dict, List, Any, Optional
 from fastapi import HTTPException
 
+from services.base_service import BaseService
+from utils.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
-class RetrieverService:
+# Seconds a topic response is reused, and how many are kept
+TOPIC_CACHE_TTL = 60
+RESPONSE_CACHE_SIZE = 512
+
+class RetrieverService(BaseService):
     """
     Service class for accessing retriever agent functionality.
     """
     
+    service_name = "retriever service"
+    
     def __init__(self, base_url: str = "http://localhost:8000"):
         """
         Initialize the retriever service.
@@ -23,7 +31,10 @@ class RetrieverService:
         Args:
             base_url: Base URL for the orchestrator service
         """
-        self.base_url = base_url
+        super().__init__(base_url)
+        
+        # Responses to topic queries, which change slowly
+        self._cache = TTLCache(RESPONSE_CACHE_SIZE)
     
     async def retrieve_for_query(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -35,31 +46,16 @@ class RetrieverService:
         Returns:
             List of retrieved documents
         """
-        try:
-            # This would ideally call a specific endpoint for retrieval
-            # For now, we'll use the process endpoint and extract relevant information
-            url = f"{self.base_url}/process"
-            payload = {
-                "query": query
-            }
-            
-            response = requests.post(url, json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extract retrieved documents if available
-                if "data" in result and "retrieved_documents" in result["data"]:
-                    return result["data"]["retrieved_documents"]
-                else:
-                    # No explicit retrieval, return empty list
-                    return []
-            else:
-                logger.error(f"Error retrieving information: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error retrieving information")
-        except Exception as e:
-            logger.error(f"Error connecting to retriever service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to retriever service: {str(e)}")
+        # This would ideally call a specific endpoint for retrieval
+        # For now, we'll use the process endpoint and extract relevant information
+        payload = {
+            "query": query
+        }
+        
+        result = await self._post("/process", payload, "Error retrieving information")
+        
+        # Extract retrieved documents if available; no explicit retrieval gives an empty list
+        return (result.get("data") or {}).get("retrieved_documents") or []
     
     async def retrieve_by_topic(self, topic: str) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -71,31 +67,26 @@ class RetrieverService:
         Returns:
             Dictionary with retrieved information for the topic
         """
-        try:
-            # This would ideally call a specific endpoint for topic retrieval
-            # For now, we'll use the process endpoint with a specific query
-            url = f"{self.base_url}/process"
+        # This would ideally call a specific endpoint for topic retrieval
+        # For now, we'll use the process endpoint with a specific query
+        query = f"Tell me about {topic}"
+        result = self._cache.get(query)
+        
+        if result is None:
             payload = {
-                "query": f"Tell me about {topic}"
+                "query": query
             }
             
-            response = requests.post(url, json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extract retrieved documents if available
-                if "data" in result:
-                    return {"topic": topic, "result": result}
-                else:
-                    # No data, return text response
-                    return {"topic": topic, "text": result.get("text", "")}
-            else:
-                logger.error(f"Error retrieving topic information: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error retrieving topic information")
-        except Exception as e:
-            logger.error(f"Error connecting to retriever service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to retriever service: {str(e)}")
+            # Idempotent query, so transient server errors are retried
+            result = await self._post("/process", payload, "Error retrieving topic information", retry_server_errors=True)
+            self._cache.set(query, result, TOPIC_CACHE_TTL)
+        
+        # Extract retrieved documents if available
+        if "data" in result:
+            return {"topic": topic, "result": result}
+        else:
+            # No data, return text response
+            return {"topic": topic, "text": result.get("text", "")}
     
     async def get_document_by_id(self, doc_id: str) -> Dict[str, Any]:
         """
@@ -4,18 +4,28 @@ Provides access to the scraping agent functionality.
 """
 
 import os
-import requests
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional
-from fastapi import HTTPException
+
+from services.base_service import BaseService
+from utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
-class ScrapingService:
+# Seconds each kind of response is reused, and how many are kept
+NEWS_CACHE_TTL = 60
+SENTIMENT_CACHE_TTL = 60
+EARNINGS_CACHE_TTL = 300
+RESPONSE_CACHE_SIZE = 512
+
+class ScrapingService(BaseService):
     """
     Service class for accessing scraping agent functionality.
     """
     
+    service_name = "scraping service"
+    
     def __init__(self, base_url: str = "http://localhost:8000"):
         """
         Initialize the scraping service.
@@ -23,7 +33,10 @@ class ScrapingService:
         Args:
             base_url: Base URL for the orchestrator service
         """
-        self.base_url = base_url
+        super().__init__(base_url)
+        
+        # Responses to the fixed orchestrator queries, which change slowly
+        self._cache = TTLCache(RESPONSE_CACHE_SIZE)
     
     async def get_financial_news(self) -> List[Dict[str, Any]]:
         """
@@ -32,31 +45,27 @@ class ScrapingService:
         Returns:
             List of news articles
         """
-        try:
-            # This would ideally call a specific endpoint for financial news
-            # For now, we'll use the process endpoint with a specific query
-            url = f"{self.base_url}/process"
+        # This would ideally call a specific endpoint for financial news
+        # For now, we'll use the process endpoint with a specific query
+        query = "What are the latest financial news headlines?"
+        result = self._cache.get(query)
+        
+        if result is None:
             payload = {
-                "query": "What are the latest financial news headlines?"
+                "query": query
             }
             
-            response = requests.post(url, json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extract news from the response if available
-                if "data" in result and "news" in result["data"]:
-                    return result["data"]["news"]
-                else:
-                    # Return the text response
-                    return [{"title": "Financial News", "content": result.get("text", "")}]
-            else:
-                logger.error(f"Error getting financial news: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting financial news")
-        except Exception as e:
-            logger.error(f"Error connecting to scraping service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to scraping service: {str(e)}")
+            # Fixed, idempotent query, so transient server errors are retried
+            result = await self._post("/process", payload, "Error getting financial news", retry_server_errors=True)
+            self._cache.set(query, result, NEWS_CACHE_TTL)
+        
+        # Extract news from the response if available
+        news = (result.get("data") or {}).get("news")
+        if news is not None:
+            return news
+        else:
+            # Return the text response
+            return [{"title": "Financial News", "content": result.get("text", "")}]
     
     async def get_earnings_calendar(self) -> List[Dict[str, Any]]:
         """
@@ -65,31 +74,27 @@ class ScrapingService:
         Returns:
             List of upcoming earnings reports
         """
-        try:
-            # This would ideally call a specific endpoint for earnings calendar
-            # For now, we'll use the process endpoint with a specific query
-            url = f"{self.base_url}/process"
+        # This would ideally call a specific endpoint for earnings calendar
+        # For now, we'll use the process endpoint with a specific query
+        query = "What are the upcoming earnings reports this week?"
+        result = self._cache.get(query)
+        
+        if result is None:
             payload = {
-                "query": "What are the upcoming earnings reports this week?"
+                "query": query
             }
             
-            response = requests.post(url, json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extract earnings from the response if available
-                if "data" in result and "earnings" in result["data"]:
-                    return result["data"]["earnings"]
-                else:
-                    # Return the text response
-                    return [{"title": "Earnings Calendar", "content": result.get("text", "")}]
-            else:
-                logger.error(f"Error getting earnings calendar: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting earnings calendar")
-        except Exception as e:
-            logger.error(f"Error connecting to scraping service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to scraping service: {str(e)}")
+            # Fixed, idempotent query, so transient server errors are retried
+            result = await self._post("/process", payload, "Error getting earnings calendar", retry_server_errors=True)
+            self._cache.set(query, result, EARNINGS_CACHE_TTL)
+        
+        # Extract earnings from the response if available
+        earnings = (result.get("data") or {}).get("earnings")
+        if earnings is not None:
+            return earnings
+        else:
+            # Return the text response
+            return [{"title": "Earnings Calendar", "content": result.get("text", "")}]
     
     async def get_market_sentiment(self, keyword: str) -> Dict[str, Any]:
         """
@@ -101,28 +106,47 @@ class ScrapingService:
         Returns:
             Dictionary with sentiment analysis
         """
-        try:
-            # This would ideally call a specific endpoint for market sentiment
-            # For now, we'll use the process endpoint with a specific query
-            url = f"{self.base_url}/process"
+        # This would ideally call a specific endpoint for market sentiment
+        # For now, we'll use the process endpoint with a specific query
+        query = f"What is the current market sentiment for {keyword}?"
+        result = self._cache.get(query)
+        
+        if result is None:
             payload = {
-                "query": f"What is the current market sentiment for {keyword}?"
+                "query": query
             }
             
-            response = requests.post(url, json=payload)
+            # Fixed, idempotent query, so transient server errors are retried
+            result = await self._post("/process", payload, "Error getting market sentiment", retry_server_errors=True)
+            self._cache.set(query, result, SENTIMENT_CACHE_TTL)
+        
+        # Extract sentiment from the response if available
+        sentiment = (result.get("data") or {}).get("sentiment")
+        if sentiment is not None:
+            return sentiment
+        else:
+            # Return the text response
+            return {"keyword": keyword, "sentiment": result.get("text", "")}
+    
+    async def get_dashboard(self, keyword: str) -> Dict[str, Any]:
+        """
+        Get financial news, the earnings calendar and market sentiment together.
+        
+        Args:
+            keyword: Keyword to analyze sentiment for
             
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extract sentiment from the response if available
-                if "data" in result and "sentiment" in result["data"]:
-                    return result["data"]["sentiment"]
-                else:
-                    # Return the text response
-                    return {"keyword": keyword, "sentiment": result.get("text", "")}
-            else:
-                logger.error(f"Error getting market sentiment: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error getting market sentiment")
-        except Exception as e:
-            logger.error(f"Error connecting to scraping service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to scraping service: {str(e)}")
+        Returns:
+            Dictionary with news, earnings and sentiment
+        """
+        # The three lookups are independent, so wait for the slowest instead of their sum
+        news, earnings, sentiment = await asyncio.gather(
+            self.get_financial_news(),
+            self.get_earnings_calendar(),
+            self.get_market_sentiment(keyword)
+        )
+        
+        return {
+            "news": news,
+            "earnings": earnings,
+            "sentiment": sentiment
+        }
@@ -4,56 +4,56 @@ Provides access to the voice agent functionality.
 """
 
 import os
-import requests
+import orjson
 import logging
-import base64
-import json
-from typing import Dict, Any, Optional, BinaryIO
+import mimetypes
+from typing import Dict, Any, Optional, BinaryIO, Union
+import httpx
 from fastapi import HTTPException, UploadFile, File
 
+from services._http import CONNECT_TIMEOUT, POOL_TIMEOUT, send
+from services.base_service import BaseService
+
 logger = logging.getLogger(__name__)
 
-class VoiceService:
+# Audio format requested for synthesized speech
+TTS_FORMAT = "mp3"
+
+# Audio uploads, transcription and synthesis take longer than ordinary queries
+VOICE_TIMEOUT = httpx.Timeout(connect=CONNECT_TIMEOUT, read=30.0, write=30.0, pool=POOL_TIMEOUT)
+
+class VoiceService(BaseService):
     """
     Service class for accessing voice agent functionality.
     """
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        """
-        Initialize the voice service.
-        
-        Args:
-            base_url: Base URL for the orchestrator service
-        """
-        self.base_url = base_url
+    service_name = "voice service"
     
-    async def transcribe_audio(self, audio_file: BinaryIO) -> str:
+    async def transcribe_audio(self, audio_file: Union[BinaryIO, UploadFile]) -> str:
         """
         Transcribe audio to text.
         
         Args:
-            audio_file: Audio file object
+            audio_file: Audio file object, or a FastAPI upload
             
         Returns:
             Transcribed text
         """
-        try:
-            url = f"{self.base_url}/voice/transcribe"
-            
-            # Prepare the file for upload
-            files = {"audio": audio_file}
-            
-            response = requests.post(url, files=files)
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("text", "")
-            else:
-                logger.error(f"Error transcribing audio: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error transcribing audio")
-        except Exception as e:
-            logger.error(f"Error connecting to voice service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to voice service: {str(e)}")
+        # Prepare the file for upload; httpx streams it in chunks rather than reading it whole
+        if isinstance(audio_file, UploadFile):
+            filename = audio_file.filename or "audio.wav"
+            content_type = audio_file.content_type
+            audio_file = audio_file.file
+        else:
+            name = getattr(audio_file, "name", None)
+            filename = os.path.basename(name) if isinstance(name, str) else "audio.wav"
+            content_type = None
+        
+        content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        files = {"audio": (filename, audio_file, content_type)}
+        
+        result = await self._request("POST", "/voice/transcribe", "Error transcribing audio", files=files, timeout=VOICE_TIMEOUT)
+        return result.get("text", "")
     
     async def text_to_speech(self, text: str) -> bytes:
         """
@@ -65,31 +65,19 @@ class VoiceService:
         Returns:
             Audio data
         """
-        try:
-            url = f"{self.base_url}/voice/synthesize"
-            
-            payload = {
-                "text": text
-            }
-            
-            response = requests.post(url, json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                audio_base64 = result.get("audio_base64", "")
-                
-                if audio_base64:
-                    # Decode base64 to binary
-                    return base64.b64decode(audio_base64)
-                else:
-                    logger.error("No audio data received")
-                    raise HTTPException(status_code=500, detail="No audio data received")
-            else:
-                logger.error(f"Error synthesizing speech: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error synthesizing speech")
-        except Exception as e:
-            logger.error(f"Error connecting to voice service: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error connecting to voice service: {str(e)}")
+        # Raw audio from the streaming endpoint, without the base64 JSON envelope
+        payload = {
+            "text": text,
+            "format": TTS_FORMAT
+        }
+        
+        response = await self._request("POST", "/voice/synthesize/stream", "Error synthesizing speech", decode=False, json=payload, timeout=VOICE_TIMEOUT)
+        
+        if response.content:
+            return response.content
+        else:
+            logger.error("No audio data received")
+            raise HTTPException(status_code=500, detail="No audio data received")
     
     async def process_voice_query(self, audio_file: BinaryIO) -> Dict[str, Any]:
         """
@@ -114,12 +102,12 @@ class VoiceService:
                 }
             
             # Step 2: Process the transcribed query
-            url = f"{self.base_url}/process"
             payload = {
                 "query": text
             }
             
-            response = requests.post(url, json=payload)
+            # Sent directly rather than through _post, so a failure is reported with the transcript
+            response = await send(self._client, "POST", "/process", json=payload, timeout=VOICE_TIMEOUT)
             
             if response.status_code != 200:
                 logger.error(f"Error processing query: {response.status_code} - {response.text}")
@@ -130,7 +118,7 @@ class VoiceService:
                     "audio": None
                 }
                 
-            result = response.json()
+            result = orjson.loads(response.content)
             response_text = result.get("text", "")
             
             # Step 3: Convert response to speech
@@ -9,11 +9,75 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Example queries
+EXAMPLE_QUERIES = (
+    "What's our risk exposure in Asia tech stocks today, and highlight any earnings surprises?",
+    "What are the top performing sectors this week?",
+    "How are semiconductor stocks performing after recent earnings?",
+    "What are the current treasury yields?",
+    "What's the market sentiment towards AI stocks?"
+)
+
+# Sample responses for demo purposes
+SAMPLE_RESPONSES = (
+    "Your exposure to Asia tech stocks is currently 15% of your portfolio. Recent earnings surprises include TSMC beating expectations by 8.3% and Samsung Electronics missing projections by 2.1%.",
+    "Top performing sectors this week are Technology (+3.2%), Healthcare (+2.1%), and Consumer Discretionary (+1.6%). Energy is the worst performer, down 1.8%.",
+    "Semiconductor stocks are showing strong performance after recent earnings. The sector is up 4.5% over the past week, led by TSMC (+7.2%) and AMD (+6.5%).",
+    "Current treasury yields are: 2-Year: 3.82%, 5-Year: 3.56%, 10-Year: 3.81%, 30-Year: 4.14%. The yield curve remains inverted.",
+    "Market sentiment towards AI stocks is currently bullish with moderate optimism. The AI sector has seen inflows of $1.2B in the past month, though valuations remain a concern for some analysts."
+)
+
+# Random responses for free-form questions, for demonstration purposes
+RANDOM_RESPONSES = (
+    "Based on current market analysis, Asia tech stocks are showing moderate strength with potential for growth in the semiconductor sector.",
+    "Our financial models suggest maintaining your current allocation to technology stocks, with a slight increase in exposure to Taiwan and South Korea-based manufacturers.",
+    "The market is showing positive momentum, with major indices trending upward over the past week. Consider this a favorable environment for growth-oriented positions.",
+    "Current risk assessment for your portfolio is moderate. Consider diversifying further into defensive sectors as a hedge against potential volatility.",
+    "Analysis of recent earnings reports from major tech companies indicates stronger-than-expected performance in the semiconductor and cloud computing segments."
+)
+
+# Sample indices data for demonstration
+INDICES = {
+    "S&P 500": {"price": 4735.42, "change_percent": 0.61},
+    "Nasdaq": {"price": 16573.68, "change_percent": 0.83},
+    "Dow Jones": {"price": 38157.94, "change_percent": 0.32},
+    "Nikkei 225": {"price": 38789.56, "change_percent": -0.22},
+    "Shanghai": {"price": 3112.05, "change_percent": 0.54}
+}
+
+# Sample portfolio data for demonstration
+PORTFOLIO = {
+    "total_value": 1250350.75,
+    "daily_change_percent": 0.45,
+    "allocation": {
+        "regions": {
+            "North America": 42,
+            "Europe": 23,
+            "Asia": 28,
+            "Other": 7
+        }
+    }
+}
+
+# Allocation progress bars as (fraction, label) pairs
+REGION_PROGRESS = tuple(
+    (percentage / 100, f"{region}: {percentage}%")
+    for region, percentage in PORTFOLIO["allocation"]["regions"].items()
+)
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_current_date():
     """Get the current date formatted for display."""
     now = datetime.now()
     return now.strftime("%A, %B %d, %Y")
 
+def pick_example(i):
+    """Add an example query and its sample response to the chat history."""
+    st.session_state.messages.extend((
+        {"role": "user", "content": EXAMPLE_QUERIES[i]},
+        {"role": "assistant", "content": SAMPLE_RESPONSES[i]}
+    ))
+
 # Initialize session state for chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -31,43 +95,15 @@ with col_sidebar:
     
     # Example queries
     st.subheader("Example Queries")
-    example_queries = [
-        "What's our risk exposure in Asia tech stocks today, and highlight any earnings surprises?",
-        "What are the top performing sectors this week?",
-        "How are semiconductor stocks performing after recent earnings?",
-        "What are the current treasury yields?",
-        "What's the market sentiment towards AI stocks?"
-    ]
-    
-    # Sample responses for demo purposes
-    sample_responses = [
-        "Your exposure to Asia tech stocks is currently 15% of your portfolio. Recent earnings surprises include TSMC beating expectations by 8.3% and Samsung Electronics missing projections by 2.1%.",
-        "Top performing sectors this week are Technology (+3.2%), Healthcare (+2.1%), and Consumer Discretionary (+1.6%). Energy is the worst performer, down 1.8%.",
-        "Semiconductor stocks are showing strong performance after recent earnings. The sector is up 4.5% over the past week, led by TSMC (+7.2%) and AMD (+6.5%).",
-        "Current treasury yields are: 2-Year: 3.82%, 5-Year: 3.56%, 10-Year: 3.81%, 30-Year: 4.14%. The yield curve remains inverted.",
-        "Market sentiment towards AI stocks is currently bullish with moderate optimism. The AI sector has seen inflows of $1.2B in the past month, though valuations remain a concern for some analysts."
-    ]
-    
-    for i, query in enumerate(example_queries):
-        if st.button(query, key=f"example_{i}"):
-            st.session_state.messages.append({"role": "user", "content": query})
-            response = sample_responses[i]
-            st.session_state.messages.append({"role": "assistant", "content": response})
+    for i, query in enumerate(EXAMPLE_QUERIES):
+        st.button(query, key=f"example_{i}", on_click=pick_example, args=(i,))
 
     # Text input for questions
     st.subheader("Ask a Question")
     query = st.text_input("Enter your financial query:")
     if st.button("Submit") and query:
         st.session_state.messages.append({"role": "user", "content": query})
-        # Generate a random response for demonstration purposes
-        responses = [
-            "Based on current market analysis, Asia tech stocks are showing moderate strength with potential for growth in the semiconductor sector.",
-            "Our financial models suggest maintaining your current allocation to technology stocks, with a slight increase in exposure to Taiwan and South Korea-based manufacturers.",
-            "The market is showing positive momentum, with major indices trending upward over the past week. Consider this a favorable environment for growth-oriented positions.",
-            "Current risk assessment for your portfolio is moderate. Consider diversifying further into defensive sectors as a hedge against potential volatility.",
-            "Analysis of recent earnings reports from major tech companies indicates stronger-than-expected performance in the semiconductor and cloud computing segments."
-        ]
-        st.session_state.messages.append({"role": "assistant", "content": random.choice(responses)})
+        st.session_state.messages.append({"role": "assistant", "content": random.choice(RANDOM_RESPONSES)})
 
 # Main content area with market data and chat
 with col_main:
@@ -79,16 +115,7 @@ with col_main:
 
     with market_col1:
         st.subheader("Major Indices")
-        # Sample indices data for demonstration
-        indices = {
-            "S&P 500": {"price": 4735.42, "change_percent": 0.61},
-            "Nasdaq": {"price": 16573.68, "change_percent": 0.83},
-            "Dow Jones": {"price": 38157.94, "change_percent": 0.32},
-            "Nikkei 225": {"price": 38789.56, "change_percent": -0.22},
-            "Shanghai": {"price": 3112.05, "change_percent": 0.54}
-        }
-        
-        for idx, data in indices.items():
+        for idx, data in INDICES.items():
             delta = data.get("change_percent", 0)
             st.metric(
                 label=idx, 
@@ -98,30 +125,16 @@ with col_main:
 
     with market_col2:
         st.subheader("Your Portfolio Summary")
-        # Sample portfolio data for demonstration
-        portfolio = {
-            "total_value": 1250350.75,
-            "daily_change_percent": 0.45,
-            "allocation": {
-                "regions": {
-                    "North America": 42,
-                    "Europe": 23,
-                    "Asia": 28,
-                    "Other": 7
-                }
-            }
-        }
         st.metric(
             label="Total Value", 
-            value=f"${portfolio.get('total_value', 0):,.2f}", 
-            delta=f"{portfolio.get('daily_change_percent', 0):.2f}%"
+            value=f"${PORTFOLIO.get('total_value', 0):,.2f}", 
+            delta=f"{PORTFOLIO.get('daily_change_percent', 0):.2f}%"
         )
         
         # Show allocation
         st.caption("Allocation by Region")
-        regions = portfolio.get("allocation", {}).get("regions", {})
-        for region, percentage in regions.items():
-            st.progress(percentage / 100, text=f"{region}: {percentage}%")
+        for fraction, label in REGION_PROGRESS:
+            st.progress(fraction, text=label)
 
     # Chat interface
     st.header("Financial Assistant Chat")
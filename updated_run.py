@@ -9,6 +9,7 @@ import threading
 import time
 import logging
 import signal
+import socket
 import sys
 from utils.logger import setup_logger
 
@@ -19,13 +20,12 @@ def start_orchestrator():
     """Start the FastAPI orchestrator service."""
     logger.info("Starting orchestrator service...")
     try:
-        # Run the FastAPI server
-        subprocess.run([
-            "python", "-m", "uvicorn", 
-            "orchestrator.main:app", 
-            "--host", "0.0.0.0", 
-            "--port", "8000"
-        ])
+        # Run the FastAPI server in this process rather than a second interpreter;
+        # uvicorn leaves signal handling to the main thread
+        import uvicorn
+        from orchestrator.main import app
+        
+        uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
     except Exception as e:
         logger.error(f"Error starting orchestrator: {str(e)}")
         sys.exit(1)
@@ -46,6 +46,28 @@ def start_streamlit():
             "--server.address", "0.0.0.0"
         ])
         
+def wait_ready(host: str, port: int, timeout: float = 30.0, interval: float = 0.05) -> bool:
+    """
+    Wait until a TCP port accepts connections.
+    
+    Args:
+        host: Host to connect to
+        port: Port to connect to
+        timeout: Maximum time to wait in seconds
+        interval: Delay between connection attempts in seconds
+    
+    Returns:
+        True if the port accepted a connection before the timeout
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
+
 def handle_exit(signum, frame):
     """Handle exit signals."""
     logger.info("Shutting down Finance Assistant...")
@@ -58,21 +80,20 @@ def main():
     signal.signal(signal.SIGTERM, handle_exit)
     
     # Create logs directory if it doesn't exist
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
+    os.makedirs("logs", exist_ok=True)
     
     # Create data directory if it doesn't exist
-    if not os.path.exists("data"):
-        os.makedirs("data")
+    os.makedirs("data", exist_ok=True)
     
     # Start orchestrator in a separate thread
     orchestrator_thread = threading.Thread(target=start_orchestrator)
     orchestrator_thread.daemon = True
     orchestrator_thread.start()
     
-    # Wait for orchestrator to start
+    # Wait for orchestrator to start accepting connections
     logger.info("Waiting for orchestrator to start...")
-    time.sleep(5)
+    if not wait_ready("127.0.0.1", 8000):
+        logger.warning("Orchestrator not ready after 30 seconds, starting Streamlit anyway")
     
     # Start Streamlit
     start_streamlit()
@@ -0,0 +1,325 @@
+"""
+Caching utilities for the Finance Assistant.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class FileCache:
+    """
+    On-disk cache for DataFrames with per-entry TTL.
+    Each entry is stored as a parquet file with a JSON metadata sidecar.
+    """
+    
+    def __init__(self, cache_dir: Union[str, Path]):
+        """
+        Initialize the file cache.
+        
+        Args:
+            cache_dir: Directory to store cache entries in
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+    
+    def _paths(self, key: str):
+        """Get the data and metadata paths for a cache key."""
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return self.cache_dir / f"{digest}.parquet", self.cache_dir / f"{digest}.meta.json"
+    
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """
+        Get a cached DataFrame.
+        
+        Args:
+            key: Cache key
+            max_age: Optional maximum age in seconds (defaults to the TTL stored with the entry)
+        
+        Returns:
+            Cached DataFrame, or None if missing or expired
+        """
+        return self.get_with_lifetime(key, max_age)[0]
+    
+    def get_with_lifetime(self, key: str, max_age: Optional[float] = None) -> Tuple[Optional[pd.DataFrame], float]:
+        """
+        Get a cached DataFrame along with how long it stays fresh.
+        
+        Args:
+            key: Cache key
+            max_age: Optional maximum age in seconds (defaults to the TTL stored with the entry)
+        
+        Returns:
+            Tuple of (cached DataFrame, or None if missing or expired, remaining lifetime in seconds)
+        """
+        data_path, meta_path = self._paths(key)
+        
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            
+            ttl = max_age if max_age is not None else meta.get("ttl", 0)
+            remaining = meta.get("ts", 0) + ttl - time.time()
+            if remaining < 0:
+                self.misses += 1
+                return None, 0.0
+            
+            data = pd.read_parquet(data_path)
+            self.hits += 1
+            return data, remaining
+        except FileNotFoundError:
+            self.misses += 1
+            return None, 0.0
+        except Exception as e:
+            logger.error(f"Error reading cache entry {key}: {str(e)}")
+            self.misses += 1
+            return None, 0.0
+    
+    def set(self, key: str, data: pd.DataFrame, ttl: float) -> None:
+        """
+        Store a DataFrame in the cache.
+        
+        Args:
+            key: Cache key
+            data: DataFrame to store
+            ttl: Time to live in seconds
+        """
+        data_path, meta_path = self._paths(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        
+        try:
+            # Write to temporary files and rename them into place, so readers in
+            # other processes never see a partially written entry
+            data_tmp = data_path.with_name(data_path.name + suffix)
+            meta_tmp = meta_path.with_name(meta_path.name + suffix)
+            data.to_parquet(data_tmp)
+            with open(meta_tmp, 'w') as f:
+                json.dump({"key": key, "ts": time.time(), "ttl": ttl}, f)
+            os.replace(data_tmp, data_path)
+            os.replace(meta_tmp, meta_path)
+        except Exception as e:
+            logger.error(f"Error writing cache entry {key}: {str(e)}")
+    
+    def clear(self, prefix: Optional[str] = None) -> int:
+        """
+        Remove cache entries.
+        
+        Args:
+            prefix: Optional key prefix; only matching entries are removed
+        
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        
+        for meta_path in self.cache_dir.glob("*.meta.json"):
+            try:
+                if prefix is not None:
+                    with open(meta_path, 'r') as f:
+                        if not json.load(f).get("key", "").startswith(prefix):
+                            continue
+                
+                data_path = meta_path.with_name(meta_path.name.replace(".meta.json", ".parquet"))
+                meta_path.unlink()
+                if data_path.exists():
+                    data_path.unlink()
+                removed += 1
+            except Exception as e:
+                logger.error(f"Error removing cache entry {meta_path.name}: {str(e)}")
+        
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counts and number of stored entries
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(list(self.cache_dir.glob("*.meta.json"))),
+            "cache_dir": str(self.cache_dir)
+        }
+
+class TTLCache:
+    """
+    In-memory LRU cache with per-entry TTL.
+    Entries expire after their TTL and the least recently used are evicted beyond max_entries.
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        """
+        Initialize the TTL cache.
+        
+        Args:
+            max_entries: Maximum number of stored entries
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        Get a cached value.
+        
+        Args:
+            key: Cache key (must be hashable)
+        
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        hit = self._entries.get(key)
+        if hit is None or hit[0] <= time.monotonic():
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return hit[1]
+    
+    def set(self, key: Any, value: Any, ttl: float) -> None:
+        """
+        Store a value.
+        
+        Args:
+            key: Cache key (must be hashable)
+            value: Value to store
+            ttl: Time to live in seconds
+        """
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counts and number of stored entries
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries)
+        }
+
+class SemanticCache:
+    """
+    In-memory cache of text completions keyed by embedding similarity.
+    Entries are grouped by scope (e.g. model, temperature and system prompt),
+    so only prompts issued under identical settings can match.
+    """
+    
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1024):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of stored entries (least recently used are evicted)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._embs: Optional[np.ndarray] = None  # (max_entries, dim), rows L2-normalized
+        self._scope_ids = np.full(max_entries, -1, dtype=np.int64)
+        self._last_used = np.zeros(max_entries)
+        self._vals: list = [None] * max_entries
+        self._scopes: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm > 0 else q
+    
+    def get(self, scope: str, embedding) -> Optional[str]:
+        """
+        Look up the most similar cached completion.
+        
+        Args:
+            scope: Scope the prompt was issued under
+            embedding: Embedding of the prompt
+            
+        Returns:
+            Cached completion, or None if nothing is similar enough
+        """
+        q = self._normalize(embedding)
+        
+        with self._lock:
+            scope_id = self._scopes.get(scope)
+            if self._embs is None or scope_id is None or self._embs.shape[1] != q.shape[0]:
+                self.misses += 1
+                return None
+            
+            n = self._size
+            cos = self._embs[:n] @ q
+            cos[self._scope_ids[:n] != scope_id] = -1.0
+            best = int(cos.argmax())
+            
+            if cos[best] < self.threshold:
+                self.misses += 1
+                return None
+            
+            self._last_used[best] = time.monotonic()
+            self.hits += 1
+            return self._vals[best]
+    
+    def set(self, scope: str, embedding, value: str) -> None:
+        """
+        Store a completion.
+        
+        Args:
+            scope: Scope the prompt was issued under
+            embedding: Embedding of the prompt
+            value: Completion text
+        """
+        q = self._normalize(embedding)
+        
+        with self._lock:
+            if self._embs is None or self._embs.shape[1] != q.shape[0]:
+                self._embs = np.zeros((self.max_entries, q.shape[0]), dtype=np.float32)
+                self._size = 0
+            
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(self._last_used.argmin())
+            
+            self._embs[slot] = q
+            self._scope_ids[slot] = self._scopes.setdefault(scope, len(self._scopes))
+            self._last_used[slot] = time.monotonic()
+            self._vals[slot] = value
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counts and number of stored entries
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self._size
+        }
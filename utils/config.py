@@ -3,115 +3,172 @@ Configuration utilities for the Finance Assistant.
 """
 
 import os
+import copy
 import logging
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Iterator, Optional, Tuple
 import json
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
-class Config:
-    """
-    Configuration class for the application.
-    """
+# Default configuration
+_DEFAULTS = {
+    "api": {
+        "base_url": "http://localhost:8000",
+        "timeout": 30
+    },
+    "voice": {
+        "model": "whisper-1",
+        "voice": "onyx",
+        "max_length": 4096
+    },
+    "retriever": {
+        "top_k": 5,
+        "similarity_threshold": 0.7
+    },
+    "log_level": "INFO"
+}
+
+# Environment variables overriding configuration values: (variable, dot-notation key, type)
+_ENV_OVERRIDES = (
+    # API settings
+    ("API_BASE_URL", "api.base_url", str),
+    ("API_TIMEOUT", "api.timeout", int),
+    # Voice settings
+    ("VOICE_MODEL", "voice.model", str),
+    ("VOICE_VOICE", "voice.voice", str),
+    # Retriever settings
+    ("RETRIEVER_TOP_K", "retriever.top_k", int),
+    ("RETRIEVER_SIMILARITY_THRESHOLD", "retriever.similarity_threshold", float),
+    # Log level
+    ("LOG_LEVEL", "log_level", str)
+)
+
+def _set_path(config: Dict[str, Any], key: str, value: Any) -> None:
+    """Set a dot-notation key in a nested configuration dictionary, creating sections as needed."""
+    keys = key.split(".")
     
-    def __init__(self, config_file: Optional[str] = None):
-        """
-        Initialize configuration.
+    for k in keys[:-1]:
+        if k not in config:
+            config[k] = {}
+        config = config[k]
         
-        Args:
-            config_file: Optional path to configuration file
-        """
-        self.config = {}
-        
-        # Default configuration
-        self.config = {
-            "api": {
-                "base_url": "http://localhost:8000",
-                "timeout": 30
-            },
-            "voice": {
-                "model": "whisper-1",
-                "voice": "onyx",
-                "max_length": 4096
-            },
-            "retriever": {
-                "top_k": 5,
-                "similarity_threshold": 0.7
-            },
-            "log_level": "INFO"
-        }
+    config[keys[-1]] = value
+
+def _flatten(config: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Yield every dot-notation key in a nested configuration dictionary, sections included, with its value."""
+    for k, v in config.items():
+        key = prefix + k
+        yield key, v
+        if isinstance(v, dict):
+            yield from _flatten(v, key + ".")
+
+def _update_dict(d: Dict[str, Any], u: Dict[str, Any]) -> None:
+    """Recursively merge u into d."""
+    for k, v in u.items():
+        if isinstance(v, dict) and k in d and isinstance(d[k], dict):
+            _update_dict(d[k], v)
+        else:
+            d[k] = v
+
+def _load_from_file(config: Dict[str, Any], config_file: str) -> None:
+    """
+    Load configuration from file.
+    
+    Args:
+        config: Configuration to update
+        config_file: Path to configuration file
+    """
+    try:
+        with open(config_file, 'rb') as f:
+            data = f.read()
         
-        # Load from config file if provided
-        if config_file and os.path.exists(config_file):
-            self._load_from_file(config_file)
+        file_config = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
             
-        # Override with environment variables
-        self._load_from_env()
+        # Update config with file values
+        _update_dict(config, file_config)
+        logger.info(f"Loaded configuration from {config_file}")
+    except Exception as e:
+        logger.error(f"Error loading configuration from {config_file}: {str(e)}")
+
+def _load_from_env(config: Dict[str, Any], env: Tuple[Optional[str], ...]) -> None:
+    """
+    Load configuration from environment variables.
     
-    def _load_from_file(self, config_file: str) -> None:
-        """
-        Load configuration from file.
+    Args:
+        config: Configuration to update
+        env: Values of the _ENV_OVERRIDES variables, in order
+    """
+    for (name, key, cast), value in zip(_ENV_OVERRIDES, env):
+        if not value:
+            continue
         
-        Args:
-            config_file: Path to configuration file
-        """
         try:
-            with open(config_file, 'r') as f:
-                file_config = json.load(f)
-                
-            # Update config with file values
-            self._update_config(file_config)
-            logger.info(f"Loaded configuration from {config_file}")
+            _set_path(config, key, cast(value))
         except Exception as e:
-            logger.error(f"Error loading configuration from {config_file}: {str(e)}")
+            logger.error(f"Error loading configuration from environment variable {name}: {str(e)}")
+
+@lru_cache(maxsize=None)
+def _build_config(config_file: Optional[str], file_mtime: Optional[int], env: Tuple[Optional[str], ...]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Build the configuration from the defaults, an optional file and environment overrides.
     
-    def _load_from_env(self) -> None:
-        """Load configuration from environment variables."""
-        try:
-            # API settings
-            if os.environ.get("API_BASE_URL"):
-                self.config["api"]["base_url"] = os.environ.get("API_BASE_URL")
-                
-            if os.environ.get("API_TIMEOUT"):
-                self.config["api"]["timeout"] = int(os.environ.get("API_TIMEOUT"))
-                
-            # Voice settings
-            if os.environ.get("VOICE_MODEL"):
-                self.config["voice"]["model"] = os.environ.get("VOICE_MODEL")
-                
-            if os.environ.get("VOICE_VOICE"):
-                self.config["voice"]["voice"] = os.environ.get("VOICE_VOICE")
-                
-            # Retriever settings
-            if os.environ.get("RETRIEVER_TOP_K"):
-                self.config["retriever"]["top_k"] = int(os.environ.get("RETRIEVER_TOP_K"))
-                
-            if os.environ.get("RETRIEVER_SIMILARITY_THRESHOLD"):
-                self.config["retriever"]["similarity_threshold"] = float(os.environ.get("RETRIEVER_SIMILARITY_THRESHOLD"))
-                
-            # Log level
-            if os.environ.get("LOG_LEVEL"):
-                self.config["log_level"] = os.environ.get("LOG_LEVEL")
-                
-            logger.info("Applied environment variable overrides to configuration")
-        except Exception as e:
-            logger.error(f"Error loading configuration from environment: {str(e)}")
+    Args:
+        config_file: Optional path to configuration file
+        file_mtime: Modification time of the file, so that edits are picked up
+        env: Values of the _ENV_OVERRIDES variables, in order (empty if none are set)
+        
+    Returns:
+        Tuple of the nested configuration and its flat dot-notation key map
+        (shared between calls; copy before modifying)
+    """
+    config = copy.deepcopy(_DEFAULTS)
+    
+    # Load from config file if provided
+    if config_file:
+        _load_from_file(config, config_file)
+        
+    # Override with environment variables
+    if env:
+        _load_from_env(config, env)
+        logger.info("Applied environment variable overrides to configuration")
+    
+    return config, dict(_flatten(config))
+
+class Config:
+    """
+    Configuration class for the application.
+    """
     
-    def _update_config(self, new_config: Dict[str, Any]) -> None:
+    def __init__(self, config_file: Optional[str] = None):
         """
-        Update configuration with new values.
+        Initialize configuration.
         
         Args:
-            new_config: New configuration values
+            config_file: Optional path to configuration file
         """
-        def update_dict(d, u):
-            for k, v in u.items():
-                if isinstance(v, dict) and k in d and isinstance(d[k], dict):
-                    update_dict(d[k], v)
-                else:
-                    d[k] = v
+        file_mtime = None
+        if config_file and os.path.exists(config_file):
+            file_mtime = os.stat(config_file).st_mtime_ns
+        else:
+            config_file = None
+        
+        # One lookup per override variable; with none set, every instance shares the same key
+        env = tuple(os.environ.get(name) for name, _, _ in _ENV_OVERRIDES)
+        if not any(env):
+            env = ()
         
-        update_dict(self.config, new_config)
+        # The file is parsed once per version and environment. Instances share the result,
+        # along with its map of every dot-notation key for single-probe lookups, until
+        # set() gives them a copy of their own
+        self.config, self._flat = _build_config(config_file, file_mtime, env)
+        self._copied = False
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -124,16 +181,7 @@ class Config:
         Returns:
             Configuration value
         """
-        try:
-            keys = key.split(".")
-            value = self.config
-            
-            for k in keys:
-                value = value[k]
-                
-            return value
-        except (KeyError, TypeError):
-            return default
+        return self._flat.get(key, default)
     
     def set(self, key: str, value: Any) -> None:
         """
@@ -143,22 +191,20 @@ class Config:
             key: Configuration key (dot notation supported)
             value: Configuration value
         """
-        keys = key.split(".")
-        config = self.config
-        
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
+        if not self._copied:
+            self.config = copy.deepcopy(self.config)
+            self._copied = True
             
-        config[keys[-1]] = value
+        _set_path(self.config, key, value)
+        self._flat = dict(_flatten(self.config))
     
     def get_all(self) -> Dict[str, Any]:
         """
         Get all configuration values.
         
         Returns:
-            Complete configuration dictionary
+            Complete configuration dictionary (possibly shared with other instances;
+            change values through set)
         """
         return self.config
 
@@ -3,10 +3,177 @@ Logging utilities for the Finance Assistant.
 """
 
 import os
-import logging
 import sys
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import queue
+import atexit
+import logging
+import threading
+from types import MappingProxyType
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+# Logging levels by name
+_LEVELS = MappingProxyType({
+    "CRITICAL": logging.CRITICAL,
+    "FATAL": logging.FATAL,
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "WARN": logging.WARN,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+    "NOTSET": logging.NOTSET
+})
+
+# Log file write buffer, and the interval at which it is flushed when records
+# below ERROR are all that arrive
+LOG_BUFFER_SIZE = 1 << 20
+LOG_FLUSH_INTERVAL = 30.0
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler writing through a large buffer.
+    Records are flushed every LOG_FLUSH_INTERVAL seconds, immediately at ERROR
+    and above, and on close. The file size is tracked in memory rather than
+    checked on disk for every record.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the handler.
+        
+        Args:
+            *args: Positional arguments for RotatingFileHandler
+            **kwargs: Keyword arguments for RotatingFileHandler
+        """
+        self._size = 0
+        super().__init__(*args, **kwargs)
+        
+        self._closed = threading.Event()
+        threading.Thread(target=self._flush_periodically, daemon=True).start()
+    
+    def _open(self):
+        """Open the log file with a large write buffer and note its current size."""
+        stream = open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                      encoding=self.encoding, errors=self.errors)
+        self._size = stream.seek(0, os.SEEK_END)
+        return stream
+    
+    def _flush_periodically(self) -> None:
+        """Flush buffered records until the handler is closed."""
+        while not self._closed.wait(LOG_FLUSH_INTERVAL):
+            self.flush()
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Write a record, rolling the file over first if it would exceed maxBytes.
+        
+        Args:
+            record: Log record
+        """
+        try:
+            msg = self.format(record) + self.terminator
+            
+            # Only non-ASCII records need encoding to count their bytes
+            size = len(msg) if msg.isascii() else len(msg.encode(self.encoding or "utf-8", "replace"))
+            if self.maxBytes > 0 and self._size and self._size + size > self.maxBytes:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+                
+            self.stream.write(msg)
+            self._size += size
+            
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+    
+    def close(self) -> None:
+        """Stop the periodic flush and close the file."""
+        self._closed.set()
+        super().close()
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter reusing the formatted timestamp for records logged within the same second.
+    Only suitable for date formats without sub-second fields.
+    """
+    
+    _cached_time = (None, "")  # (second, formatted timestamp)
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        """
+        Format the record's creation time, calling strftime at most once per second.
+        
+        Args:
+            record: Log record
+            datefmt: Optional date format
+            
+        Returns:
+            Formatted timestamp
+        """
+        second = int(record.created)
+        cached_second, text = self._cached_time
+        if second != cached_second:
+            text = super().formatTime(record, datefmt)
+            self._cached_time = (second, text)
+        return text
+
+# Queues drained by background listeners, one per log file (None for console only),
+# so callers never block on console or file writes
+_queues: Dict[Optional[str], queue.Queue] = {}
+_queues_lock = threading.Lock()
+
+# Loggers already configured, by (name, log_level, log_file)
+_loggers: Dict[Tuple[str, str, Optional[str]], logging.Logger] = {}
+
+def _get_queue(log_file: Optional[str], formatter: logging.Formatter) -> queue.Queue:
+    """
+    Get the queue for a log file, starting its listener on first use.
+    
+    Args:
+        log_file: Optional path to log file
+        formatter: Formatter for the console and file handlers
+        
+    Returns:
+        Queue feeding the listener
+    """
+    with _queues_lock:
+        log_queue = _queues.get(log_file)
+        if log_queue is not None:
+            return log_queue
+        
+        # Console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        handlers = [console_handler]
+        
+        # File handler if log_file is specified
+        if log_file:
+            # Create logs directory if it doesn't exist
+            log_dir = os.path.dirname(log_file)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+                
+            # Buffered rotating file handler (max 10MB, keep 5 backups)
+            file_handler = BufferedRotatingFileHandler(
+                log_file,
+                maxBytes=10*1024*1024,
+                backupCount=5
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        
+        # Levels are applied by each logger before records are queued
+        log_queue = queue.Queue()
+        listener = QueueListener(log_queue, *handlers)
+        listener.start()
+        
+        # Flush what is still queued when the interpreter exits
+        atexit.register(listener.stop)
+        
+        _queues[log_file] = log_queue
+        return log_queue
 
 def setup_logger(name: str, log_level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
     """
@@ -20,45 +187,33 @@ def setup_logger(name: str, log_level: str = "INFO", log_file: Optional[str] = N
     Returns:
         Configured logger
     """
+    # Repeat calls with the same settings return the configured logger
+    key = (name, log_level, log_file)
+    logger = _loggers.get(key)
+    if logger is not None:
+        return logger
+    
     # Get logging level
-    level = getattr(logging, log_level.upper(), logging.INFO)
+    level = _LEVELS.get(log_level.upper(), logging.INFO)
     
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
-    # Clear existing handlers
+    # Clear existing handlers; records are not passed on to the root logger's handlers too
     logger.handlers = []
+    logger.propagate = False
     
     # Create formatter
-    formatter = logging.Formatter(
+    formatter = CachedTimeFormatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler if log_file is specified
-    if log_file:
-        # Create logs directory if it doesn't exist
-        log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-            
-        # Rotating file handler (max 10MB, keep 5 backups)
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=10*1024*1024,
-            backupCount=5
-        )
-        file_handler.setLevel(level)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    # Hand records to the background listener for the console and log file
+    logger.addHandler(QueueHandler(_get_queue(log_file, formatter)))
     
+    _loggers[key] = logger
     return logger
 
 def get_logger(name: str) -> logging.Logger:
@@ -0,0 +1,66 @@
+"""
+Market hours utilities for the Finance Assistant.
+"""
+
+from datetime import datetime, time as dtime, timedelta
+from zoneinfo import ZoneInfo
+
+# Intervals whose bars only move while the US market is open
+DAILY_INTERVALS = frozenset({"1d", "5d", "1wk"})
+DAILY_OPEN_TTL = 3600
+
+# US regular trading session; the close leaves a few minutes for final prints to settle
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 15)
+
+# Yahoo Finance index symbols that trade in the US session; other ^ symbols are foreign indices
+US_INDICES = frozenset({"^GSPC", "^DJI", "^IXIC", "^RUT", "^VIX", "^TNX", "^TYX", "^FVX", "^IRX"})
+
+def is_us_session(symbol: str) -> bool:
+    """
+    Check whether a Yahoo Finance symbol only trades during the US session.
+    
+    Args:
+        symbol: Ticker symbol
+    
+    Returns:
+        False for exchange-suffixed listings (e.g. 0700.HK), futures and currencies
+        (=F, =X) and foreign indices; True otherwise
+    """
+    if symbol.startswith("^"):
+        return symbol in US_INDICES
+    return "." not in symbol and "=" not in symbol
+
+def daily_ttl(now: datetime, open_ttl: float = DAILY_OPEN_TTL, us_session: bool = True) -> float:
+    """
+    Get the cache TTL for daily bars at a given time.
+    
+    While the session is open bars are refreshed every open_ttl seconds, never past the
+    close, so an entry cached during the session is not served after the day's final bar.
+    Outside the session they are held until the next open (holidays are not considered).
+    Symbols trading in other sessions are always refreshed every open_ttl seconds.
+    
+    Args:
+        now: Current time in the market time zone
+        open_ttl: TTL in seconds while the session is open
+        us_session: Whether the bars follow the US session (see is_us_session)
+    
+    Returns:
+        TTL in seconds
+    """
+    if not us_session:
+        return open_ttl
+    
+    open_at = now.replace(hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute, second=0, microsecond=0)
+    close_at = now.replace(hour=MARKET_CLOSE.hour, minute=MARKET_CLOSE.minute, second=0, microsecond=0)
+    
+    if now.weekday() < 5 and open_at <= now < close_at:
+        return min(open_ttl, (close_at - now).total_seconds())
+    
+    if now >= open_at:
+        open_at += timedelta(days=1)
+    while open_at.weekday() >= 5:
+        open_at += timedelta(days=1)
+    
+    return (open_at - now).total_seconds()